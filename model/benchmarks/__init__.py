@@ -0,0 +1,3 @@
+"""
+Benchmarks package for blockchain anomaly detection system.
+"""
@@ -0,0 +1,119 @@
+"""
+bench_alerts.py
+
+This script load tests the /alerts WebSocket channel. It starts a server, connects thousands of idle
+subscribers to one worker, and reports the memory each subscriber costs the server, the latency of
+/model/status with all of them connected, and how long it takes to fan the alerts of one /detect request out
+to every subscriber.
+
+Usage:
+    python benchmarks/bench_alerts.py [--subscribers 5000] [--rows 1000]
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import statistics
+import requests
+import websockets
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from benchmarks.bench_event_loop import make_transactions, start_server, poll_status
+from src.main import train_model
+
+
+def resident_memory_mb(pid):
+    """
+    Current resident set size (VmRSS) of a process, in megabytes (Linux only).
+    """
+    with open(f'/proc/{pid}/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    return float('nan')
+
+
+async def connect_all(ws_url, n_subscribers, batch=200):
+    """
+    Open ``n_subscribers`` idle WebSocket connections following the default model.
+    """
+    connections = []
+    for start in range(0, n_subscribers, batch):
+        connections += await asyncio.gather(*[
+            websockets.connect(ws_url, ping_interval=None, max_queue=None)
+            for _ in range(min(batch, n_subscribers - start))
+        ])
+    return connections
+
+
+async def receive_alerts(connection, count):
+    """
+    Wait for ``count`` alerts on one connection.
+    """
+    received = 0
+    while received < count:
+        if json.loads(await connection.recv())['type'] == 'alert':
+            received += 1
+
+
+async def run_async(base_url, server_pid, n_subscribers, rows):
+    loop = asyncio.get_running_loop()
+    status = await loop.run_in_executor(None, poll_status, base_url, 1.0)
+    baseline = resident_memory_mb(server_pid)
+
+    start = time.perf_counter()
+    connections = await connect_all(base_url.replace('http', 'ws') + '/alerts?address=default', n_subscribers)
+    connect_seconds = time.perf_counter() - start
+    await asyncio.sleep(1)
+    connected = resident_memory_mb(server_pid)
+    status_connected = await loop.run_in_executor(None, poll_status, base_url, 1.0)
+
+    body = {'transactions': make_transactions(rows, seed=2)}
+    start = time.perf_counter()
+    response = await loop.run_in_executor(None, lambda: requests.post(f'{base_url}/detect', json=body))
+    response.raise_for_status()
+    detect_seconds = time.perf_counter() - start
+    anomalies = response.json()['anomalous_transactions']
+    await asyncio.gather(*[receive_alerts(connection, anomalies) for connection in connections])
+    fanout_seconds = time.perf_counter() - start
+
+    await asyncio.gather(*[connection.close() for connection in connections])
+
+    print(f"subscribers: {n_subscribers} connected in {connect_seconds:.2f}s")
+    print(f"server memory: {baseline:.0f} MB idle, {connected:.0f} MB with subscribers "
+          f"({(connected - baseline) * 1024 / n_subscribers:.1f} KB per subscriber)")
+    print(f"/model/status median latency: {statistics.median(status):.2f} ms without subscribers, "
+          f"{statistics.median(status_connected):.2f} ms with subscribers")
+    print(f"/detect of {rows} transactions: {detect_seconds:.2f}s; {anomalies} alerts delivered to every "
+          f"subscriber after {fanout_seconds:.2f}s ({anomalies * n_subscribers} messages)")
+
+
+def run(n_subscribers, rows):
+    """
+    Load test the alert channel with ``n_subscribers`` idle subscribers.
+
+    :param n_subscribers: Number of WebSocket subscribers.
+    :param rows: Transactions in the /detect request whose alerts are fanned out.
+    """
+    os.chdir(tempfile.mkdtemp())
+    train_model(make_transactions(5000, seed=1))
+    server, base_url = start_server()
+    try:
+        asyncio.run(run_async(base_url, server.pid, n_subscribers, rows))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Load test the /alerts WebSocket channel')
+    parser.add_argument('--subscribers', type=int, default=5000, help='Number of idle subscribers')
+    parser.add_argument('--rows', type=int, default=1000, help='Transactions in the /detect request')
+    args = parser.parse_args()
+    run(args.subscribers, args.rows)
@@ -0,0 +1,100 @@
+"""
+bench_block_range.py
+
+This script benchmarks repeated day-window queries (the transactions of an address in the last N days) against
+a local Etherscan stand-in with 12-second blocks and a fixed latency per request. It compares the previous
+resolution, which asked for the newest block on every query and assumed 15-second blocks, with the block
+clock, which resolves the window from cached block-by-time lookups.
+
+Usage:
+    python benchmarks/bench_block_range.py [--transactions 100000] [--days 30] [--queries 10] [--latency 0.2]
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from src.api.api_utils import TokenBucket
+from src.api.block_clock import BlockClock
+from src.api.etherscan_api import EtherscanAPI
+from src.api.etherscan_stub import EtherscanStub, synthetic_history, FIRST_BLOCK, FIRST_TIMESTAMP, BLOCK_TIME
+
+ADDRESS = '0x' + 'ab' * 20
+DAY = 24 * 60 * 60
+
+
+def fifteen_second_blocks(api, days):
+    """
+    The previous resolution: the newest block, minus the blocks of N days at 15 seconds per block.
+    """
+    async def fetch():
+        async with api.client() as client:
+            current_block = await api.latest_block(client)
+            start_block = current_block - (DAY // 15 * days)
+            return await api.fetch_transactions(ADDRESS, start_block, current_block, 'desc', client)
+    return asyncio.run(fetch())
+
+
+def run(n_transactions, days, n_queries, latency):
+    """
+    Time ``n_queries`` queries of the last ``days`` days, one minute apart.
+
+    :param n_transactions: Transactions in the history, spread over twice the window.
+    :param days: Days in the window.
+    :param n_queries: Queries made by each mode.
+    :param latency: Seconds each request to the stand-in takes.
+    """
+    blocks = 2 * days * DAY // BLOCK_TIME
+    history = synthetic_history(ADDRESS, n_transactions, blocks=blocks)
+    stub = EtherscanStub({ADDRESS: history}, latency=latency)
+    base_url = stub.start()
+    now = FIRST_TIMESTAMP + (blocks - n_queries * 5) * BLOCK_TIME
+
+    with tempfile.TemporaryDirectory() as directory:
+        current = [now]
+        clock = BlockClock(os.path.join(directory, 'blocks.db'), clock=lambda: current[0])
+        api = EtherscanAPI('key', base_url, rate_limiter=TokenBucket(rate=1000, capacity=1000), clock=clock)
+        modes = [
+            ('15-second blocks', lambda: fifteen_second_blocks(api, days)),
+            ('block clock', lambda: api.get_recent_transactions(ADDRESS, days))
+        ]
+
+        print(f"{'mode':>18} {'seconds':>8} {'requests':>9} {'block requests':>15} {'missing':>8} {'extra':>6}")
+        try:
+            for name, query in modes:
+                current[0] = now
+                before, block_calls = stub.requests, stub.calls['eth_blockNumber'] + stub.calls['getblocknobytime']
+                missing = extra = 0
+                seconds = 0.0
+                for _ in range(n_queries):
+                    # The chain has grown up to the current time
+                    stub.latest_block = FIRST_BLOCK + (int(current[0]) - FIRST_TIMESTAMP) // BLOCK_TIME
+                    expected = {t['hash'] for t in history
+                                if current[0] - days * DAY <= int(t['timeStamp']) <= current[0]}
+                    start = time.perf_counter()
+                    hashes = {t['hash'] for t in query()}
+                    seconds += time.perf_counter() - start
+                    missing += len(expected - hashes)
+                    extra += len(hashes - expected)
+                    current[0] += 60
+                block_calls = stub.calls['eth_blockNumber'] + stub.calls['getblocknobytime'] - block_calls
+                print(f"{name:>18} {seconds:>8.2f} {stub.requests - before:>9} {block_calls:>15} {missing:>8} "
+                      f"{extra:>6}")
+        finally:
+            stub.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark repeated day-window queries against a stand-in')
+    parser.add_argument('--transactions', type=int, default=100000, help='Transactions in the history')
+    parser.add_argument('--days', type=int, default=30, help='Days in the window')
+    parser.add_argument('--queries', type=int, default=10, help='Queries made by each mode')
+    parser.add_argument('--latency', type=float, default=0.2, help='Seconds each request takes')
+    args = parser.parse_args()
+    run(args.transactions, args.days, args.queries, args.latency)
@@ -0,0 +1,60 @@
+"""
+bench_coalescer.py
+
+This script benchmarks micro-batching of small detection requests. It times many small requests processed
+one call each (detect_anomalies) against the same requests coalesced into batches (detect_anomalies_batches),
+which is the work a detection worker does with request coalescing enabled.
+
+Usage:
+    python benchmarks/bench_coalescer.py [--requests 1000] [--size 2] [--max-batch 256]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from benchmarks.bench_event_loop import make_transactions
+from src.main import train_model, detect_anomalies, detect_anomalies_batches
+
+
+def run(n_requests, size, max_batch):
+    """
+    Time ``n_requests`` requests of ``size`` transactions, separately and coalesced.
+
+    :param n_requests: Number of requests.
+    :param size: Transactions per request.
+    :param max_batch: Maximum number of transactions per coalesced batch.
+    """
+    os.chdir(tempfile.mkdtemp())
+    train_model(make_transactions(5000, seed=1))
+    transactions = make_transactions(n_requests * size, seed=2)
+    requests = [transactions[i:i + size] for i in range(0, len(transactions), size)]
+    per_batch = max(1, max_batch // size)
+
+    start = time.perf_counter()
+    for request in requests:
+        detect_anomalies(request)
+    separate = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(0, len(requests), per_batch):
+        detect_anomalies_batches(requests[i:i + per_batch])
+    coalesced = time.perf_counter() - start
+
+    print(f"{'mode':>10} {'total (s)':>10} {'us/request':>11}")
+    print(f"{'separate':>10} {separate:>10.3f} {separate / n_requests * 1e6:>11.1f}")
+    print(f"{'coalesced':>10} {coalesced:>10.3f} {coalesced / n_requests * 1e6:>11.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark coalesced detection of small requests')
+    parser.add_argument('--requests', type=int, default=1000, help='Number of requests')
+    parser.add_argument('--size', type=int, default=2, help='Transactions per request')
+    parser.add_argument('--max-batch', type=int, default=256, help='Maximum transactions per batch')
+    args = parser.parse_args()
+    run(args.requests, args.size, args.max_batch)
@@ -0,0 +1,96 @@
+"""
+bench_columnar.py
+
+This script compares /detect with /detect/columnar on one large batch. For each request format (a JSON
+document, an Arrow IPC stream and a Parquet file) it starts a fresh server, sends the batch, decodes the
+response, and reports the request size, the total time and the peak resident memory of the server and its
+detection workers.
+
+Usage:
+    python benchmarks/bench_columnar.py [--rows 100000]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import requests
+import pyarrow as pa
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from benchmarks.bench_event_loop import make_transactions, start_server
+from benchmarks.bench_detect_stream import peak_memory_mb
+from src.main import train_model
+from src.data_processing import columnar_io
+
+
+def make_table(transactions):
+    """
+    Build the columnar equivalent of a list of raw transactions.
+    """
+    return pa.table({
+        'hash': [t['hash'] for t in transactions],
+        'timeStamp': pa.array([int(t['timeStamp']) for t in transactions], type=pa.int64()),
+        # Wei amounts can exceed the 64-bit integer range
+        'value': pa.array([float(t['value']) for t in transactions], type=pa.float64()),
+        'gas': pa.array([int(t['gas']) for t in transactions], type=pa.int64()),
+        'gasPrice': pa.array([int(t['gasPrice']) for t in transactions], type=pa.int64())
+    })
+
+
+def measure(endpoint, body, params, content_type):
+    """
+    Send ``body`` to ``endpoint`` on a fresh server and time the response, including decoding it.
+
+    :return: Tuple of (total seconds, peak memory in MB, result count).
+    """
+    server, base_url = start_server()
+    try:
+        start = time.perf_counter()
+        response = requests.post(f'{base_url}{endpoint}', data=body, params=params,
+                                 headers={'Content-Type': content_type})
+        response.raise_for_status()
+        if endpoint == '/detect':
+            count = len(json.loads(response.content)['results'])
+        else:
+            count = columnar_io.read_table(response.content, params['format']).num_rows
+        total = time.perf_counter() - start
+        return total, peak_memory_mb(server.pid), count
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def run(rows):
+    """
+    Compare /detect and /detect/columnar on a batch of ``rows`` transactions.
+
+    :param rows: Number of transactions.
+    """
+    os.chdir(tempfile.mkdtemp())
+    train_model(make_transactions(5000, seed=1))
+    transactions = make_transactions(rows)
+    table = make_table(transactions)
+    requests_to_send = [
+        ('json', '/detect', json.dumps({'transactions': transactions}).encode(), None, 'application/json'),
+        ('arrow', '/detect/columnar', columnar_io.write_table(table, fmt='arrow'), {'format': 'arrow'},
+         columnar_io.FORMATS['arrow']),
+        ('parquet', '/detect/columnar', columnar_io.write_table(table, fmt='parquet'), {'format': 'parquet'},
+         columnar_io.FORMATS['parquet'])
+    ]
+
+    print(f"{'format':>8} {'body MB':>8} {'total (s)':>10} {'peak MB':>9} {'results':>8}")
+    for name, endpoint, body, params, content_type in requests_to_send:
+        total, memory, count = measure(endpoint, body, params, content_type)
+        print(f"{name:>8} {len(body) / 2 ** 20:>8.1f} {total:>10.2f} {memory:>9.0f} {count:>8}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Compare /detect and /detect/columnar on a large batch')
+    parser.add_argument('--rows', type=int, default=100000, help='Number of transactions')
+    args = parser.parse_args()
+    run(args.rows)
@@ -0,0 +1,73 @@
+"""
+bench_compiled_forest.py
+
+This script compares sklearn's IsolationForest.predict with the array-backed CompiledIsolationForest
+at several batch sizes, and checks that both produce the same scores.
+
+Usage:
+    python benchmarks/bench_compiled_forest.py [--sizes 1 100 100000]
+"""
+
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from src.anomaly_detection.isolation_forest import AnomalyDetectorIsolationForest
+from benchmarks.bench_detect_anomalies import make_transactions
+
+
+def time_call(func, X, min_seconds=0.2):
+    """
+    Time a scoring call, repeating it until at least ``min_seconds`` have elapsed.
+
+    :param func: Function called with X.
+    :param X: Input array.
+    :param min_seconds: Minimum total measurement time.
+    :return: Mean seconds per call.
+    """
+    repeats = 0
+    start = time.perf_counter()
+    while True:
+        func(X)
+        repeats += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return elapsed / repeats
+
+
+def run(sizes, train_rows=10000):
+    """
+    Train once and compare scoring latency for each batch size.
+
+    :param sizes: Iterable of batch sizes to benchmark.
+    :param train_rows: Number of rows used to train the model.
+    """
+    trained = AnomalyDetectorIsolationForest(make_transactions(train_rows, seed=1))
+    trained.train_model()
+    sklearn_model, compiled = trained.model, trained.compiled
+
+    print(f"{'rows':>8} {'sklearn (ms)':>13} {'compiled (ms)':>14} {'speedup':>8} {'max |score diff|':>17}")
+    for n_rows in sizes:
+        detector = trained.for_inference()
+        detector.df = make_transactions(n_rows)
+        detector.prepare_features()
+        X = detector.scaled_features
+
+        sklearn_time = time_call(sklearn_model.predict, X)
+        compiled_time = time_call(compiled.predict, X)
+        diff = np.abs(sklearn_model.score_samples(X) - compiled.score_samples(X)).max()
+        print(f"{n_rows:>8} {sklearn_time * 1e3:>13.3f} {compiled_time * 1e3:>14.3f} "
+              f"{sklearn_time / compiled_time:>7.1f}x {diff:>17.2e}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark the compiled Isolation Forest scorer')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 100, 100000],
+                        help='Batch sizes to benchmark')
+    args = parser.parse_args()
+    run(args.sizes)
@@ -0,0 +1,77 @@
+"""
+bench_detect_anomalies.py
+
+This script benchmarks AnomalyDetectorIsolationForest.detect_anomalies on synthetic transaction data.
+It reports the time spent in prediction and in result building, normalised per row, so that the
+per-row cost can be compared across batch sizes.
+
+Usage:
+    python benchmarks/bench_detect_anomalies.py [--sizes 1000 10000 100000 1000000]
+"""
+
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from src.anomaly_detection.isolation_forest import AnomalyDetectorIsolationForest, build_results
+
+
+def make_transactions(n_rows, seed=0):
+    """
+    Generate a synthetic, already-cleaned transaction DataFrame.
+
+    :param n_rows: Number of transactions to generate.
+    :param seed: Seed for the random number generator.
+    :return: DataFrame with hash, timeStamp, value, gas and gasPrice columns.
+    """
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'hash': [f'0x{i:064x}' for i in range(n_rows)],
+        'timeStamp': pd.to_datetime(rng.integers(1_600_000_000, 1_700_000_000, n_rows), unit='s'),
+        'value': rng.lognormal(mean=10, sigma=2, size=n_rows),
+        'gas': rng.integers(21000, 500000, n_rows),
+        'gasPrice': rng.integers(1, 200, n_rows) * 1_000_000_000
+    })
+
+
+def run(sizes, train_rows=10000, top_k=None):
+    """
+    Train once and time detection for each batch size.
+
+    :param sizes: Iterable of batch sizes to benchmark.
+    :param train_rows: Number of rows used to train the model.
+    :param top_k: If given, only build results for the top_k most anomalous rows.
+    """
+    trained = AnomalyDetectorIsolationForest(make_transactions(train_rows, seed=1))
+    trained.train_model()
+
+    print(f"{'rows':>10} {'predict (s)':>12} {'build (s)':>10} {'total (s)':>10} {'us/row':>8}")
+    for n_rows in sizes:
+        detector = trained.for_inference()
+        detector.df = make_transactions(n_rows)
+        detector.prepare_features()
+
+        start = time.perf_counter()
+        columns = detector.detect_anomalies_columnar(top_k=top_k)
+        predicted = time.perf_counter()
+        build_results(columns)
+        built = time.perf_counter()
+
+        total = built - start
+        print(f"{n_rows:>10} {predicted - start:>12.3f} {built - predicted:>10.3f} "
+              f"{total:>10.3f} {total / n_rows * 1e6:>8.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark Isolation Forest anomaly detection')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000, 1000000],
+                        help='Batch sizes to benchmark')
+    parser.add_argument('--top-k', type=int, help='Only return the K most anomalous transactions')
+    args = parser.parse_args()
+    run(args.sizes, top_k=args.top_k)
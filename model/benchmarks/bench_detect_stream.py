@@ -0,0 +1,127 @@
+"""
+bench_detect_stream.py
+
+This script compares /detect with /detect/stream on one large batch. For each endpoint it starts a fresh
+server, sends the batch, and reports the time until the first result arrives, the total time, and the peak
+resident memory of the server and its detection workers. The stream is sent from a separate thread while the
+results are read, as /detect/stream reads the body only a few chunks ahead of detection.
+
+Usage:
+    python benchmarks/bench_detect_stream.py [--rows 100000] [--chunk-size 1000]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import threading
+import http.client
+import requests
+from urllib.parse import urlparse, urlencode
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from benchmarks.bench_event_loop import make_transactions, start_server
+from src.main import train_model
+
+
+def peak_memory_mb(pid):
+    """
+    Sum the peak resident set size (VmHWM) of a process and its children, in megabytes (Linux only).
+    """
+    pids = [pid]
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as f:
+            pids += [int(child) for child in f.read().split()]
+    except OSError:
+        return float('nan')
+    total_kb = 0
+    for process in pids:
+        with open(f'/proc/{process}/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    total_kb += int(line.split()[1])
+    return total_kb / 1024
+
+
+def stream_lines(base_url, endpoint, body, params):
+    """
+    POST ``body`` from a background thread and yield the response lines as they arrive.
+    """
+    url = urlparse(base_url)
+    connection = http.client.HTTPConnection(url.hostname, url.port)
+    connection.putrequest('POST', f'{endpoint}?{urlencode(params or {})}')
+    connection.putheader('Content-Type', 'application/x-ndjson')
+    connection.putheader('Content-Length', str(len(body)))
+    connection.endheaders()
+    sender = threading.Thread(target=connection.sock.sendall, args=(body,), daemon=True)
+    sender.start()
+    try:
+        response = connection.getresponse()
+        if response.status != 200:
+            raise RuntimeError(f"{endpoint} answered {response.status}")
+        for line in response:
+            yield line
+    finally:
+        sender.join()
+        connection.close()
+
+
+def measure(endpoint, body, params=None):
+    """
+    Send ``body`` to ``endpoint`` on a fresh server and time the response.
+
+    :return: Tuple of (seconds to first result, total seconds, peak memory in MB, result count).
+    """
+    server, base_url = start_server()
+    try:
+        start = time.perf_counter()
+        first = None
+        count = 0
+        if endpoint == '/detect':
+            response = requests.post(f'{base_url}{endpoint}', data=body, params=params,
+                                     headers={'Content-Type': 'application/json'})
+            response.raise_for_status()
+            count = len(json.loads(response.content)['results'])
+            first = time.perf_counter() - start
+        else:
+            for line in stream_lines(base_url, endpoint, body, params):
+                if first is None:
+                    first = time.perf_counter() - start
+                count += 1
+        total = time.perf_counter() - start
+        return first, total, peak_memory_mb(server.pid), count
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def run(rows, chunk_size):
+    """
+    Compare /detect and /detect/stream on a batch of ``rows`` transactions.
+
+    :param rows: Number of transactions.
+    :param chunk_size: Chunk size for /detect/stream.
+    """
+    os.chdir(tempfile.mkdtemp())
+    train_model(make_transactions(5000, seed=1))
+    transactions = make_transactions(rows)
+    document = json.dumps({'transactions': transactions}).encode()
+    ndjson = b''.join(json.dumps(t).encode() + b'\n' for t in transactions)
+
+    print(f"{'endpoint':>15} {'first (s)':>10} {'total (s)':>10} {'peak MB':>9} {'results':>8}")
+    for endpoint, body, params in (('/detect', document, None),
+                                   ('/detect/stream', ndjson, {'chunk_size': chunk_size})):
+        first, total, memory, count = measure(endpoint, body, params)
+        print(f"{endpoint:>15} {first:>10.2f} {total:>10.2f} {memory:>9.0f} {count:>8}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Compare /detect and /detect/stream on a large batch')
+    parser.add_argument('--rows', type=int, default=100000, help='Number of transactions')
+    parser.add_argument('--chunk-size', type=int, default=1000, help='Chunk size for /detect/stream')
+    args = parser.parse_args()
+    run(args.rows, args.chunk_size)
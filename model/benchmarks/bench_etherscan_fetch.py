@@ -0,0 +1,71 @@
+"""
+bench_etherscan_fetch.py
+
+This script benchmarks fetching a large transaction history from a local Etherscan stand-in with a fixed
+latency per request. It compares the previous single txlist query (which Etherscan truncates at 10000
+records), the windowed fetcher with one request at a time, and the windowed fetcher with concurrent requests.
+
+Usage:
+    python benchmarks/bench_etherscan_fetch.py [--transactions 200000] [--latency 0.2]
+"""
+
+import os
+import sys
+import time
+import argparse
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from src.api.etherscan_api import EtherscanAPI
+from src.api.etherscan_stub import EtherscanStub, synthetic_history
+
+ADDRESS = '0x' + 'ab' * 20
+
+
+def single_query(base_url):
+    """
+    The previous fetch: one txlist query over the whole block range.
+    """
+    params = {'module': 'account', 'action': 'txlist', 'address': ADDRESS, 'startblock': 0,
+              'endblock': 99999999, 'sort': 'desc', 'apikey': 'key'}
+    return requests.get(base_url, params=params).json()['result']
+
+
+def run(n_transactions, latency, concurrency):
+    """
+    Time fetching a history of ``n_transactions`` transactions.
+
+    :param n_transactions: Transactions in the history.
+    :param latency: Seconds each request to the stand-in takes.
+    :param concurrency: Requests in flight for the concurrent fetcher.
+    """
+    stub = EtherscanStub({ADDRESS: synthetic_history(ADDRESS, n_transactions)}, latency=latency)
+    base_url = stub.start()
+    modes = [
+        ('single query', lambda: single_query(base_url)),
+        ('windows, 1 at a time', lambda: EtherscanAPI('key', base_url, concurrency=1).get_transactions(ADDRESS)),
+        (f'windows, {concurrency} at a time',
+         lambda: EtherscanAPI('key', base_url, concurrency=concurrency).get_transactions(ADDRESS))
+    ]
+
+    print(f"{'mode':>22} {'seconds':>8} {'requests':>9} {'transactions':>13}")
+    try:
+        for name, fetch in modes:
+            before = stub.requests
+            start = time.perf_counter()
+            transactions = fetch()
+            seconds = time.perf_counter() - start
+            print(f"{name:>22} {seconds:>8.2f} {stub.requests - before:>9} {len(transactions):>13}")
+    finally:
+        stub.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark fetching a large history from an Etherscan stand-in')
+    parser.add_argument('--transactions', type=int, default=200000, help='Transactions in the history')
+    parser.add_argument('--latency', type=float, default=0.2, help='Seconds each request takes')
+    parser.add_argument('--concurrency', type=int, default=5, help='Requests in flight')
+    args = parser.parse_args()
+    run(args.transactions, args.latency, args.concurrency)
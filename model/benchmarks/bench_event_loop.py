@@ -0,0 +1,147 @@
+"""
+bench_event_loop.py
+
+This script load-tests the API to check that large /detect batches do not stall other requests. It starts the
+app with uvicorn in a separate process, keeps several large /detect requests in flight, and meanwhile polls
+/model/status, reporting its latency with and without detection load. With detection running off the event
+loop, the status latency under load should stay close to the idle latency.
+
+Usage:
+    python benchmarks/bench_event_loop.py [--rows 20000] [--concurrency 4] [--duration 10]
+"""
+
+import os
+import sys
+import time
+import json
+import socket
+import argparse
+import tempfile
+import threading
+import subprocess
+import numpy as np
+import requests
+
+MODEL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, MODEL_DIR)
+sys.path.insert(0, os.path.join(MODEL_DIR, 'src'))
+
+from src.main import train_model
+
+
+def make_transactions(n_rows, seed=0):
+    """
+    Generate synthetic raw transactions, as sent to the API.
+
+    :param n_rows: Number of transactions to generate.
+    :param seed: Seed for the random number generator.
+    :return: List of transaction dictionaries.
+    """
+    rng = np.random.default_rng(seed)
+    values = rng.lognormal(mean=40, sigma=2, size=n_rows)
+    gas = rng.choice([21000, 50000, 150000], n_rows)
+    gas_price = rng.integers(1, 200, n_rows) * 1_000_000_000
+    return [{
+        'hash': f'0x{i:064x}',
+        'timeStamp': str(1_600_000_000 + i),
+        'value': f'{values[i]:.0f}',
+        'gas': str(gas[i]),
+        'gasPrice': str(gas_price[i])
+    } for i in range(n_rows)]
+
+
+def start_server():
+    """
+    Start the app with uvicorn in a separate process on a free local port, serving models from the
+    current directory.
+
+    :return: Tuple of (server process, base URL).
+    """
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([MODEL_DIR, os.path.join(MODEL_DIR, 'src')]))
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'src.app:app', '--port', str(port), '--log-level', 'warning'],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    base_url = f'http://127.0.0.1:{port}'
+    while True:
+        try:
+            requests.get(f'{base_url}/', timeout=1)
+            return server, base_url
+        except requests.ConnectionError:
+            time.sleep(0.1)
+
+
+def poll_status(base_url, duration, interval=0.05):
+    """
+    Poll /model/status for ``duration`` seconds and return the observed latencies in milliseconds.
+    """
+    latencies = []
+    deadline = time.perf_counter() + duration
+    with requests.Session() as session:
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            session.get(f'{base_url}/model/status').raise_for_status()
+            latencies.append((time.perf_counter() - start) * 1000)
+            time.sleep(interval)
+    return np.array(latencies)
+
+
+def send_detect(base_url, body, stop, counts):
+    """
+    Send /detect requests back to back until ``stop`` is set, counting responses by status code.
+    """
+    headers = {'Content-Type': 'application/json'}
+    with requests.Session() as session:
+        while not stop.is_set():
+            status = session.post(f'{base_url}/detect', data=body, headers=headers).status_code
+            counts[status] = counts.get(status, 0) + 1
+
+
+def describe(name, latencies):
+    print(f"{name:>12} {len(latencies):>8} {np.percentile(latencies, 50):>9.1f} "
+          f"{np.percentile(latencies, 99):>9.1f} {latencies.max():>9.1f}")
+
+
+def run(rows, concurrency, duration):
+    """
+    Measure /model/status latency while idle and while ``concurrency`` clients send batches of ``rows``.
+
+    :param rows: Transactions per /detect request.
+    :param concurrency: Number of clients sending /detect requests concurrently.
+    :param duration: Seconds to measure in each phase.
+    """
+    os.chdir(tempfile.mkdtemp())
+    train_model(make_transactions(5000, seed=1))
+    server, base_url = start_server()
+    # Encoded once, so the load generator spends its time waiting on the server
+    body = json.dumps({'transactions': make_transactions(rows)}).encode()
+
+    print(f"{'phase':>12} {'requests':>8} {'p50 (ms)':>9} {'p99 (ms)':>9} {'max (ms)':>9}")
+    describe('idle', poll_status(base_url, duration))
+
+    stop = threading.Event()
+    counts = {}
+    clients = [threading.Thread(target=send_detect, args=(base_url, body, stop, counts))
+               for _ in range(concurrency)]
+    for client in clients:
+        client.start()
+    describe('under load', poll_status(base_url, duration))
+    stop.set()
+    for client in clients:
+        client.join()
+    server.terminate()
+    server.wait()
+
+    print(f"/detect responses by status code: {counts}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Measure /model/status latency while /detect is busy')
+    parser.add_argument('--rows', type=int, default=20000, help='Transactions per /detect request')
+    parser.add_argument('--concurrency', type=int, default=4, help='Concurrent /detect clients')
+    parser.add_argument('--duration', type=float, default=10, help='Seconds to measure in each phase')
+    args = parser.parse_args()
+    run(args.rows, args.concurrency, args.duration)
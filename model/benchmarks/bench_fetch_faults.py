@@ -0,0 +1,70 @@
+"""
+bench_fetch_faults.py
+
+This script benchmarks the throughput and resilience of fetching a large transaction history from the local
+Etherscan stand-in while it answers a share of the requests with HTTP 500 or HTTP 429 (with a Retry-After
+header). For each fault rate it reports the time taken, the requests made, the faults injected and whether the
+complete history was fetched every time.
+
+Usage:
+    python benchmarks/bench_fetch_faults.py [--transactions 200000] [--rounds 5] [--latency 0.05]
+                                            [--fixture history.json]
+"""
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from src.api.api_utils import TokenBucket
+from src.api.etherscan_api import EtherscanAPI
+from src.api.etherscan_stub import EtherscanStub, synthetic_history, THROTTLE, ERROR
+
+ADDRESS = '0x' + 'ab' * 20
+
+# (error rate, throttle rate) pairs
+FAULT_RATES = [(0.0, 0.0), (0.05, 0.0), (0.2, 0.0), (0.0, 0.05), (0.0, 0.2), (0.1, 0.1)]
+
+
+def run(n_transactions, rounds, latency, fixture=None):
+    """
+    Time fetching a history ``rounds`` times under each fault rate.
+
+    :param n_transactions: Transactions in the synthetic history.
+    :param rounds: Times the history is fetched under each fault rate.
+    :param latency: Seconds each request to the stand-in takes.
+    :param fixture: Optional fixture file to replay instead of a synthetic history.
+    """
+    if fixture:
+        histories = EtherscanStub.from_fixture(fixture).histories
+    else:
+        histories = {ADDRESS: synthetic_history(ADDRESS, n_transactions)}
+
+    print(f"{'errors':>7} {'429s':>5} {'seconds':>8} {'requests':>9} {'500 sent':>9} {'429 sent':>9} "
+          f"{'complete':>9}")
+    for error_rate, throttle_rate in FAULT_RATES:
+        stub = EtherscanStub(histories, latency=latency, error_rate=error_rate, throttle_rate=throttle_rate)
+        api = EtherscanAPI('key', stub.start(), rate_limiter=TokenBucket(rate=1000, capacity=1000))
+        try:
+            start = time.perf_counter()
+            complete = all(len(api.get_transactions(address)) == len(history)
+                           for _ in range(rounds) for address, history in histories.items())
+            seconds = time.perf_counter() - start
+            requests = stub.requests + sum(stub.injected.values())
+            print(f"{error_rate:>7.0%} {throttle_rate:>5.0%} {seconds:>8.2f} {requests:>9} "
+                  f"{stub.injected[ERROR]:>9} {stub.injected[THROTTLE]:>9} {str(complete):>9}")
+        finally:
+            stub.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark fetching a history from a stand-in injecting faults')
+    parser.add_argument('--transactions', type=int, default=200000, help='Transactions in the history')
+    parser.add_argument('--rounds', type=int, default=5, help='Times the history is fetched per fault rate')
+    parser.add_argument('--latency', type=float, default=0.05, help='Seconds each request takes')
+    parser.add_argument('--fixture', help='Fixture file to replay instead of a synthetic history')
+    args = parser.parse_args()
+    run(args.transactions, args.rounds, args.latency, args.fixture)
@@ -0,0 +1,78 @@
+"""
+bench_metrics.py
+
+This script measures the overhead of the pipeline metrics. It times many small detect_anomalies calls with the
+stage timers and counters enabled and with them replaced by no-ops, alternating the two to even out noise,
+and reports the best time per call of each.
+
+Usage:
+    python benchmarks/bench_metrics.py [--requests 300] [--size 10] [--repeat 5]
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from benchmarks.bench_event_loop import make_transactions
+from src.main import train_model, detect_anomalies
+from src.metrics import metrics
+
+
+class NoTimer:
+    """Stage timer that records nothing."""
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+def time_calls(requests):
+    start = time.perf_counter()
+    for request in requests:
+        detect_anomalies(request)
+    return (time.perf_counter() - start) / len(requests)
+
+
+def run(n_requests, size, repeat):
+    """
+    Time ``n_requests`` detection calls of ``size`` transactions with and without metrics.
+
+    :param n_requests: Number of calls per measurement.
+    :param size: Transactions per call.
+    :param repeat: Number of measurements of each variant.
+    """
+    os.chdir(tempfile.mkdtemp())
+    train_model(make_transactions(5000, seed=1))
+    requests = [make_transactions(size, seed=i) for i in range(n_requests)]
+    logging.disable(logging.CRITICAL)
+
+    stage, inc = metrics.stage, metrics.inc
+    no_timer = NoTimer()
+    enabled, disabled = [], []
+    for _ in range(repeat):
+        metrics.stage, metrics.inc = stage, inc
+        enabled.append(time_calls(requests))
+        metrics.stage, metrics.inc = (lambda *args: no_timer), (lambda *args, **kwargs: None)
+        disabled.append(time_calls(requests))
+    metrics.stage, metrics.inc = stage, inc
+
+    print(f"{'metrics':>10} {'ms/call':>9}")
+    print(f"{'enabled':>10} {min(enabled) * 1e3:>9.3f}")
+    print(f"{'disabled':>10} {min(disabled) * 1e3:>9.3f}")
+    print(f"overhead: {(min(enabled) / min(disabled) - 1) * 100:.2f}%")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Measure the overhead of the pipeline metrics')
+    parser.add_argument('--requests', type=int, default=300, help='Detection calls per measurement')
+    parser.add_argument('--size', type=int, default=10, help='Transactions per call')
+    parser.add_argument('--repeat', type=int, default=5, help='Measurements of each variant')
+    args = parser.parse_args()
+    run(args.requests, args.size, args.repeat)
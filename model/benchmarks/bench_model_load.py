@@ -0,0 +1,68 @@
+"""
+bench_model_load.py
+
+This script measures how long it takes to load a saved model (the cold start of a detection worker) and to
+score a first small batch with it, for forests of increasing size. The compiled forest arrays are
+memory-mapped and the sklearn estimator is only loaded for large batches, so both times should stay about
+the same whatever the number of trees.
+
+Usage:
+    python benchmarks/bench_model_load.py [--trees 100 400 1600] [--rows 5000]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from src.anomaly_detection.isolation_forest import AnomalyDetectorIsolationForest
+from benchmarks.bench_detect_anomalies import make_transactions
+
+
+def directory_size_mb(path):
+    """
+    Total size of the files below ``path``, in megabytes.
+    """
+    return sum(os.path.getsize(os.path.join(root, name))
+               for root, _, names in os.walk(path) for name in names) / 1024 / 1024
+
+
+def run(tree_counts, train_rows):
+    """
+    Train and save a model for each forest size, then time loading it and scoring a first batch.
+
+    :param tree_counts: Iterable of n_estimators values.
+    :param train_rows: Number of rows used to train each model.
+    """
+    batch = make_transactions(100)
+    print(f"{'trees':>6} {'size MB':>8} {'load (s)':>9} {'first batch (s)':>16}")
+    for n_trees in tree_counts:
+        with tempfile.TemporaryDirectory() as directory:
+            trained = AnomalyDetectorIsolationForest(make_transactions(train_rows, seed=1))
+            trained.model.set_params(n_estimators=n_trees)
+            trained.train_model()
+            trained.save_model(directory)
+
+            start = time.perf_counter()
+            loaded = AnomalyDetectorIsolationForest.load_model(directory)
+            load = time.perf_counter() - start
+
+            start = time.perf_counter()
+            detector = loaded.for_inference()
+            detector.df = batch.copy()
+            detector.prepare_features()
+            detector.detect_anomalies_columnar()
+            first = time.perf_counter() - start
+            print(f"{n_trees:>6} {directory_size_mb(directory):>8.1f} {load:>9.3f} {first:>16.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark loading saved models of increasing size')
+    parser.add_argument('--trees', type=int, nargs='+', default=[100, 400, 1600], help='Forest sizes')
+    parser.add_argument('--rows', type=int, default=5000, help='Rows used to train each model')
+    args = parser.parse_args()
+    run(args.trees, args.rows)
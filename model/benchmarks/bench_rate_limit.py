@@ -0,0 +1,70 @@
+"""
+bench_rate_limit.py
+
+This script benchmarks fetching several transaction histories at once, from concurrent threads, against a
+local Etherscan stand-in that enforces a calls-per-second quota. It compares relying on retries with backoff
+alone, where the threads burst past the quota and back off after being rejected, with pacing all threads
+through the shared token-bucket rate limiter sized just under the quota.
+
+Usage:
+    python benchmarks/bench_rate_limit.py [--addresses 4] [--transactions 40000] [--rate 5] [--latency 0.1]
+"""
+
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from src.api.api_utils import TokenBucket
+from src.api.etherscan_api import EtherscanAPI
+from src.api.etherscan_stub import EtherscanStub, synthetic_history
+
+
+def run(n_addresses, n_transactions, rate, latency):
+    """
+    Time fetching ``n_addresses`` histories concurrently under a quota of ``rate`` calls per second.
+
+    :param n_addresses: Histories fetched at once, one thread each.
+    :param n_transactions: Transactions in each history.
+    :param rate: Calls per second allowed by the stand-in.
+    :param latency: Seconds each request to the stand-in takes.
+    """
+    addresses = [f'0x{i + 1:040x}' for i in range(n_addresses)]
+    histories = {address: synthetic_history(address, n_transactions, seed=i) for i, address in enumerate(addresses)}
+    stub = EtherscanStub(histories, latency=latency, rate_limit=rate)
+    base_url = stub.start()
+    modes = [
+        ('retries only', None),
+        ('shared token bucket', TokenBucket(rate=0.9 * rate, capacity=1))
+    ]
+
+    print(f"{'mode':>20} {'seconds':>8} {'requests':>9} {'rejected':>9} {'accepted/s':>10} {'transactions':>13}")
+    try:
+        for name, limiter in modes:
+            before, rejected_before = stub.requests, stub.rejected
+            # Let the quota window of the previous mode expire
+            time.sleep(1)
+            start = time.perf_counter()
+            with ThreadPoolExecutor(n_addresses) as pool:
+                apis = [EtherscanAPI('key', base_url, rate_limiter=limiter) for _ in addresses]
+                results = list(pool.map(lambda pair: pair[0].get_transactions(pair[1]), zip(apis, addresses)))
+            seconds = time.perf_counter() - start
+            accepted, rejected = stub.requests - before, stub.rejected - rejected_before
+            print(f"{name:>20} {seconds:>8.2f} {accepted + rejected:>9} {rejected:>9} {accepted / seconds:>10.2f} "
+                  f"{sum(len(result) for result in results):>13}")
+    finally:
+        stub.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark concurrent fetches against a rate-limited stand-in')
+    parser.add_argument('--addresses', type=int, default=4, help='Histories fetched at once')
+    parser.add_argument('--transactions', type=int, default=40000, help='Transactions in each history')
+    parser.add_argument('--rate', type=int, default=5, help='Calls per second allowed')
+    parser.add_argument('--latency', type=float, default=0.1, help='Seconds each request takes')
+    args = parser.parse_args()
+    run(args.addresses, args.transactions, args.rate, args.latency)
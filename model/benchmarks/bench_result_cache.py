@@ -0,0 +1,62 @@
+"""
+bench_result_cache.py
+
+This script benchmarks the detection result cache on the access pattern it targets: a client re-submitting a
+sliding window of recent transactions, where each request repeats most of the previous one. It times the
+windows scored without a cache and with one, and reports the cache hit ratio.
+
+Usage:
+    python benchmarks/bench_result_cache.py [--window 1000] [--step 50] [--requests 100]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from benchmarks.bench_event_loop import make_transactions
+from src.main import train_model, detect_anomalies
+from src.anomaly_detection.result_cache import ResultCache
+
+
+def run(window, step, n_requests):
+    """
+    Time ``n_requests`` sliding windows of ``window`` transactions advancing by ``step``.
+
+    :param window: Transactions per request.
+    :param step: New transactions per request.
+    :param n_requests: Number of requests.
+    """
+    os.chdir(tempfile.mkdtemp())
+    train_model(make_transactions(5000, seed=1))
+    transactions = make_transactions(window + step * n_requests, seed=2)
+    windows = [transactions[i * step:i * step + window] for i in range(n_requests)]
+    cache = ResultCache(capacity=window * 4, ttl=600)
+
+    start = time.perf_counter()
+    for request in windows:
+        detect_anomalies(request)
+    uncached = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for request in windows:
+        detect_anomalies(request, cache=cache)
+    cached = time.perf_counter() - start
+
+    print(f"{'mode':>10} {'total (s)':>10} {'ms/request':>11}")
+    print(f"{'no cache':>10} {uncached:>10.3f} {uncached / n_requests * 1e3:>11.2f}")
+    print(f"{'cache':>10} {cached:>10.3f} {cached / n_requests * 1e3:>11.2f}")
+    print(f"hit ratio: {cache.stats()['hit_ratio']:.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark the detection result cache on sliding windows')
+    parser.add_argument('--window', type=int, default=1000, help='Transactions per request')
+    parser.add_argument('--step', type=int, default=50, help='New transactions per request')
+    parser.add_argument('--requests', type=int, default=100, help='Number of requests')
+    args = parser.parse_args()
+    run(args.window, args.step, args.requests)
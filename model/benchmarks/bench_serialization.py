@@ -0,0 +1,93 @@
+"""
+bench_serialization.py
+
+This script benchmarks the serialization of detection results. For one large batch it times the previous
+response path (validation through the AnomalyDetectionResponse model, then the standard JSON encoder) against
+the orjson response path, and the previous CLI writer (json.dump with JSONEncoder) against the orjson one.
+
+Usage:
+    python benchmarks/bench_serialization.py [--rows 100000]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import numpy as np
+import pandas as pd
+from fastapi.responses import JSONResponse
+from benchmarks.bench_event_loop import make_transactions
+from src.app import AnomalyDetectionResponse, detection_response
+from src.main import train_model, detect_anomalies
+from src.utils import serialization
+
+
+class JSONEncoder(json.JSONEncoder):
+    """The standard-library encoder of the previous CLI writer, kept as a reference."""
+    def default(self, obj):
+        if isinstance(obj, np.integer):
+            return int(obj)
+        if isinstance(obj, np.floating):
+            return float(obj)
+        if isinstance(obj, (pd.Timestamp, datetime)):
+            return obj.isoformat()
+        if isinstance(obj, np.ndarray):
+            return obj.tolist()
+        return super().default(obj)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def run(rows):
+    """
+    Time the serialization of the results of a batch of ``rows`` transactions.
+
+    :param rows: Number of transactions.
+    """
+    os.chdir(tempfile.mkdtemp())
+    train_model(make_transactions(5000, seed=1))
+    start = time.perf_counter()
+    results = detect_anomalies(make_transactions(rows, seed=2))
+    scoring = time.perf_counter() - start
+
+    def pydantic_response():
+        response = AnomalyDetectionResponse(
+            results=results,
+            total_transactions=len(results),
+            anomalous_transactions=sum(1 for r in results if r['is_anomaly'])
+        )
+        return JSONResponse(content=response.model_dump(mode="json")).body
+
+    def json_file():
+        with open('results.json', 'w') as f:
+            json.dump(results, f, indent=2, cls=JSONEncoder)
+
+    timings = [
+        ('response', 'pydantic + json', timed(pydantic_response)),
+        ('response', 'orjson', timed(lambda: serialization.dumps(detection_response(results)))),
+        ('cli file', 'json + JSONEncoder', timed(json_file)),
+        ('cli file', 'orjson', timed(lambda: serialization.dump(results, 'results.json')))
+    ]
+
+    print(f"scoring {rows} transactions: {scoring:.3f}s")
+    print(f"{'output':>10} {'encoder':>20} {'seconds':>9}")
+    for output, encoder, seconds in timings:
+        print(f"{output:>10} {encoder:>20} {seconds:>9.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark the serialization of detection results')
+    parser.add_argument('--rows', type=int, default=100000, help='Number of transactions')
+    args = parser.parse_args()
+    run(args.rows)
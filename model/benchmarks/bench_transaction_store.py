@@ -0,0 +1,75 @@
+"""
+bench_transaction_store.py
+
+This script benchmarks loading the training history of an address for repeated retrains, from a local
+Etherscan stand-in with a fixed latency per request. It compares downloading the full history for every
+retrain with the local transaction store: the first sync, an incremental sync after new blocks were added,
+and a read of a recently synced history.
+
+Usage:
+    python benchmarks/bench_transaction_store.py [--transactions 100000] [--latency 0.2]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import pandas as pd
+from src.api.etherscan_api import EtherscanAPI
+from src.api.etherscan_stub import EtherscanStub, synthetic_history
+from src.data_processing.transaction_store import TransactionStore
+
+ADDRESS = '0x' + 'ab' * 20
+
+
+def run(n_transactions, latency):
+    """
+    Time loading a history of ``n_transactions`` transactions.
+
+    :param n_transactions: Transactions in the history.
+    :param latency: Seconds each request to the stand-in takes.
+    """
+    history = synthetic_history(ADDRESS, n_transactions)
+    # The history is synced once with 99% of its transactions; the rest arrive before the next retrain
+    cutoff = int(history[int(n_transactions * 0.99)]['blockNumber'])
+    stub = EtherscanStub({ADDRESS: [t for t in history if int(t['blockNumber']) < cutoff]}, latency=latency)
+    api = EtherscanAPI('key', stub.start())
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = TransactionStore(os.path.join(directory, 'transactions.db'))
+
+        def incremental_sync():
+            stub.add_history(ADDRESS, history)
+            store.sync(ADDRESS, api, force=True)
+            return store.frame(ADDRESS)
+
+        modes = [
+            ('full download', lambda: pd.DataFrame(api.get_transactions(ADDRESS))),
+            ('store: first sync', lambda: (store.sync(ADDRESS, api), store.frame(ADDRESS))[1]),
+            ('store: new blocks', incremental_sync),
+            ('store: current', lambda: (store.sync(ADDRESS, api), store.frame(ADDRESS))[1])
+        ]
+
+        print(f"{'mode':>18} {'seconds':>8} {'requests':>9} {'transactions':>13}")
+        try:
+            for name, load in modes:
+                before = stub.requests
+                start = time.perf_counter()
+                df = load()
+                seconds = time.perf_counter() - start
+                print(f"{name:>18} {seconds:>8.2f} {stub.requests - before:>9} {len(df):>13}")
+        finally:
+            stub.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark loading training histories through the local store')
+    parser.add_argument('--transactions', type=int, default=100000, help='Transactions in the history')
+    parser.add_argument('--latency', type=float, default=0.2, help='Seconds each request takes')
+    args = parser.parse_args()
+    run(args.transactions, args.latency)
@@ -0,0 +1,92 @@
+"""
+bench_warmup.py
+
+This script measures what the startup warm-up saves the first requests after a deploy. It starts a fresh
+server with the warm-up disabled and one with it enabled, waits until /ready reports ready, and then times
+the first few /detect requests, which run on detection workers that have not served a request yet.
+
+Usage:
+    python benchmarks/bench_warmup.py [--rows 1000] [--requests 8]
+"""
+
+import os
+import sys
+import time
+import socket
+import argparse
+import tempfile
+import subprocess
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from benchmarks.bench_event_loop import make_transactions, MODEL_DIR
+from src.main import train_model
+
+# Starts the app with the warm-up switched on or off
+SERVER_SCRIPT = (
+    "import sys, uvicorn; import src.utils.config as config; "
+    "config.WARMUP_ENABLED = sys.argv[2] == 'on'; "
+    "uvicorn.run('src.app:app', port=int(sys.argv[1]), log_level='warning')"
+)
+
+
+def start_server(warmup):
+    """
+    Start the app on a free local port and wait until /ready answers 200.
+
+    :return: Tuple of (server process, base URL, seconds until ready).
+    """
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([MODEL_DIR, os.path.join(MODEL_DIR, 'src')]))
+    start = time.perf_counter()
+    server = subprocess.Popen([sys.executable, '-c', SERVER_SCRIPT, str(port), 'on' if warmup else 'off'],
+                              env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f'http://127.0.0.1:{port}'
+    while True:
+        try:
+            if requests.get(f'{base_url}/ready', timeout=1).status_code == 200:
+                return server, base_url, time.perf_counter() - start
+        except requests.ConnectionError:
+            pass
+        time.sleep(0.05)
+
+
+def run(rows, n_requests):
+    """
+    Time the first ``n_requests`` /detect requests of ``rows`` transactions after startup.
+
+    :param rows: Transactions per request.
+    :param n_requests: Number of requests timed.
+    """
+    os.chdir(tempfile.mkdtemp())
+    train_model(make_transactions(5000, seed=1))
+    # Distinct transactions per request, so no request is answered from the result cache
+    transactions = make_transactions(rows * n_requests, seed=2)
+    bodies = [{'transactions': transactions[i * rows:(i + 1) * rows]} for i in range(n_requests)]
+
+    columns = ' '.join(f"{f'req {i + 1} (ms)':>12}" for i in range(n_requests))
+    print(f"{'warm-up':>8} {'ready (s)':>10} {columns}")
+    for warmup in (False, True):
+        server, base_url, ready = start_server(warmup)
+        try:
+            latencies = []
+            for body in bodies:
+                start = time.perf_counter()
+                requests.post(f'{base_url}/detect', json=body).raise_for_status()
+                latencies.append((time.perf_counter() - start) * 1000)
+        finally:
+            server.terminate()
+            server.wait()
+        print(f"{'on' if warmup else 'off':>8} {ready:>10.2f} " + ' '.join(f"{ms:>12.1f}" for ms in latencies))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Measure the effect of the startup warm-up on the first requests')
+    parser.add_argument('--rows', type=int, default=1000, help='Transactions per request')
+    parser.add_argument('--requests', type=int, default=8, help='Number of requests timed')
+    args = parser.parse_args()
+    run(args.rows, args.requests)
@@ -0,0 +1,206 @@
+"""
+alert_hub.py
+
+This module fans anomaly alerts out to live subscribers. Each subscriber (one WebSocket connection) follows a
+set of addresses and gets the anomalous results of every detection run for those addresses. Alerts are
+queued in a bounded buffer per subscriber: when a slow consumer falls behind, the oldest alerts are dropped
+and counted, so one stalled connection never holds more than a fixed amount of memory or delays the others.
+An idle subscriber costs one buffer and one waiting coroutine.
+
+Adheres to the Single Responsibility Principle (SRP) by focusing only on delivering alerts to subscribers.
+"""
+
+import asyncio
+from collections import deque
+
+from .metrics import metrics
+from .anomaly_detection.model_registry import normalize_address
+from .utils.config import ALERT_BUFFER_SIZE
+from .utils.serialization import dumps
+from .utils.logger import get_logger
+
+# Initialize logger
+logger = get_logger(__name__)
+
+# Channel of the results of the default model (detection requests without an address)
+DEFAULT_CHANNEL = "default"
+
+
+def channel(address):
+    """
+    Name of the alert channel of an address: its canonical form, so that checksummed and lower-case spellings
+    share one channel. None (or DEFAULT_CHANNEL) stands for the default model.
+
+    :raises ValueError: If the address is not valid
+    """
+    if address is None or address == DEFAULT_CHANNEL:
+        return DEFAULT_CHANNEL
+    return normalize_address(address)
+
+
+class Subscriber:
+    """
+    Subscriber holds the addresses one consumer follows and its bounded buffer of encoded alerts.
+    """
+
+    def __init__(self, buffer_size: int = ALERT_BUFFER_SIZE):
+        """
+        Initializes a subscriber without addresses.
+
+        :param buffer_size: Maximum number of undelivered alerts kept; older ones are dropped first.
+        """
+        self.addresses = set()
+        self.buffer = deque(maxlen=buffer_size)
+        self.dropped = 0
+        self.delivered = 0
+        self._reported = 0
+        self._ready = asyncio.Event()
+
+    def push(self, message: str):
+        """
+        Queue an encoded alert, dropping the oldest queued alert if the buffer is full.
+        """
+        if len(self.buffer) == self.buffer.maxlen:
+            self.dropped += 1
+            metrics.inc('alerts_dropped_total')
+        self.buffer.append(message)
+        self._ready.set()
+
+    async def next_messages(self):
+        """
+        Wait until alerts are queued and take all of them.
+
+        If alerts were dropped since the last call, a message with the number of dropped alerts comes first.
+
+        :return: List of encoded messages
+        """
+        await self._ready.wait()
+        self._ready.clear()
+        messages = []
+        if self.dropped > self._reported:
+            messages.append(dumps({"type": "dropped", "count": self.dropped - self._reported,
+                                   "total": self.dropped}).decode())
+            self._reported = self.dropped
+        messages.extend(self.buffer)
+        self.delivered += len(self.buffer)
+        self.buffer.clear()
+        return messages
+
+
+class AlertHub:
+    """
+    AlertHub keeps the subscribers of each address and publishes detection results to them.
+
+    Must be used from a single event loop.
+    """
+
+    def __init__(self, buffer_size: int = ALERT_BUFFER_SIZE):
+        """
+        Initializes a hub without subscribers.
+
+        :param buffer_size: Buffer size of the subscribers created by ``connect``.
+        """
+        self.buffer_size = buffer_size
+        self._subscribers = set()
+        self._channels = {}
+        self.published = 0
+
+    def connect(self):
+        """
+        Register a new subscriber without addresses.
+
+        :return: Subscriber
+        """
+        subscriber = Subscriber(self.buffer_size)
+        self._subscribers.add(subscriber)
+        metrics.add_gauge('alert_subscribers', 1)
+        return subscriber
+
+    def disconnect(self, subscriber: Subscriber):
+        """
+        Remove a subscriber from all its addresses.
+        """
+        if subscriber not in self._subscribers:
+            return
+        self.unsubscribe(subscriber, list(subscriber.addresses))
+        self._subscribers.discard(subscriber)
+        metrics.add_gauge('alert_subscribers', -1)
+
+    def subscribe(self, subscriber: Subscriber, addresses):
+        """
+        Add addresses to a subscriber.
+
+        :param subscriber: Subscriber returned by ``connect``.
+        :param addresses: Addresses (or DEFAULT_CHANNEL) to follow.
+        :raises ValueError: If an address is not valid; no address is added then
+        """
+        for address in [channel(address) for address in addresses]:
+            subscriber.addresses.add(address)
+            self._channels.setdefault(address, set()).add(subscriber)
+
+    def unsubscribe(self, subscriber: Subscriber, addresses):
+        """
+        Remove addresses from a subscriber; addresses it does not follow are ignored.
+
+        :raises ValueError: If an address is not valid; no address is removed then
+        """
+        for address in [channel(address) for address in addresses]:
+            subscriber.addresses.discard(address)
+            followers = self._channels.get(address)
+            if followers is not None:
+                followers.discard(subscriber)
+                if not followers:
+                    del self._channels[address]
+
+    def has_subscribers(self, address) -> bool:
+        """
+        Whether anyone follows the alerts of an address; detection only collects alerts if so.
+
+        :param address: Address of the model used, or None for the default model.
+        """
+        return channel(address) in self._channels
+
+    def publish(self, address, results) -> int:
+        """
+        Push the anomalous results of a detection run to the subscribers of its address.
+
+        Each alert is encoded once and shared by all subscribers.
+
+        :param address: Address of the model used, or None for the default model.
+        :param results: Detection result dictionaries; only anomalous ones are published.
+        :return: Number of alerts published
+        """
+        followers = self._channels.get(channel(address))
+        if not followers or not results:
+            return 0
+        name = channel(address)
+        count = 0
+        for result in results:
+            if not result['is_anomaly']:
+                continue
+            message = dumps({"type": "alert", "address": name, "result": result}).decode()
+            for subscriber in followers:
+                subscriber.push(message)
+            count += 1
+        self.published += count
+        metrics.inc('alerts_published_total', count)
+        return count
+
+    def stats(self):
+        """
+        Subscriber and delivery statistics.
+
+        :return: Dictionary with the number of subscribers, followed addresses, published, buffered and
+                 dropped alerts
+        """
+        return {
+            "subscribers": len(self._subscribers),
+            "addresses": len(self._channels),
+            "published": self.published,
+            "buffered": sum(len(subscriber.buffer) for subscriber in self._subscribers),
+            "dropped": sum(subscriber.dropped for subscriber in self._subscribers)
+        }
+
+
+# Alert hub of the API process
+alert_hub = AlertHub()
@@ -2,4 +2,6 @@
 Anomaly detection package for blockchain anomaly detection system.
 """
 
-from .isolation_forest import AnomalyDetectorIsolationForest 
\ No newline at end of file
+from .isolation_forest import AnomalyDetectorIsolationForest
+from .anomaly_rules import ThresholdRule, register_rule, unregister_rule, get_rules
+from .streaming_detector import StreamingAnomalyDetector
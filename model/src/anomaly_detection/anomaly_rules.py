@@ -0,0 +1,267 @@
+"""
+anomaly_rules.py
+
+This module defines the threshold rules used to type anomalous transactions (e.g. high value, high gas price).
+Rules are declared as data and evaluated together as one boolean matrix (rows x rules), so adding a rule
+does not add another Python branch per transaction.
+
+Adheres to the Single Responsibility Principle (SRP) by focusing only on anomaly typing rules.
+"""
+
+import numpy as np
+import pandas as pd
+from utils.logger import get_logger
+from .quantile_sketch import KLLSketch
+
+# Initialize logger
+logger = get_logger(__name__)
+
+NORMAL_TYPE = {'type': 'normal', 'severity': 'none', 'details': 'No anomalies detected'}
+
+
+class ThresholdRule:
+    """
+    A declarative rule that flags a transaction when a feature exceeds its trained threshold.
+    """
+
+    def __init__(self, name: str, feature: str, severity: str, details: str, percentile: float = 95,
+                 threshold_key: str = None):
+        """
+        Initializes the rule.
+
+        :param name: Anomaly type reported when the rule fires (e.g. 'high_value_transaction').
+        :param feature: Feature column compared against the threshold.
+        :param severity: Severity reported when the rule fires.
+        :param details: Detail template, formatted with ``value`` and ``threshold``.
+        :param percentile: Percentile of the training data used as the threshold.
+        :param threshold_key: Key of the threshold in the model thresholds (defaults to the feature name).
+        """
+        self.name = name
+        self.feature = feature
+        self.severity = severity
+        self.details = details
+        self.percentile = percentile
+        self.threshold_key = threshold_key or feature
+
+    def describe(self, value, threshold, include_details: bool = True):
+        """
+        Build the anomaly type dictionary for a transaction that triggered this rule.
+
+        :param value: Feature value of the transaction.
+        :param threshold: Threshold the value was compared against.
+        :param include_details: Whether to format the human-readable detail string.
+        :return: Dictionary with type, severity and (optionally) details.
+        """
+        anomaly_type = {'type': self.name, 'severity': self.severity}
+        if include_details:
+            anomaly_type['details'] = self.details.format(value=value, threshold=threshold)
+        return anomaly_type
+
+    def __repr__(self):
+        return f"ThresholdRule(name={self.name!r}, feature={self.feature!r}, percentile={self.percentile})"
+
+
+_RULES = [
+    ThresholdRule('high_value_transaction', 'value', 'high',
+                  "Transaction value ({value}) exceeds threshold ({threshold})"),
+    ThresholdRule('high_gas_consumption', 'gas', 'medium',
+                  "Gas usage ({value}) exceeds threshold ({threshold})"),
+    ThresholdRule('high_gas_price', 'gasPrice', 'medium',
+                  "Gas price ({value}) exceeds threshold ({threshold})"),
+    ThresholdRule('unusual_value_gas_ratio', 'value_per_gas', 'low',
+                  "Value/gas ratio ({value}) is unusually high"),
+]
+
+
+def register_rule(rule: ThresholdRule):
+    """
+    Register a threshold rule. Rules registered under an existing name replace it.
+
+    :param rule: ThresholdRule to register.
+    :return: The registered rule.
+    """
+    for i, existing in enumerate(_RULES):
+        if existing.name == rule.name:
+            _RULES[i] = rule
+            break
+    else:
+        _RULES.append(rule)
+    logger.info(f"Registered anomaly rule '{rule.name}' on feature '{rule.feature}'.")
+    return rule
+
+
+def unregister_rule(name: str):
+    """
+    Remove a registered threshold rule by name.
+
+    :param name: Name of the rule to remove.
+    """
+    _RULES[:] = [rule for rule in _RULES if rule.name != name]
+
+
+def get_rules():
+    """
+    Return the currently registered threshold rules, in evaluation order.
+
+    :return: List of ThresholdRule instances.
+    """
+    return list(_RULES)
+
+
+def compute_thresholds(features: pd.DataFrame, rules=None):
+    """
+    Compute the threshold of every rule from the training features.
+
+    :param features: DataFrame containing the feature columns.
+    :param rules: Rules to compute thresholds for (defaults to the registered rules).
+    :return: Dictionary mapping threshold keys to thresholds.
+    """
+    rules = get_rules() if rules is None else rules
+    return {
+        rule.threshold_key: np.percentile(features[rule.feature], rule.percentile)
+        for rule in rules
+    }
+
+
+def update_sketches(sketches, features: pd.DataFrame, rules=None):
+    """
+    Fold a batch of features into the per-feature quantile sketches used for thresholds.
+    The given sketches are left untouched; updated copies are returned.
+
+    :param sketches: Dictionary mapping feature names to KLLSketch instances (may be empty).
+    :param features: DataFrame containing the feature columns.
+    :param rules: Rules whose features need sketches (defaults to the registered rules).
+    :return: Dictionary mapping feature names to updated KLLSketch instances.
+    """
+    rules = get_rules() if rules is None else rules
+    updated = {name: sketch.copy() for name, sketch in sketches.items()}
+    for feature in dict.fromkeys(rule.feature for rule in rules):
+        if feature not in updated:
+            updated[feature] = KLLSketch()
+        updated[feature].update(features[feature].to_numpy(dtype=float))
+    return updated
+
+
+def thresholds_from_sketches(sketches, rules=None):
+    """
+    Compute the threshold of every rule from per-feature quantile sketches.
+
+    :param sketches: Dictionary mapping feature names to KLLSketch instances.
+    :param rules: Rules to compute thresholds for (defaults to the registered rules).
+    :return: Dictionary mapping threshold keys to thresholds.
+    """
+    rules = get_rules() if rules is None else rules
+    return {
+        rule.threshold_key: sketches[rule.feature].quantile(rule.percentile / 100)
+        for rule in rules
+        if rule.feature in sketches
+    }
+
+
+class AnomalyTypeMatrix:
+    """
+    Boolean matrix of rule hits (rows x rules) for a set of transactions.
+
+    Detail strings are only formatted when the per-row anomaly types are requested.
+    """
+
+    def __init__(self, rules, thresholds, row_index, values):
+        """
+        Evaluates every rule against every row in one comparison.
+
+        :param rules: Rules that have a threshold available.
+        :param thresholds: Array of thresholds, one per rule, or one row of thresholds per evaluated row.
+        :param row_index: Positions of the evaluated rows in the full result.
+        :param values: Float array (rows x rules) of the feature value for each rule.
+        """
+        self.rules = rules
+        self.thresholds = np.broadcast_to(thresholds, values.shape)
+        self.row_index = row_index
+        self.values = values
+        self.mask = values > self.thresholds
+
+    @classmethod
+    def evaluate(cls, features: pd.DataFrame, thresholds: dict, row_index=None, rules=None):
+        """
+        Evaluate the rules against the given rows of a feature DataFrame.
+
+        :param features: DataFrame containing the feature columns.
+        :param thresholds: Dictionary mapping threshold keys to thresholds.
+        :param row_index: Positions of the rows to evaluate (defaults to all rows).
+        :param rules: Rules to evaluate (defaults to the registered rules).
+        :return: AnomalyTypeMatrix instance.
+        """
+        rules = get_rules() if rules is None else rules
+        rules = [rule for rule in rules if rule.threshold_key in thresholds and rule.feature in features.columns]
+        if row_index is None:
+            row_index = np.arange(len(features))
+
+        values = features[[rule.feature for rule in rules]].iloc[row_index].to_numpy(dtype=float)
+        values = values.reshape(len(row_index), len(rules))
+        rule_thresholds = np.array([thresholds[rule.threshold_key] for rule in rules], dtype=float)
+        return cls(rules, rule_thresholds, np.asarray(row_index), values)
+
+    def counts(self):
+        """
+        Count how many evaluated rows triggered each rule.
+
+        :return: Dictionary mapping rule names to hit counts.
+        """
+        return dict(zip([rule.name for rule in self.rules], self.mask.sum(axis=0).tolist()))
+
+    def row_types(self, position: int, include_details: bool = True):
+        """
+        Build the anomaly types of one evaluated row.
+
+        :param position: Position of the row within the matrix (not the full result).
+        :param include_details: Whether to format the human-readable detail strings.
+        :return: List of anomaly type dictionaries.
+        """
+        hits = np.flatnonzero(self.mask[position])
+        if not hits.size:
+            return [dict(NORMAL_TYPE)]
+        return [
+            self.rules[j].describe(float(self.values[position, j]), self.thresholds[position, j], include_details)
+            for j in hits.tolist()
+        ]
+
+    def to_columns(self, n_rows: int):
+        """
+        Flatten the anomaly types of all result rows into columns, without building per-row containers.
+
+        Row ``i`` has the types ``types[offsets[i]:offsets[i + 1]]``; rows that triggered no rule (including
+        rows that were not evaluated) have a single 'normal' type. Detail strings are not included.
+
+        :param n_rows: Number of rows in the full result.
+        :return: Tuple of (int32 offsets of length n_rows + 1, object array of type names, object array of
+                 severities)
+        """
+        hits = self.mask.sum(axis=1)
+        counts = np.ones(n_rows, dtype=np.int64)
+        counts[self.row_index] = np.maximum(hits, 1)
+        offsets = np.zeros(n_rows + 1, dtype=np.int32)
+        np.cumsum(counts, out=offsets[1:])
+
+        types = np.full(offsets[-1], NORMAL_TYPE['type'], dtype=object)
+        severities = np.full(offsets[-1], NORMAL_TYPE['severity'], dtype=object)
+        rows, rules = np.nonzero(self.mask)
+        if rows.size:
+            # Position of each hit within its row's slice
+            rank = np.arange(rows.size) - np.searchsorted(rows, rows)
+            slots = offsets[self.row_index[rows]] + rank
+            types[slots] = np.array([rule.name for rule in self.rules], dtype=object)[rules]
+            severities[slots] = np.array([rule.severity for rule in self.rules], dtype=object)[rules]
+        return offsets, types, severities
+
+    def to_lists(self, n_rows: int, include_details: bool = True):
+        """
+        Expand the matrix into one entry per result row.
+
+        :param n_rows: Number of rows in the full result.
+        :param include_details: Whether to format the human-readable detail strings.
+        :return: List with the anomaly types of evaluated rows and None for all other rows.
+        """
+        anomaly_types = [None] * n_rows
+        for position, i in enumerate(self.row_index.tolist()):
+            anomaly_types[i] = self.row_types(position, include_details)
+        return anomaly_types
@@ -7,23 +7,35 @@ Isolation Forest is particularly well-suited for detecting outliers in high-dime
 Adheres to the Single Responsibility Principle (SRP) by focusing only on anomaly detection.
 """
 
+import os
+import copy
 from sklearn.ensemble import IsolationForest
 from sklearn.preprocessing import StandardScaler
 import pandas as pd
 import numpy as np
 import joblib
 from utils.logger import get_logger
+from .anomaly_rules import AnomalyTypeMatrix, NORMAL_TYPE, thresholds_from_sketches, update_sketches
+from .model_bundle import LazyEstimator, bundle_path, build_manifest, read_bundle, write_bundle
+from .compiled_forest import CompiledIsolationForest, check_finite
+from .quantile_sketch import KLLSketch
 
 # Initialize logger
 logger = get_logger(__name__)
 
+FEATURE_COLUMNS = ['value', 'gas', 'gasPrice', 'value_per_gas', 'total_gas_cost']
+
+# Largest batch scored with the compiled forest; above this sklearn's Cython tree traversal is faster
+COMPILED_MAX_BATCH = 256
+
 
 class AnomalyDetectorIsolationForest:
     """
     AnomalyDetectorIsolationForest uses the Isolation Forest algorithm to detect anomalies in transaction data.
     """
 
-    def __init__(self, df: pd.DataFrame = None, contamination: float = 0.01, random_state: int = 42, should_prepare: bool = True):
+    def __init__(self, df: pd.DataFrame = None, contamination: float = 0.01, random_state: int = 42, should_prepare: bool = True,
+                 rules=None):
         """
         Initializes the anomaly detection model with the provided data.
 
@@ -31,6 +43,7 @@ class AnomalyDetectorIsolationForest:
         :param contamination: The proportion of outliers in the data set (default is 1%).
         :param random_state: Seed for the random number generator to ensure reproducibility.
         :param should_prepare: Whether to prepare features immediately (default True).
+        :param rules: Threshold rules used to type anomalies (defaults to the registered rules).
         """
         self.df = df if df is not None else pd.DataFrame()
         self.contamination = contamination
@@ -39,34 +52,61 @@ class AnomalyDetectorIsolationForest:
                                      random_state=self.random_state)
         self.scaler = StandardScaler()
         self.thresholds = {}
+        self.rules = rules
+        self.manifest = {}
+        self.compiled = None
+        self.sketches = {}
         self.features = None
         self.scaled_features = None
         
         if should_prepare and not self.df.empty:
             self.prepare_features()
 
-    def prepare_features(self):
+    @property
+    def model(self):
+        """
+        The sklearn IsolationForest. For a model loaded from a bundle it is read from disk on first use, as
+        the compiled forest scores small batches without it.
+        """
+        if isinstance(self._model, LazyEstimator):
+            return self._model.get()
+        return self._model
+
+    @model.setter
+    def model(self, model):
+        self._model = model
+
+    def prepare_features(self, groups=None):
         """
         Prepare and scale features for anomaly detection.
+
+        :param groups: Optional array of group labels aligned with ``self.df``, with each group's rows
+                       contiguous. Each group is standardized separately, exactly as if it were prepared
+                       on its own; the fitted scaler is left unchanged.
         """
         if self.df.empty:
             logger.warning("Cannot prepare features: DataFrame is empty")
             return
             
-        # Convert values to numeric
-        self.df['value'] = pd.to_numeric(self.df['value'], errors='coerce')
-        self.df['gas'] = pd.to_numeric(self.df['gas'], errors='coerce')
-        self.df['gasPrice'] = pd.to_numeric(self.df['gasPrice'], errors='coerce')
-        
-        # Calculate additional features
-        self.df['value_per_gas'] = self.df['value'] / self.df['gas']
-        self.df['total_gas_cost'] = self.df['gas'] * self.df['gasPrice']
-        
-        # Select features for analysis
-        self.features = self.df[['value', 'gas', 'gasPrice', 'value_per_gas', 'total_gas_cost']]
+        self.features = compute_features(self.df)
         
         # Scale features
-        self.scaled_features = self.scaler.fit_transform(self.features)
+        if groups is not None:
+            # Converted the way sklearn converts a DataFrame, so the summation order matches the scaler's
+            self.scaled_features = standardize_groups(np.asarray(self.features, dtype=np.float64), groups)
+        else:
+            self.scaled_features = self.scaler.fit_transform(self.features)
+
+    def select_rows(self, mask):
+        """
+        Keep only some of the prepared rows for detection; their features stay scaled by the statistics of
+        all rows.
+
+        :param mask: Boolean array aligned with ``self.df``.
+        """
+        self.df = self.df[mask]
+        self.features = self.features[mask]
+        self.scaled_features = self.scaled_features[mask]
 
     def train_model(self):
         """
@@ -77,17 +117,47 @@ class AnomalyDetectorIsolationForest:
         logger.info("Training Isolation Forest model...")
         self.model.fit(self.scaled_features)
         
-        # Calculate thresholds for different types of anomalies
-        self.thresholds = {
-            'value': np.percentile(self.features['value'], 95),
-            'gas': np.percentile(self.features['gas'], 95),
-            'gasPrice': np.percentile(self.features['gasPrice'], 95),
-            'value_per_gas': np.percentile(self.features['value_per_gas'], 95)
-        }
+        # Calculate thresholds for different types of anomalies from bounded-memory quantile sketches
+        self.sketches = update_sketches({}, self.features, self.rules)
+        self.thresholds = thresholds_from_sketches(self.sketches, self.rules)
+        self.compiled = CompiledIsolationForest.from_sklearn(self.model)
         
         logger.info("Model training completed.")
         return self.model
 
+    def update_thresholds(self, df: pd.DataFrame):
+        """
+        Incrementally update the anomaly-type thresholds with a new batch of transactions,
+        without retraining the forest or revisiting earlier training data.
+
+        :param df: DataFrame of cleaned and transformed transactions.
+        :return: Updated thresholds.
+        """
+        if not self.sketches:
+            logger.warning("Model has no threshold sketches; thresholds will reflect only the new data.")
+        features = compute_features(df.copy())
+        self.sketches = update_sketches(self.sketches, features, self.rules)
+        self.thresholds = thresholds_from_sketches(self.sketches, self.rules)
+        logger.info(f"Updated anomaly thresholds with {len(features)} transactions.")
+        return self.thresholds
+
+    def merge_thresholds(self, other: 'AnomalyDetectorIsolationForest'):
+        """
+        Merge the threshold sketches of a detector trained on another partition of the data.
+
+        :param other: Detector whose sketches are merged into this one's.
+        :return: Updated thresholds.
+        """
+        sketches = {name: sketch.copy() for name, sketch in self.sketches.items()}
+        for name, sketch in other.sketches.items():
+            if name in sketches:
+                sketches[name].merge(sketch)
+            else:
+                sketches[name] = sketch.copy()
+        self.sketches = sketches
+        self.thresholds = thresholds_from_sketches(self.sketches, self.rules)
+        return self.thresholds
+
     def identify_anomaly_type(self, row):
         """
         Identify specific types of anomalies in a transaction.
@@ -95,119 +165,323 @@ class AnomalyDetectorIsolationForest:
         :param row: DataFrame row containing transaction data
         :return: List of dictionaries containing anomaly types and details
         """
-        anomaly_types = []
-        
-        if row['value'] > self.thresholds['value']:
-            anomaly_types.append({
-                'type': 'high_value_transaction',
-                'severity': 'high',
-                'details': f"Transaction value ({row['value']}) exceeds threshold ({self.thresholds['value']})"
-            })
-        
-        if row['gas'] > self.thresholds['gas']:
-            anomaly_types.append({
-                'type': 'high_gas_consumption',
-                'severity': 'medium',
-                'details': f"Gas usage ({row['gas']}) exceeds threshold ({self.thresholds['gas']})"
-            })
-        
-        if row['gasPrice'] > self.thresholds['gasPrice']:
-            anomaly_types.append({
-                'type': 'high_gas_price',
-                'severity': 'medium',
-                'details': f"Gas price ({row['gasPrice']}) exceeds threshold ({self.thresholds['gasPrice']})"
-            })
-        
-        if row['value_per_gas'] > self.thresholds['value_per_gas']:
-            anomaly_types.append({
-                'type': 'unusual_value_gas_ratio',
-                'severity': 'low',
-                'details': f"Value/gas ratio ({row['value_per_gas']}) is unusually high"
-            })
-        
-        return anomaly_types if anomaly_types else [{'type': 'normal', 'severity': 'none', 'details': 'No anomalies detected'}]
+        features = pd.DataFrame([dict(row)])
+        return AnomalyTypeMatrix.evaluate(features, self.thresholds, rules=self.rules).row_types(0)
+
+    def score_samples(self, X):
+        """
+        Compute the raw Isolation Forest score of each sample (the lower, the more abnormal),
+        using the compiled forest for small batches.
 
-    def detect_anomalies(self):
+        :param X: Scaled feature array of shape (n_samples, n_features).
+        :return: Array of scores.
+        :raises NonFiniteFeatures: If any feature is NaN or infinite, whichever scorer is used.
+        """
+        check_finite(np.asarray(X, dtype=np.float64))
+        if self.compiled is not None and len(X) <= COMPILED_MAX_BATCH:
+            return self.compiled.score_samples(X)
+        return self.model.score_samples(X)
+
+    def decision_function(self, X):
+        """
+        Compute the decision function of each sample; negative values are outliers.
+
+        :param X: Scaled feature array of shape (n_samples, n_features).
+        :return: Array of decision values.
+        """
+        offset = self.compiled.offset if self.compiled is not None else self.model.offset_
+        return self.score_samples(X) - offset
+
+    def predict(self, X):
+        """
+        Predict outliers (-1) and inliers (1), using the compiled forest for small batches.
+
+        :param X: Scaled feature array of shape (n_samples, n_features).
+        :return: Array of predictions.
+        """
+        return np.where(self.decision_function(X) < 0, -1, 1)
+
+    def detect_anomalies(self, include_details: bool = True):
         """
         Detects anomalies in the dataset using the trained Isolation Forest model.
 
+        :param include_details: Whether to include human-readable details for each anomaly type.
         :return: DataFrame with detailed anomaly information.
         """
-        logger.info("Detecting anomalies using Isolation Forest model...")
-        predictions = self.model.predict(self.scaled_features)
-        
-        # Create results list
-        results = []
-        for i, (_, row) in enumerate(self.features.iterrows()):
-            if predictions[i] == -1:  # If anomaly
-                anomaly_types = self.identify_anomaly_type(row)
-                is_anomaly = True
-            else:
-                anomaly_types = [{'type': 'normal', 'severity': 'none', 'details': 'No anomalies detected'}]
-                is_anomaly = False
-            
-            # Convert timestamp to string if it exists
-            timestamp = self.df.iloc[i].get('timeStamp')
-            if pd.notnull(timestamp):
-                if isinstance(timestamp, pd.Timestamp):
-                    timestamp = timestamp.isoformat()
-                else:
-                    timestamp = str(timestamp)
-            else:
-                timestamp = 'N/A'
-            
-            result = {
-                'transaction_hash': self.df.iloc[i].get('hash', 'N/A'),
-                'is_anomaly': is_anomaly,
-                'anomaly_types': anomaly_types,
-                'transaction_details': {
-                    'value': float(row['value']),
-                    'gas': float(row['gas']),
-                    'gasPrice': float(row['gasPrice']),
-                    'timestamp': timestamp
-                }
-            }
-            results.append(result)
-        
+        columns = self.detect_anomalies_columnar()
+        results = build_results(columns, include_details)
+
         # Add results to DataFrame
         self.df['anomaly_result'] = results
-        
-        num_anomalies = len([r for r in results if r['is_anomaly']])
-        logger.info(f"Detected {num_anomalies} anomalous transactions.")
         return self.df
 
+    def detect_anomalies_columnar(self, top_k: int = None):
+        """
+        Detects anomalies and returns the results as whole columns instead of per-row dictionaries.
+
+        Scores, predictions, anomaly flags, hashes, timestamps and transaction details are all computed
+        as arrays aligned with ``self.df``. The anomaly score is the decision function (negative values
+        are anomalies; the lower, the more abnormal) and the prediction is derived from it in the same pass.
+        Anomaly types are returned as an AnomalyTypeMatrix covering the flagged rows only; detail strings
+        are formatted by ``build_results``.
+
+        :param top_k: If given, only return the ``top_k`` most anomalous transactions, most anomalous first.
+        :return: Dictionary mapping column names to equal-length arrays or lists.
+        """
+        logger.info("Detecting anomalies using Isolation Forest model...")
+        scores = self.decision_function(self.scaled_features)
+        predictions = np.where(scores < 0, -1, 1)
+        features = self.features
+        timestamps = self.df.get('timeStamp')
+
+        if 'hash' in self.df.columns:
+            hashes = self.df['hash'].to_numpy(dtype=object)
+        else:
+            hashes = np.full(len(scores), 'N/A', dtype=object)
+
+        if top_k is not None:
+            rows = top_k_indices(scores, top_k)
+            scores, predictions, hashes = scores[rows], predictions[rows], hashes[rows]
+            features = features.iloc[rows]
+            timestamps = timestamps.iloc[rows] if timestamps is not None else None
+
+        is_anomaly = predictions == -1
+        n_rows = len(predictions)
+
+        # Anomaly types are only evaluated for flagged rows, as one rows x rules matrix
+        anomaly_types = AnomalyTypeMatrix.evaluate(features, self.thresholds,
+                                                   row_index=np.flatnonzero(is_anomaly), rules=self.rules)
+
+        columns = {
+            'transaction_hash': hashes,
+            'prediction': predictions,
+            'is_anomaly': is_anomaly,
+            'anomaly_score': scores,
+            'anomaly_types': anomaly_types,
+            'value': features['value'].to_numpy(dtype=float),
+            'gas': features['gas'].to_numpy(dtype=float),
+            'gasPrice': features['gasPrice'].to_numpy(dtype=float),
+            'timestamp': _format_timestamps(timestamps, n_rows)
+        }
+
+        logger.info(f"Detected {int(is_anomaly.sum())} anomalous transactions.")
+        return columns
+
+    def for_inference(self):
+        """
+        Create a detector that shares this instance's trained model and thresholds, for scoring a new batch.
+
+        The fitted forest and thresholds are only read during detection and are shared; the scaler is
+        refitted by ``prepare_features`` and is therefore copied.
+
+        :return: New AnomalyDetectorIsolationForest instance without data
+        """
+        instance = self.__class__(contamination=self.contamination, random_state=self.random_state,
+                                  should_prepare=False, rules=self.rules)
+        # Shared as is, so that a lazily loaded estimator is loaded once for all batches
+        instance._model = self._model
+        instance.scaler = copy.deepcopy(self.scaler)
+        instance.thresholds = self.thresholds
+        instance.manifest = self.manifest
+        instance.compiled = self.compiled
+        instance.sketches = self.sketches
+        return instance
+
     def save_model(self, path='models'):
         """
-        Save the trained model and its components.
+        Save the trained model and its components as an atomically written bundle, with the compiled forest
+        arrays and the sklearn estimator stored next to it.
 
         :param path: Directory path to save the model files
         """
-        import os
-        if not os.path.exists(path):
-            os.makedirs(path)
-            
-        joblib.dump(self.model, f'{path}/isolation_forest.joblib')
-        joblib.dump(self.scaler, f'{path}/scaler.joblib')
-        joblib.dump(self.thresholds, f'{path}/thresholds.joblib')
+        training_rows = len(self.features) if self.features is not None else 0
+        self.manifest = build_manifest(FEATURE_COLUMNS, training_rows,
+                                       n_estimators=self.model.n_estimators,
+                                       contamination=self.contamination)
+        compiled = self.compiled.to_arrays() if self.compiled is not None else None
+        arrays = {name: compiled.pop(name) for name in CompiledIsolationForest.ARRAY_FIELDS} if compiled else {}
+        write_bundle(path, {
+            'scaler': self.scaler,
+            'thresholds': self.thresholds,
+            'compiled': compiled,
+            'sketches': {name: sketch.to_arrays() for name, sketch in self.sketches.items()}
+        }, self.manifest, arrays=arrays, estimator=self.model)
         logger.info(f"Model and components saved to {path}/")
 
     @classmethod
-    def load_model(cls, path='models'):
+    def load_model(cls, path='models', mmap_mode='r'):
         """
         Load a trained model and its components.
 
+        Reads the model bundle if present, otherwise falls back to the legacy per-component files.
+        The compiled forest arrays are memory-mapped and the sklearn estimator is only loaded when first used
+        (large batches, retraining); legacy models are compiled on load.
+
         :param path: Directory path containing the model files
+        :param mmap_mode: Memory-map mode for the forest arrays (None to load them into memory)
         :return: Initialized AnomalyDetectorIsolationForest instance
         """
-        model = joblib.load(f'{path}/isolation_forest.joblib')
-        scaler = joblib.load(f'{path}/scaler.joblib')
-        thresholds = joblib.load(f'{path}/thresholds.joblib')
+        if os.path.exists(bundle_path(path)):
+            bundle = read_bundle(path, mmap_mode=mmap_mode)
+            model, scaler, thresholds = bundle['model'], bundle['scaler'], bundle['thresholds']
+            manifest = bundle['manifest']
+            compiled = bundle.get('compiled')
+            if compiled is not None:
+                compiled = dict(compiled, **bundle['arrays'])
+            sketches = bundle.get('sketches') or {}
+        else:
+            model = joblib.load(f'{path}/isolation_forest.joblib')
+            scaler = joblib.load(f'{path}/scaler.joblib')
+            thresholds = joblib.load(f'{path}/thresholds.joblib')
+            manifest = {}
+            compiled = None
+            sketches = {}
         
         # Create instance without preparing features
         instance = cls(should_prepare=False)
         instance.model = model
         instance.scaler = scaler
         instance.thresholds = thresholds
+        instance.manifest = manifest
+        instance.sketches = {name: KLLSketch.from_arrays(state) for name, state in sketches.items()}
+        if compiled is not None:
+            instance.compiled = CompiledIsolationForest.from_arrays(compiled)
+        else:
+            instance.compiled = CompiledIsolationForest.from_sklearn(instance.model)
         
         logger.info("Model and components loaded successfully.")
         return instance
+
+
+def compute_features(df: pd.DataFrame):
+    """
+    Convert the raw columns to numbers and derive the features used for anomaly detection.
+    The derived columns are added to ``df`` in place.
+
+    :param df: DataFrame containing value, gas and gasPrice columns.
+    :return: DataFrame with the FEATURE_COLUMNS.
+    """
+    # Convert values to numeric
+    df['value'] = pd.to_numeric(df['value'], errors='coerce')
+    df['gas'] = pd.to_numeric(df['gas'], errors='coerce')
+    df['gasPrice'] = pd.to_numeric(df['gasPrice'], errors='coerce')
+    
+    # Calculate additional features
+    df['value_per_gas'] = df['value'] / df['gas']
+    df['total_gas_cost'] = df['gas'] * df['gasPrice']
+    
+    # Select features for analysis
+    return df[FEATURE_COLUMNS]
+
+
+def standardize_groups(values, groups):
+    """
+    Standardize each contiguous group of rows to zero mean and unit variance, reproducing
+    ``StandardScaler().fit_transform`` on every group without its per-call overhead.
+
+    :param values: Float array of shape (n_samples, n_features). Results are bit-identical to the scaler's
+                   when the array has the memory layout sklearn would use, since summation order depends on it.
+    :param groups: Array of group labels, with each group's rows contiguous.
+    :return: Standardized array.
+    """
+    groups = np.asarray(groups)
+    bounds = np.concatenate([[0], np.flatnonzero(groups[1:] != groups[:-1]) + 1, [len(groups)]])
+    scaled = np.empty_like(values)
+    eps = np.finfo(np.float64).eps
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            block = values[start:end]
+            nan_mask = np.isnan(block)
+            sum_op = np.nansum if nan_mask.any() else np.sum
+            # Corrected two-pass mean and variance, as computed by StandardScaler
+            count = (end - start) - nan_mask.sum(axis=0)
+            total = sum_op(block, axis=0)
+            mean = total / count
+            centred = block - mean
+            correction = sum_op(centred, axis=0)
+            variance = (sum_op(centred ** 2, axis=0) - correction ** 2 / count) / count
+            scale = np.sqrt(variance)
+            scale[variance <= count * eps * variance + (count * mean * eps) ** 2] = 1.0
+            scaled[start:end] = (block - mean) / scale
+    return scaled
+
+
+def top_k_indices(scores, k: int):
+    """
+    Select the positions of the ``k`` lowest (most anomalous) scores, ordered from lowest to highest.
+
+    Uses partial selection, so the cost is O(n + k log k) rather than a full sort.
+
+    :param scores: Array of anomaly scores.
+    :param k: Number of positions to select.
+    :return: Array of positions.
+    """
+    if k < 0:
+        raise ValueError(f"top_k must be non-negative, got {k}")
+    if k == 0:
+        return np.empty(0, dtype=np.intp)
+    if k < len(scores):
+        candidates = np.argpartition(scores, k - 1)[:k]
+    else:
+        candidates = np.arange(len(scores))
+    # Ties are broken by position, so the selection is deterministic
+    return candidates[np.lexsort((candidates, scores[candidates]))]
+
+
+def _format_timestamps(timestamps, n_rows):
+    """
+    Convert a timestamp column to ISO-8601 strings, using 'N/A' for missing values.
+
+    :param timestamps: Series of timestamps (datetime or raw values), or None if the column is missing.
+    :param n_rows: Number of rows expected in the output.
+    :return: Object array of timestamp strings.
+    """
+    if timestamps is None:
+        return np.full(n_rows, 'N/A', dtype=object)
+
+    missing = timestamps.isna().to_numpy()
+    if pd.api.types.is_datetime64_any_dtype(timestamps):
+        if getattr(timestamps.dt, 'tz', None) is not None:
+            return np.array([t.isoformat() if pd.notnull(t) else 'N/A' for t in timestamps], dtype=object)
+        formatted = np.datetime_as_string(timestamps.to_numpy(dtype='datetime64[ns]'), unit='s').astype(object)
+    else:
+        formatted = timestamps.astype(str).to_numpy(dtype=object)
+    formatted[missing] = 'N/A'
+    return formatted
+
+
+def build_results(columns, include_details: bool = True):
+    """
+    Build per-transaction result dictionaries from the output of ``detect_anomalies_columnar``.
+
+    :param columns: Dictionary of result columns.
+    :param include_details: Whether to include human-readable details for each anomaly type.
+    :return: List of dictionaries containing anomaly detection results.
+    """
+    hashes = columns['transaction_hash'].tolist()
+    is_anomaly = columns['is_anomaly'].tolist()
+    scores = columns['anomaly_score'].tolist()
+    values = columns['value'].tolist()
+    gas = columns['gas'].tolist()
+    gas_price = columns['gasPrice'].tolist()
+    timestamps = columns['timestamp'].tolist()
+    anomaly_types = columns['anomaly_types'].to_lists(len(hashes), include_details)
+
+    return [
+        {
+            'transaction_hash': tx_hash,
+            'is_anomaly': flagged,
+            'anomaly_score': score,
+            'anomaly_types': types if types is not None else [dict(NORMAL_TYPE)],
+            'transaction_details': {
+                'value': value,
+                'gas': tx_gas,
+                'gasPrice': tx_gas_price,
+                'timestamp': timestamp
+            }
+        }
+        for tx_hash, flagged, score, types, value, tx_gas, tx_gas_price, timestamp in zip(
+            hashes, is_anomaly, scores, anomaly_types, values, gas, gas_price, timestamps
+        )
+    ]
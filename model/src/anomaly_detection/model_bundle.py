@@ -0,0 +1,276 @@
+"""
+model_bundle.py
+
+This module reads and writes the model bundle. A bundle file holds the small components of a trained detector
+(scaler, thresholds) together with a manifest, and is written atomically via a temporary file and rename, so
+readers always see one consistent model version. A copy of the manifest is kept in a small JSON file, so the
+model can be described without reading the bundle. The forest is stored next to it in a directory named after
+the model version: the compiled node arrays as raw .npy files, memory-mapped on load, and the sklearn estimator,
+which is only loaded when first used. Loading a model therefore takes about the same time whatever the number
+of trees.
+
+Adheres to the Single Responsibility Principle (SRP) by focusing only on model persistence.
+"""
+
+import os
+import glob
+import json
+import uuid
+import shutil
+import tempfile
+import threading
+from datetime import datetime, timezone
+import joblib
+import numpy as np
+from utils.logger import get_logger
+
+# Initialize logger
+logger = get_logger(__name__)
+
+BUNDLE_FILE = 'model_bundle.joblib'
+MANIFEST_FILE = 'manifest.json'
+BUNDLE_FORMAT_VERSION = 2
+
+# Directory next to the bundle holding the forest of one model version
+FOREST_DIR_PREFIX = 'forest-'
+ESTIMATOR_FILE = 'estimator.joblib'
+
+# Files written by the previous, multi-file format
+LEGACY_FILES = ('isolation_forest.joblib', 'scaler.joblib', 'thresholds.joblib')
+
+
+def bundle_path(path='models'):
+    """
+    Return the path of the bundle file in a model directory.
+
+    :param path: Directory path containing the model files
+    :return: Path of the bundle file
+    """
+    return os.path.join(path, BUNDLE_FILE)
+
+
+def manifest_path(path='models'):
+    """
+    Return the path of the manifest file in a model directory.
+
+    :param path: Directory path containing the model files
+    :return: Path of the manifest file
+    """
+    return os.path.join(path, MANIFEST_FILE)
+
+
+def forest_path(path, model_version):
+    """
+    Return the directory holding the forest of a model version.
+
+    :param path: Directory path containing the model files
+    :param model_version: Model version from the manifest
+    :return: Path of the forest directory
+    """
+    return os.path.join(path, FOREST_DIR_PREFIX + model_version)
+
+
+class LazyEstimator:
+    """
+    Loads the sklearn estimator of a bundle on first use. The file is opened right away, so the estimator can
+    still be loaded after a newer model has replaced it on disk.
+    """
+
+    def __init__(self, file):
+        """
+        :param file: Path of the estimator file
+        """
+        self._file = open(file, 'rb')
+        self._estimator = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        """
+        Return the estimator, loading it on the first call.
+
+        :return: Fitted sklearn estimator
+        """
+        with self._lock:
+            if self._estimator is None:
+                self._estimator = joblib.load(self._file)
+                self._file.close()
+                logger.info(f"Loaded sklearn estimator from {self._file.name}")
+            return self._estimator
+
+
+def model_files(path='models'):
+    """
+    Return the files that make up the model stored in a directory, preferring the bundle over legacy files.
+
+    :param path: Directory path containing the model files
+    :return: List of file paths (empty if no model is stored)
+    """
+    if os.path.exists(bundle_path(path)):
+        return [bundle_path(path)]
+    legacy = [os.path.join(path, name) for name in LEGACY_FILES]
+    if all(os.path.exists(f) for f in legacy):
+        return legacy
+    return []
+
+
+def model_exists(path='models'):
+    """
+    Check whether a trained model is stored in a directory.
+
+    :param path: Directory path containing the model files
+    :return: True if a bundle or a complete set of legacy files exists
+    """
+    return bool(model_files(path))
+
+
+def build_manifest(feature_names, training_rows, **extra):
+    """
+    Build the manifest describing a trained model.
+
+    :param feature_names: Names of the features the model was trained on
+    :param training_rows: Number of rows used for training
+    :param extra: Additional manifest entries (e.g. model parameters)
+    :return: Manifest dictionary
+    """
+    manifest = {
+        'format_version': BUNDLE_FORMAT_VERSION,
+        'model_version': uuid.uuid4().hex,
+        'feature_names': list(feature_names),
+        'training_rows': int(training_rows),
+        'created_at': datetime.now(timezone.utc).isoformat()
+    }
+    manifest.update(extra)
+    return manifest
+
+
+def write_forest(path, model_version, arrays, estimator):
+    """
+    Write the forest of a model version: each array as a raw .npy file and the estimator with joblib, into a
+    temporary directory that is then renamed into place.
+
+    :param path: Directory path to save the forest in
+    :param model_version: Model version from the manifest
+    :param arrays: Dictionary of NumPy arrays
+    :param estimator: Fitted sklearn estimator (None to store the arrays only)
+    """
+    tmp_path = tempfile.mkdtemp(dir=path, prefix='.bundle-', suffix='.tmp')
+    try:
+        for name, array in arrays.items():
+            with open(os.path.join(tmp_path, f'{name}.npy'), 'wb') as f:
+                np.save(f, np.ascontiguousarray(array))
+                f.flush()
+                os.fsync(f.fileno())
+        if estimator is not None:
+            with open(os.path.join(tmp_path, ESTIMATOR_FILE), 'wb') as f:
+                joblib.dump(estimator, f)
+                f.flush()
+                os.fsync(f.fileno())
+        # mkdtemp creates the directory owner-only; give it regular permissions
+        os.chmod(tmp_path, 0o755)
+        os.replace(tmp_path, forest_path(path, model_version))
+    except Exception:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+
+
+def remove_old_forests(path, model_version):
+    """
+    Delete the forests of replaced model versions, keeping the current one and the newest other one, which
+    a reader may still be loading.
+
+    :param path: Directory path containing the model files
+    :param model_version: Current model version
+    """
+    current = forest_path(path, model_version)
+    others = sorted((d for d in glob.glob(os.path.join(path, FOREST_DIR_PREFIX + '*')) if d != current),
+                    key=os.path.getmtime)
+    for directory in others[:-1]:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def replace_file(path, target, write):
+    """
+    Atomically replace a file: write it to a temporary file in the same directory, fsync it and rename it over
+    the target.
+
+    :param path: Directory containing the file
+    :param target: Path of the file to replace
+    :param write: Callable ``write(f)`` writing the content to a binary file object
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=path, prefix='.bundle-', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates the file owner-only; give it regular file permissions
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, target)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def write_bundle(path, components, manifest, arrays=None, estimator=None):
+    """
+    Atomically write a model bundle: write the forest directory first, then replace the bundle file and
+    finally the manifest file.
+
+    :param path: Directory path to save the bundle in
+    :param components: Dictionary of small model components (e.g. scaler, thresholds)
+    :param manifest: Manifest dictionary
+    :param arrays: Dictionary of NumPy arrays stored as .npy files in the forest directory
+    :param estimator: sklearn estimator stored in the forest directory and loaded lazily
+    :return: Path of the written bundle
+    """
+    if not os.path.exists(path):
+        os.makedirs(path)
+
+    write_forest(path, manifest['model_version'], arrays or {}, estimator)
+
+    bundle = {'manifest': manifest, 'arrays': sorted(arrays or {})}
+    bundle.update(components)
+
+    replace_file(path, bundle_path(path), lambda f: joblib.dump(bundle, f))
+    replace_file(path, manifest_path(path), lambda f: f.write(json.dumps(manifest).encode('utf-8')))
+    remove_old_forests(path, manifest['model_version'])
+
+    logger.info(f"Model bundle version {manifest['model_version']} written to {bundle_path(path)}")
+    return bundle_path(path)
+
+
+def read_bundle(path='models', mmap_mode='r'):
+    """
+    Read a model bundle. The forest arrays are memory-mapped rather than copied into memory, and the sklearn
+    estimator is returned as a LazyEstimator.
+
+    :param path: Directory path containing the bundle
+    :param mmap_mode: Memory-map mode for the arrays (None to load everything into memory)
+    :return: Bundle dictionary with a 'manifest' entry, the model components, an 'arrays' dictionary and a
+             'model' entry
+    """
+    bundle = joblib.load(bundle_path(path), mmap_mode=mmap_mode)
+    version = bundle.get('manifest', {}).get('format_version')
+    if version != BUNDLE_FORMAT_VERSION:
+        raise ValueError(f"Unsupported model bundle format version: {version}")
+    forest = forest_path(path, bundle['manifest']['model_version'])
+    bundle['arrays'] = {name: np.load(os.path.join(forest, f'{name}.npy'), mmap_mode=mmap_mode)
+                        for name in bundle['arrays']}
+    estimator = os.path.join(forest, ESTIMATOR_FILE)
+    bundle['model'] = LazyEstimator(estimator) if os.path.exists(estimator) else None
+    return bundle
+
+
+def read_manifest(path='models'):
+    """
+    Read the manifest of the model stored in a directory from its manifest file, without opening the bundle.
+
+    :param path: Directory path containing the model files
+    :return: Manifest dictionary (empty for legacy models)
+    """
+    try:
+        with open(manifest_path(path), 'rb') as f:
+            return json.loads(f.read())
+    except FileNotFoundError:
+        return {}
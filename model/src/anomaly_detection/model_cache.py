@@ -0,0 +1,188 @@
+"""
+model_cache.py
+
+This module provides a process-level cache of trained anomaly detection models. A model is loaded from disk
+once and then served from memory; it is reloaded only when its files change, and the new model is swapped in
+atomically so concurrent requests never see a partially loaded model. The cache is bounded: when more models
+are loaded than it can hold, the least recently used one is evicted.
+
+Adheres to the Single Responsibility Principle (SRP) by focusing only on caching loaded models.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from utils.logger import get_logger
+from utils.config import MODEL_CACHE_SIZE
+from .isolation_forest import AnomalyDetectorIsolationForest
+from .model_bundle import model_files
+
+# Initialize logger
+logger = get_logger(__name__)
+
+LOAD_ATTEMPTS = 3
+LOAD_LOCK_STRIPES = 64
+
+
+class ModelCache:
+    """
+    ModelCache keeps loaded detectors in memory, keyed by model directory, with LRU eviction.
+    """
+
+    def __init__(self, capacity: int = None):
+        """
+        Initializes an empty cache.
+
+        :param capacity: Maximum number of models kept in memory (None for unbounded).
+        """
+        self.capacity = capacity
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # Loads of different models proceed in parallel; loads of the same model are serialized
+        self._load_locks = [threading.Lock() for _ in range(LOAD_LOCK_STRIPES)]
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.evictions = 0
+
+    @staticmethod
+    def signature(path='models'):
+        """
+        Compute a cheap version signature of the model files from their inodes, modification times and sizes.
+
+        :param path: Directory path containing the model files
+        :return: Tuple identifying the current version of the model files
+        """
+        files = model_files(path)
+        if not files:
+            raise FileNotFoundError(f"No trained model found in {path}")
+        signature = []
+        for name in files:
+            stats = os.stat(name)
+            signature.append((os.path.basename(name), stats.st_ino, stats.st_mtime_ns, stats.st_size))
+        return tuple(signature)
+
+    def _lookup(self, key, signature):
+        """
+        Return the cached entry for ``key`` if it matches ``signature``, marking it as recently used.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == signature:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+        return None
+
+    def get(self, path='models'):
+        """
+        Return a detector for the model in ``path``, loading it only if it is not cached or has changed on disk.
+
+        :param path: Directory path containing the model files
+        :return: AnomalyDetectorIsolationForest ready for inference on a new batch
+        """
+        key = os.path.abspath(path)
+        signature = self.signature(path)
+        entry = self._lookup(key, signature)
+        if entry is None:
+            entry = self._load(key, signature)
+        return entry[1].for_inference()
+
+    def reload(self, path='models'):
+        """
+        Force the model in ``path`` to be reloaded from disk and swapped in.
+
+        :param path: Directory path containing the model files
+        :return: Newly loaded AnomalyDetectorIsolationForest
+        """
+        return self._load(os.path.abspath(path), self.signature(path), force=True)[1]
+
+    def invalidate(self, path=None):
+        """
+        Drop cached models so they are reloaded on next access.
+
+        :param path: Directory path to invalidate (default: all cached models)
+        """
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(os.path.abspath(path), None)
+
+    def stats(self):
+        """
+        Return cache statistics.
+
+        :return: Dictionary with the cache size, capacity, hits, misses, loads, evictions and hit rate
+        """
+        lookups = self.hits + self.misses
+        return {
+            'cached_models': len(self._entries),
+            'capacity': self.capacity,
+            'hits': self.hits,
+            'misses': self.misses,
+            'loads': self.loads,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
+
+    def _store(self, key, entry):
+        """
+        Insert an entry as most recently used and evict the least recently used ones beyond capacity.
+        """
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while self.capacity is not None and len(self._entries) > self.capacity:
+                evicted, _ = self._entries.popitem(last=False)
+                self.evictions += 1
+                logger.info(f"Model cache evicted model from {evicted}.")
+
+    def _load(self, key, signature, force=False):
+        """
+        Load the model files under ``key`` and swap them into the cache.
+
+        A load is only accepted if the file signature is unchanged after reading. If loading fails or the
+        files keep changing (e.g. they are being rewritten), the previously cached model keeps being served.
+        """
+        with self._load_locks[hash(key) % LOAD_LOCK_STRIPES]:
+            if not force:
+                entry = self._lookup(key, signature)
+                if entry is not None:
+                    return entry
+            with self._lock:
+                self.misses += 1
+                entry = self._entries.get(key)
+
+            for attempt in range(LOAD_ATTEMPTS):
+                try:
+                    detector = AnomalyDetectorIsolationForest.load_model(key)
+                except Exception as e:
+                    if entry is None and attempt == LOAD_ATTEMPTS - 1:
+                        raise
+                    logger.warning(f"Failed to load model from {key} (attempt {attempt + 1}): {str(e)}")
+                    detector = None
+                else:
+                    # A model whose files changed while they were being read may mix versions
+                    current = self.signature(key)
+                    if current == signature:
+                        break
+                    signature = current
+                    detector = None
+
+            if detector is None:
+                if entry is not None:
+                    logger.warning(f"Model files in {key} are still changing, serving cached model.")
+                    return entry
+                detector = AnomalyDetectorIsolationForest.load_model(key)
+                signature = None
+
+            entry = (signature, detector)
+            self._store(key, entry)
+            self.loads += 1
+            logger.info(f"Model cache loaded model from {key}.")
+            return entry
+
+
+# Process-level cache shared by the CLI and the API
+model_cache = ModelCache(capacity=MODEL_CACHE_SIZE)
@@ -0,0 +1,170 @@
+"""
+model_registry.py
+
+This module maps addresses (or tenant identifiers) to the directories holding their trained models and serves
+those models through the shared, LRU-bounded model cache. Models are loaded lazily on first use, so a deployment
+can hold models for many addresses on disk while only the recently used ones stay in memory.
+
+Adheres to the Single Responsibility Principle (SRP) by focusing only on locating per-address models.
+"""
+
+import os
+import re
+import threading
+from utils.logger import get_logger
+from .model_bundle import model_exists, read_manifest
+from .model_cache import model_cache
+
+# Initialize logger
+logger = get_logger(__name__)
+
+ADDRESS_DIR = 'addresses'
+ETHEREUM_ADDRESS_PATTERN = re.compile(r'^0x[0-9a-fA-F]{40}$')
+TENANT_ID_PATTERN = re.compile(r'^[A-Za-z0-9_.-]{1,128}$')
+
+
+def normalize_address(address):
+    """
+    Validate an address or tenant identifier and return its canonical form.
+
+    Ethereum addresses are lower-cased so checksummed and plain spellings share one model. Other identifiers
+    may only contain letters, digits, '_', '.' and '-', and may not start with '.', so they are always safe
+    to use as a directory name.
+
+    :param address: Ethereum address or tenant identifier
+    :return: Canonical identifier
+    :raises ValueError: If the identifier is not valid
+    """
+    if not isinstance(address, str):
+        raise ValueError(f"Invalid address: {address!r}")
+    if ETHEREUM_ADDRESS_PATTERN.match(address):
+        return address.lower()
+    if TENANT_ID_PATTERN.match(address) and not address.startswith('.'):
+        return address
+    raise ValueError(f"Invalid address: {address!r}")
+
+
+class ModelRegistry:
+    """
+    ModelRegistry resolves per-address model directories under a common root.
+
+    The default model (no address) lives directly in the root directory, as before; per-address models live in
+    ``<root>/addresses/<address>``.
+    """
+
+    def __init__(self, root: str = 'models', cache=None):
+        """
+        Initializes the registry.
+
+        :param root: Root directory for stored models.
+        :param cache: ModelCache used to hold loaded models (defaults to the process-level cache).
+        """
+        self.root = root
+        self.cache = cache if cache is not None else model_cache
+        # Addresses with a stored model; scanned on first use, then updated as models are trained
+        self._stored = None
+        self._stored_lock = threading.Lock()
+
+    def model_path(self, address=None):
+        """
+        Return the directory holding the model for an address.
+
+        :param address: Ethereum address or tenant identifier (None for the default model)
+        :return: Directory path
+        :raises ValueError: If the address is not valid
+        """
+        if address is None:
+            return self.root
+        return os.path.join(self.root, ADDRESS_DIR, normalize_address(address))
+
+    def exists(self, address=None):
+        """
+        Check whether a trained model is stored for an address.
+
+        :param address: Ethereum address or tenant identifier (None for the default model)
+        :return: True if a model is stored
+        """
+        return model_exists(self.model_path(address))
+
+    def get(self, address=None):
+        """
+        Return a detector for an address, loading its model on a cache miss.
+
+        :param address: Ethereum address or tenant identifier (None for the default model)
+        :return: AnomalyDetectorIsolationForest ready for inference on a new batch
+        """
+        return self.cache.get(self.model_path(address))
+
+    def reload(self, address=None):
+        """
+        Force the model of an address to be reloaded from disk, e.g. after retraining.
+
+        :param address: Ethereum address or tenant identifier (None for the default model)
+        :return: Newly loaded AnomalyDetectorIsolationForest
+        """
+        detector = self.cache.reload(self.model_path(address))
+        self.record_stored(address)
+        return detector
+
+    def record_stored(self, address=None):
+        """
+        Record that a model was stored for an address, keeping the stored-model count current without
+        rescanning the model directory.
+
+        :param address: Ethereum address or tenant identifier (None for the default model)
+        """
+        if address is None:
+            return
+        address = normalize_address(address)
+        with self._stored_lock:
+            if self._stored is not None:
+                self._stored.add(address)
+
+    def stored_count(self):
+        """
+        Return the number of addresses with a stored model. The model directory is scanned on the first call
+        only; models stored later are counted once recorded with ``record_stored``.
+
+        :return: Number of stored per-address models
+        """
+        with self._stored_lock:
+            if self._stored is None:
+                self._stored = set(self.addresses())
+            return len(self._stored)
+
+    def manifest(self, address=None):
+        """
+        Return the manifest of the stored model of an address, read from its bundle on disk without loading
+        the model. Models are used by the detection workers, so this process's cache may hold none or an older
+        version.
+
+        :param address: Ethereum address or tenant identifier (None for the default model)
+        :return: Manifest dictionary (empty for legacy models)
+        """
+        return read_manifest(self.model_path(address))
+
+    def addresses(self):
+        """
+        List the addresses that have a stored model.
+
+        :return: Sorted list of addresses
+        """
+        directory = os.path.join(self.root, ADDRESS_DIR)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(name for name in os.listdir(directory)
+                      if model_exists(os.path.join(directory, name)))
+
+    def stats(self):
+        """
+        Return registry and cache statistics.
+
+        :return: Dictionary with the number of stored per-address models and the cache statistics
+        """
+        stats = self.cache.stats()
+        stats['stored_models'] = self.stored_count()
+        return stats
+
+
+# Process-level registry shared by the CLI and the API
+model_registry = ModelRegistry()
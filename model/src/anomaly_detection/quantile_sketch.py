@@ -0,0 +1,148 @@
+"""
+quantile_sketch.py
+
+This module implements a KLL quantile sketch (Karnin, Lang & Liberty, 2016). The sketch summarises a stream of
+values in bounded memory, can be updated incrementally from new batches, and can be merged with sketches built
+on other partitions of the data. It is used to compute anomaly thresholds without keeping the full training
+history in memory.
+
+Adheres to the Single Responsibility Principle (SRP) by focusing only on approximate quantiles.
+"""
+
+import math
+import numpy as np
+
+
+class KLLSketch:
+    """
+    KLLSketch keeps a hierarchy of compactors; an item stored at level h stands for 2^h original values.
+
+    As long as no compaction has happened, the sketch holds every value and quantiles are exact.
+    """
+
+    def __init__(self, k: int = 200, seed: int = 42):
+        """
+        Initializes an empty sketch.
+
+        :param k: Accuracy parameter; the rank error is roughly 1.7 / k and memory is O(k).
+        :param seed: Seed for the random compaction offsets.
+        """
+        self.k = k
+        self.n = 0
+        self.levels = [np.empty(0, dtype=np.float64)]
+        self.rng = np.random.default_rng(seed)
+
+    def _capacity(self, level):
+        """
+        Capacity of a level; lower levels get geometrically smaller capacities (factor 2/3).
+        """
+        depth = len(self.levels) - level - 1
+        return max(2, int(math.ceil(self.k * (2.0 / 3.0) ** depth)))
+
+    def _size(self):
+        return sum(len(level) for level in self.levels)
+
+    def _max_size(self):
+        return sum(self._capacity(h) for h in range(len(self.levels)))
+
+    def _compress(self):
+        """
+        Compact full levels, lowest first, until the sketch fits within its total capacity.
+        """
+        while self._size() >= self._max_size():
+            for h in range(len(self.levels)):
+                if len(self.levels[h]) >= self._capacity(h):
+                    if h + 1 == len(self.levels):
+                        self.levels.append(np.empty(0, dtype=np.float64))
+                    values = np.sort(self.levels[h])
+                    even = len(values) - len(values) % 2
+                    offset = int(self.rng.integers(0, 2))
+                    self.levels[h + 1] = np.concatenate([self.levels[h + 1], values[offset:even:2]])
+                    self.levels[h] = values[even:]
+                    break
+
+    def update(self, values):
+        """
+        Add a batch of values to the sketch. NaN values are ignored.
+
+        :param values: Array-like of numbers.
+        :return: The sketch itself.
+        """
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        chunk = self.k
+        for start in range(0, len(values), chunk):
+            block = values[start:start + chunk]
+            self.levels[0] = np.concatenate([self.levels[0], block])
+            self.n += len(block)
+            self._compress()
+        return self
+
+    def merge(self, other: 'KLLSketch'):
+        """
+        Merge another sketch into this one.
+
+        :param other: KLLSketch built with the same ``k``.
+        :return: The sketch itself.
+        """
+        if other.k != self.k:
+            raise ValueError(f"Cannot merge sketches with different k ({self.k} != {other.k})")
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0, dtype=np.float64))
+        for h, level in enumerate(other.levels):
+            self.levels[h] = np.concatenate([self.levels[h], level])
+        self.n += other.n
+        self._compress()
+        return self
+
+    def copy(self):
+        """
+        Return an independent copy of the sketch.
+        """
+        sketch = KLLSketch(self.k)
+        sketch.n = self.n
+        sketch.levels = [np.array(level) for level in self.levels]
+        sketch.rng = np.random.default_rng(self.rng.integers(0, 2 ** 32))
+        return sketch
+
+    def quantile(self, q: float):
+        """
+        Estimate the q-th quantile.
+
+        :param q: Quantile in [0, 1].
+        :return: Estimated quantile (NaN if the sketch is empty).
+        """
+        if self.n == 0:
+            return np.nan
+        if len(self.levels) == 1:
+            # Nothing has been compacted yet, so the sketch holds every value
+            return np.percentile(self.levels[0], q * 100)
+
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 2 ** h, dtype=np.float64)
+                                  for h, level in enumerate(self.levels)])
+        order = np.argsort(items, kind='stable')
+        cumulative = np.cumsum(weights[order])
+        index = np.searchsorted(cumulative, q * cumulative[-1], side='left')
+        return items[order[min(index, len(items) - 1)]]
+
+    def to_arrays(self):
+        """
+        Export the sketch state as plain arrays and numbers, suitable for the model bundle.
+
+        :return: Dictionary with k, n and the level arrays.
+        """
+        return {'k': self.k, 'n': self.n, 'levels': [np.asarray(level) for level in self.levels]}
+
+    @classmethod
+    def from_arrays(cls, state):
+        """
+        Rebuild a sketch from ``to_arrays`` output.
+
+        :param state: Dictionary with k, n and the level arrays.
+        :return: KLLSketch instance.
+        """
+        sketch = cls(state['k'])
+        sketch.n = state['n']
+        sketch.levels = [np.asarray(level, dtype=np.float64) for level in state['levels']]
+        return sketch
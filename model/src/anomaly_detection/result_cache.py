@@ -0,0 +1,149 @@
+"""
+result_cache.py
+
+This module provides a process-level cache of detection results keyed by model version and transaction hash.
+Clients that re-submit overlapping windows of recent transactions get the earlier results for transactions
+already scored by the same model instead of running them through the pipeline again. Entries expire after a
+fixed time, the cache holds a bounded number of results (least recently used ones are evicted first), and the
+results of a model version are dropped as soon as a newer version of that model is seen.
+
+A cached result is the one computed when the transaction was first scored, as part of the batch it arrived in.
+
+Adheres to the Single Responsibility Principle (SRP) by focusing only on caching detection results.
+"""
+
+import time
+import threading
+from collections import OrderedDict
+from utils.logger import get_logger
+from utils.config import RESULT_CACHE_SIZE, RESULT_CACHE_TTL
+
+# Initialize logger
+logger = get_logger(__name__)
+
+
+class ResultCache:
+    """
+    ResultCache maps (model version, transaction hash) to detection results, with LRU and TTL eviction.
+    """
+
+    def __init__(self, capacity: int = RESULT_CACHE_SIZE, ttl: float = RESULT_CACHE_TTL):
+        """
+        Initializes an empty cache.
+
+        :param capacity: Maximum number of results kept (0 disables the cache).
+        :param ttl: Seconds a result stays valid after it was computed.
+        """
+        self.capacity = capacity
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self):
+        return self.capacity > 0
+
+    def activate(self, model_key, version):
+        """
+        Record the model version currently used for ``model_key``, dropping the results of the version it
+        replaces.
+
+        :param model_key: Identifier of the model (e.g. its directory).
+        :param version: Model version now in use.
+        """
+        with self._lock:
+            previous = self._versions.get(model_key)
+            if previous == version:
+                return
+            self._versions[model_key] = version
+            if previous is None:
+                return
+            stale = [key for key in self._entries if key[0] == previous]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += 1
+        logger.info(f"Result cache dropped {len(stale)} results of replaced model version {previous}.")
+
+    def get_many(self, version, hashes):
+        """
+        Look up the cached results of transactions.
+
+        :param version: Model version the results must come from.
+        :param hashes: Transaction hashes.
+        :return: Dictionary mapping the hashes found to their results
+        """
+        found = {}
+        now = time.monotonic()
+        with self._lock:
+            for tx_hash in hashes:
+                if tx_hash in found:
+                    continue
+                key = (version, tx_hash)
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] <= now:
+                    del self._entries[key]
+                    self.expirations += 1
+                    entry = None
+                if entry is None:
+                    self.misses += 1
+                    continue
+                self._entries.move_to_end(key)
+                self.hits += 1
+                found[tx_hash] = entry[1]
+        return found
+
+    def put_many(self, version, results):
+        """
+        Store detection results.
+
+        :param version: Model version that produced the results.
+        :param results: Result dictionaries, keyed by their 'transaction_hash'.
+        """
+        if not self.enabled:
+            return
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            for result in results:
+                key = (version, result['transaction_hash'])
+                self._entries[key] = (expires, result)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """
+        Drop all cached results.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+
+    def stats(self):
+        """
+        Return cache statistics.
+
+        :return: Dictionary with the cache size, settings, hits, misses, evictions and hit ratio
+        """
+        lookups = self.hits + self.misses
+        return {
+            'cached_results': len(self._entries),
+            'capacity': self.capacity,
+            'ttl_seconds': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'expirations': self.expirations,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+            'hit_ratio': self.hits / lookups if lookups else 0.0
+        }
+
+
+# Process-level cache used by the API's detection workers
+result_cache = ResultCache()
@@ -0,0 +1,266 @@
+"""
+streaming_detector.py
+
+This module provides an online anomaly detector for live transaction feeds, based on streaming Half-Space Trees
+(Tan, Ting & Liu, 2011). Transactions are scored against the mass profile of the previous window while the
+current window's profile is accumulated; when a window fills up the profiles are swapped. Each update costs
+O(n_trees * max_depth) and memory is bounded by the tree size and the window size, so the model adapts to new
+behaviour without a full retrain.
+
+Adheres to the Single Responsibility Principle (SRP) by focusing only on streaming anomaly detection.
+"""
+
+import numpy as np
+import pandas as pd
+from utils.logger import get_logger
+from .anomaly_rules import AnomalyTypeMatrix, compute_thresholds, get_rules
+from .isolation_forest import FEATURE_COLUMNS, compute_features, _format_timestamps
+
+# Initialize logger
+logger = get_logger(__name__)
+
+
+class StreamingAnomalyDetector:
+    """
+    StreamingAnomalyDetector scores transactions one at a time or in micro-batches with sliding-window
+    Half-Space Trees.
+    """
+
+    def __init__(self, n_trees: int = 50, max_depth: int = 10, window_size: int = 250,
+                 contamination: float = 0.01, random_state: int = 42, rules=None):
+        """
+        Initializes the streaming detector. Trees are built once the first window has been observed.
+
+        :param n_trees: Number of half-space trees.
+        :param max_depth: Depth of every tree.
+        :param window_size: Number of transactions per window (reference profile size).
+        :param contamination: Expected proportion of anomalies, used to set the score threshold.
+        :param random_state: Seed for the random number generator to ensure reproducibility.
+        :param rules: Threshold rules used to type anomalies (defaults to the registered rules).
+        """
+        self.n_trees = n_trees
+        self.max_depth = max_depth
+        self.window_size = window_size
+        self.contamination = contamination
+        self.size_limit = 0.1 * window_size
+        self.rules = rules
+        self.rng = np.random.default_rng(random_state)
+
+        n_features = len(FEATURE_COLUMNS)
+        n_nodes = 2 ** (max_depth + 1) - 1
+        self.split_feature = None
+        self.split_value = None
+        self.feature_offset = None
+        self.feature_scale = None
+        self.reference_mass = np.zeros((n_trees, n_nodes), dtype=np.int64)
+        self.latest_mass = np.zeros((n_trees, n_nodes), dtype=np.int64)
+
+        # Bounded buffers for the current window
+        self.window_features = np.empty((window_size, n_features), dtype=np.float64)
+        self.window_scores = np.empty(window_size, dtype=np.float64)
+        self.window_fill = 0
+
+        self.score_threshold = None
+        self.thresholds = {}
+        self.n_seen = 0
+        self.n_windows = 0
+
+    @property
+    def is_warm(self):
+        """
+        Whether the detector has a reference window and can flag anomalies.
+        """
+        return self.split_feature is not None
+
+    def _normalize(self, features):
+        """
+        Map log-scaled features to the unit work space observed in the first window.
+        """
+        logged = np.log1p(np.clip(np.nan_to_num(features, nan=0.0, posinf=0.0, neginf=0.0), 0, None))
+        return (logged - self.feature_offset) / self.feature_scale
+
+    def _build_trees(self, features):
+        """
+        Build random half-space trees over a work space derived from the first window.
+        """
+        logged = np.log1p(np.clip(np.nan_to_num(features, nan=0.0, posinf=0.0, neginf=0.0), 0, None))
+        self.feature_offset = logged.min(axis=0)
+        self.feature_scale = np.maximum(logged.max(axis=0) - self.feature_offset, 1e-12)
+
+        n_features = features.shape[1]
+        n_internal = 2 ** self.max_depth - 1
+        self.split_feature = np.empty((self.n_trees, n_internal), dtype=np.int64)
+        self.split_value = np.empty((self.n_trees, n_internal), dtype=np.float64)
+
+        # Each tree gets a randomly perturbed work space around [0, 1] in every dimension
+        centre = self.rng.random((self.n_trees, n_features))
+        half_width = 2 * np.maximum(centre, 1 - centre)
+        low = np.empty((self.n_trees, n_internal, n_features))
+        high = np.empty((self.n_trees, n_internal, n_features))
+        low[:, 0] = centre - half_width
+        high[:, 0] = centre + half_width
+
+        trees = np.arange(self.n_trees)
+        for node in range(n_internal):
+            dim = self.rng.integers(0, n_features, self.n_trees)
+            split = (low[trees, node, dim] + high[trees, node, dim]) / 2
+            self.split_feature[:, node] = dim
+            self.split_value[:, node] = split
+
+            for child, is_left in ((2 * node + 1, True), (2 * node + 2, False)):
+                if child >= n_internal:
+                    continue
+                low[:, child] = low[:, node]
+                high[:, child] = high[:, node]
+                if is_left:
+                    high[trees, child, dim] = split
+                else:
+                    low[trees, child, dim] = split
+
+    def _paths(self, normalized):
+        """
+        Return the node visited at every depth of every tree, shape (n_samples, n_trees, max_depth + 1).
+        """
+        n_samples = normalized.shape[0]
+        trees = np.arange(self.n_trees)[None, :]
+        rows = np.arange(n_samples)[:, None]
+        paths = np.empty((n_samples, self.n_trees, self.max_depth + 1), dtype=np.int64)
+        nodes = np.zeros((n_samples, self.n_trees), dtype=np.int64)
+        paths[:, :, 0] = nodes
+        for depth in range(1, self.max_depth + 1):
+            dim = self.split_feature[trees, nodes]
+            go_left = normalized[rows, dim] < self.split_value[trees, nodes]
+            nodes = np.where(go_left, 2 * nodes + 1, 2 * nodes + 2)
+            paths[:, :, depth] = nodes
+        return paths
+
+    def _score(self, paths):
+        """
+        Half-space tree mass score (higher is more normal): the reference mass of the first node on each path
+        whose mass falls below the size limit (or the leaf), scaled by 2^depth, summed over trees.
+        """
+        trees = np.arange(self.n_trees)[None, :, None]
+        mass = self.reference_mass[trees, paths]
+        below = mass < self.size_limit
+        below[:, :, -1] = True
+        terminal = below.argmax(axis=2)
+        terminal_mass = np.take_along_axis(mass, terminal[:, :, None], axis=2)[:, :, 0]
+        return (terminal_mass * (2.0 ** terminal)).sum(axis=1)
+
+    def _record(self, paths):
+        """
+        Add the visited nodes to the latest window's mass profile.
+        """
+        n_nodes = self.latest_mass.shape[1]
+        flat = (np.arange(self.n_trees)[None, :, None] * n_nodes + paths).ravel()
+        np.add.at(self.latest_mass.reshape(-1), flat, 1)
+
+    def _end_window(self):
+        """
+        Swap the latest mass profile in as the reference and refresh the score and typing thresholds.
+        """
+        window = self.window_features[:self.window_fill]
+        if not self.is_warm:
+            self._build_trees(window)
+            paths = self._paths(self._normalize(window))
+            self._record(paths)
+            self.reference_mass, self.latest_mass = self.latest_mass, np.zeros_like(self.latest_mass)
+            scores = self._score(paths)
+        else:
+            self.reference_mass, self.latest_mass = self.latest_mass, self.reference_mass
+            self.latest_mass[:] = 0
+            scores = self.window_scores[:self.window_fill]
+
+        self.score_threshold = float(np.quantile(scores, self.contamination))
+        self.thresholds = compute_thresholds(pd.DataFrame(window, columns=FEATURE_COLUMNS), self.rules)
+        self.window_fill = 0
+        self.n_windows += 1
+        logger.info(f"Streaming detector completed window {self.n_windows} ({self.n_seen} transactions seen).")
+
+    def _process_segment(self, features):
+        """
+        Score and learn from a segment that does not cross a window boundary.
+
+        :return: Tuple of (scores, decision values, is_anomaly, thresholds in effect).
+        """
+        n_rows = features.shape[0]
+        thresholds = self.thresholds
+        if self.is_warm:
+            paths = self._paths(self._normalize(features))
+            scores = self._score(paths)
+            decision = scores - self.score_threshold
+            is_anomaly = decision < 0
+            self._record(paths)
+        else:
+            scores = np.full(n_rows, np.nan)
+            decision = np.full(n_rows, np.nan)
+            is_anomaly = np.zeros(n_rows, dtype=bool)
+
+        start = self.window_fill
+        self.window_features[start:start + n_rows] = features
+        self.window_scores[start:start + n_rows] = scores
+        self.window_fill += n_rows
+        self.n_seen += n_rows
+
+        if self.window_fill == self.window_size:
+            self._end_window()
+        return scores, decision, is_anomaly, thresholds
+
+    def update(self, df: pd.DataFrame):
+        """
+        Score a micro-batch of cleaned and transformed transactions, then learn from it.
+
+        :param df: DataFrame of transactions (one or more rows), as produced by the cleaning pipeline.
+        :return: Dictionary of result columns, in the same format as
+                 AnomalyDetectorIsolationForest.detect_anomalies_columnar. 'score' holds the raw mass score
+                 and 'anomaly_score' the mass score minus the current threshold (negative values are anomalies).
+        """
+        df = df.copy()
+        features = compute_features(df)
+        values = features.to_numpy(dtype=np.float64)
+        n_rows = values.shape[0]
+
+        scores = np.empty(n_rows)
+        decision = np.empty(n_rows)
+        is_anomaly = np.zeros(n_rows, dtype=bool)
+        segment_thresholds = []
+        start = 0
+        while start < n_rows:
+            end = min(n_rows, start + self.window_size - self.window_fill)
+            (scores[start:end], decision[start:end], is_anomaly[start:end],
+             thresholds) = self._process_segment(values[start:end])
+            segment_thresholds.append((start, end, thresholds))
+            start = end
+
+        flagged = np.flatnonzero(is_anomaly)
+        rules = get_rules() if self.rules is None else self.rules
+        rules = [rule for rule in rules if rule.threshold_key in self.thresholds]
+        row_thresholds = np.empty((len(flagged), len(rules)))
+        for seg_start, seg_end, thresholds in segment_thresholds:
+            in_segment = (flagged >= seg_start) & (flagged < seg_end)
+            row_thresholds[in_segment] = [thresholds.get(rule.threshold_key, np.inf) for rule in rules]
+        rule_values = features[[rule.feature for rule in rules]].iloc[flagged].to_numpy(dtype=float)
+        anomaly_types = AnomalyTypeMatrix(rules, row_thresholds, flagged,
+                                          rule_values.reshape(len(flagged), len(rules)))
+
+        if 'hash' in df.columns:
+            hashes = df['hash'].to_numpy(dtype=object)
+        else:
+            hashes = np.full(n_rows, 'N/A', dtype=object)
+
+        # Transactions seen before the detector is warm have no score
+        anomaly_score = decision.astype(object)
+        anomaly_score[np.isnan(decision)] = None
+
+        return {
+            'transaction_hash': hashes,
+            'prediction': np.where(is_anomaly, -1, 1),
+            'is_anomaly': is_anomaly,
+            'score': scores,
+            'anomaly_score': anomaly_score,
+            'anomaly_types': anomaly_types,
+            'value': features['value'].to_numpy(dtype=float),
+            'gas': features['gas'].to_numpy(dtype=float),
+            'gasPrice': features['gasPrice'].to_numpy(dtype=float),
+            'timestamp': _format_timestamps(df.get('timeStamp'), n_rows)
+        }
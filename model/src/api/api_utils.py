@@ -4,31 +4,243 @@ api_utils.py
 This module provides utility functions to assist with API requests, such as handling rate limits,
 validating responses, and retry logic. These utilities enhance the robustness and scalability of API interactions.
 
+Calls are paced by a token bucket sized to the API plan's calls per second. The bucket's state is kept in a
+SQLite database, so all ``EtherscanAPI`` instances, threads and processes (API server, training jobs, bulk
+training workers) share it, and concurrent fetches together stay at the quota instead of bursting past it and
+being throttled. Waiting for a token or for a retry is done with ``asyncio.sleep`` in
+async code, so no thread is blocked, and retries back off exponentially with random jitter.
+
 Adheres to the Single Responsibility Principle (SRP) by focusing only on auxiliary API-related tasks.
 """
 
+import os
 import time
+import random
+import sqlite3
+import asyncio
+import threading
 import requests
 from requests.exceptions import HTTPError
 from utils.logger import get_logger
-from utils.config import MAX_RETRIES, RETRY_BACKOFF
+from utils.config import (MAX_RETRIES, RETRY_BACKOFF, RETRY_BASE_DELAY, RETRY_MAX_DELAY,
+                          ETHERSCAN_CALLS_PER_SECOND, ETHERSCAN_BURST, ETHERSCAN_RATE_LIMIT_PATH)
 
 # Initialize logger
 logger = get_logger(__name__)
 
 
-def handle_api_rate_limit(response):
+class RetryableError(Exception):
+    """
+    Raised for failures worth retrying, such as rate limiting or a temporary server error.
+    """
+
+    def __init__(self, message, retry_after=None):
+        """
+        :param message: Error message.
+        :param retry_after: Seconds the server asked to wait before retrying, if it said.
+        """
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class RateLimitExceeded(RetryableError):
+    """
+    Raised when the server reports that the rate limit was exceeded.
+    """
+
+
+class TokenBucket:
+    """
+    TokenBucket paces calls to ``rate`` per second, allowing bursts of up to ``capacity`` calls.
+
+    Tokens are reserved under a lock, so the bucket can be shared by threads and event loops; each caller then
+    waits for its reserved slot on its own. ``pause`` holds all callers back, e.g. after the server reported
+    that the quota was exceeded. The bucket's state is a (tokens, updated, paused until) tuple, changed only
+    through ``_update``.
+    """
+
+    # Clock the bucket's times are read from
+    _now = staticmethod(time.monotonic)
+
+    def __init__(self, rate: float = ETHERSCAN_CALLS_PER_SECOND, capacity: float = ETHERSCAN_BURST):
+        """
+        Initializes a full bucket.
+
+        :param rate: Calls allowed per second.
+        :param capacity: Maximum number of calls allowed at once.
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._state = (capacity, self._now(), 0.0)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.waited = 0.0
+
+    def _update(self, change):
+        """
+        Atomically replace the bucket's state with ``change(state, now)``.
+
+        :param change: Function returning the new state and a result.
+        :return: The result returned by ``change``
+        """
+        with self._lock:
+            self._state, result = change(self._state, self._now())
+            return result
+
+    def _take(self, state, now):
+        """
+        Take a token from ``state``, going into debt if none is left.
+
+        :return: Tuple of the new state and the seconds the caller must wait
+        """
+        tokens, updated, paused_until = state
+        start = max(now, paused_until)
+        tokens = min(self.capacity, tokens + (start - updated) * self.rate) - 1
+        delay = start - now + (-tokens / self.rate if tokens < 0 else 0.0)
+        return (tokens, start, paused_until), delay
+
+    def reserve(self) -> float:
+        """
+        Take a token, going into debt if none is left.
+
+        :return: Seconds the caller must wait before making its call
+        """
+        delay = self._update(self._take)
+        with self._lock:
+            self.calls += 1
+            self.waited += delay
+        return delay
+
+    def pause(self, seconds: float):
+        """
+        Hold back all calls for ``seconds``, unless they are already held back longer.
+        """
+        self._update(lambda state, now: ((state[0], state[1], max(state[2], now + seconds)), None))
+
+    async def acquire(self):
+        """
+        Wait, without blocking the event loop, until a call may be made.
+        """
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def acquire_blocking(self):
+        """
+        Block the current thread until a call may be made; for synchronous callers.
+        """
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+
+class SharedTokenBucket(TokenBucket):
+    """
+    SharedTokenBucket is a TokenBucket whose state is a row of a SQLite database, so that separate processes
+    using the same database file share one quota.
+
+    Each state change runs in its own immediate transaction, which serializes processes on the database lock;
+    times are read from the wall clock, which all processes agree on.
+    """
+
+    _now = staticmethod(time.time)
+
+    def __init__(self, path: str = ETHERSCAN_RATE_LIMIT_PATH, name: str = 'etherscan',
+                 rate: float = ETHERSCAN_CALLS_PER_SECOND, capacity: float = ETHERSCAN_BURST):
+        """
+        Initializes the bucket; the database file is created on first use, with a full bucket.
+
+        :param path: Path of the SQLite database file.
+        :param name: Name of the bucket's row, so that one database can hold several buckets.
+        :param rate: Calls allowed per second.
+        :param capacity: Maximum number of calls allowed at once.
+        """
+        super().__init__(rate, capacity)
+        self.path = path
+        self.name = name
+        self._initialized = None
+
+    def _connect(self):
+        """
+        Open a connection in autocommit mode, creating the database on first use (a relative path is created
+        again if the working directory changes).
+        """
+        path = os.path.abspath(self.path)
+        if self._initialized != path:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        connection = sqlite3.connect(path, timeout=30, isolation_level=None)
+        if self._initialized != path:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("CREATE TABLE IF NOT EXISTS token_buckets (name TEXT PRIMARY KEY, tokens REAL NOT NULL, "
+                               "updated REAL NOT NULL, paused_until REAL NOT NULL)")
+            self._initialized = path
+        return connection
+
+    def _update(self, change):
+        connection = self._connect()
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                row = connection.execute("SELECT tokens, updated, paused_until FROM token_buckets WHERE name = ?",
+                                         (self.name,)).fetchone()
+                now = self._now()
+                state, result = change(row if row is not None else (self.capacity, now, 0.0), now)
+                connection.execute("INSERT OR REPLACE INTO token_buckets VALUES (?, ?, ?, ?)", (self.name, *state))
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            return result
+        finally:
+            connection.close()
+
+
+# Rate limiter shared by all Etherscan API clients, in every process working in the same directory
+etherscan_rate_limiter = SharedTokenBucket()
+
+
+def backoff_delay(attempt: int, retry_after=None) -> float:
+    """
+    Delay before retrying a failed call: exponential in the attempt number, with full random jitter so that
+    callers that failed together do not retry together.
+
+    :param attempt: Number of the failed attempt, starting at 0.
+    :param retry_after: Seconds the server asked to wait, which take precedence when given.
+    :return: Seconds to wait
+    """
+    if retry_after is not None:
+        return retry_after
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * RETRY_BACKOFF ** attempt))
+
+
+def retry_after_seconds(response):
     """
-    Handles rate limiting for API requests. If the rate limit is exceeded (status code 429), 
-    it pauses the execution for the specified amount of time.
+    Parse the Retry-After header of a response.
+
+    :return: Seconds to wait, or None if the header is missing or not a number of seconds
+    """
+    try:
+        return float(response.headers['Retry-After'])
+    except (KeyError, ValueError):
+        return None
+
+
+def handle_api_rate_limit(response, limiter: TokenBucket = etherscan_rate_limiter):
+    """
+    Handles rate limiting for API requests. If the rate limit is exceeded (status code 429), all calls through
+    the rate limiter are held back for the time given by the Retry-After header (or a jittered backoff if it
+    is missing), without blocking the calling thread.
 
     :param response: The response object from the API request.
-    :return: None, but pauses execution if rate limit is exceeded.
+    :param limiter: Rate limiter to pause.
+    :return: Seconds calls are held back, or 0 if the rate limit was not exceeded.
     """
-    if response.status_code == 429:  # Too Many Requests
-        retry_after = int(response.headers.get('Retry-After', 60))  # Default to 60 seconds if header is missing
-        logger.warning(f"Rate limit exceeded. Retrying after {retry_after} seconds.")
-        time.sleep(retry_after)
+    if response.status_code != 429:  # Too Many Requests
+        return 0
+    retry_after = backoff_delay(0, retry_after_seconds(response))
+    logger.warning(f"Rate limit exceeded. Holding back calls for {retry_after:.2f} seconds.")
+    limiter.pause(retry_after)
+    return retry_after
 
 
 def validate_response(response):
@@ -54,7 +266,7 @@ def validate_response(response):
 def retry_request(func, *args, **kwargs):
     """
     Retry wrapper for functions making API requests. It attempts to execute the function and retries
-    in case of failure up to MAX_RETRIES, using exponential backoff.
+    in case of failure up to MAX_RETRIES, using exponential backoff with jitter.
 
     :param func: The function to be retried.
     :param args: Positional arguments to pass to the function.
@@ -65,12 +277,43 @@ def retry_request(func, *args, **kwargs):
         try:
             logger.info(f"Attempt {attempt + 1} of {MAX_RETRIES}")
             return func(*args, **kwargs)
-        except (HTTPError, requests.Timeout) as e:
-            logger.error(f"Error occurred: {e}. Retrying in {RETRY_BACKOFF ** attempt} seconds...")
-            time.sleep(RETRY_BACKOFF ** attempt)
+        except (HTTPError, requests.Timeout, RetryableError) as e:
+            delay = backoff_delay(attempt, getattr(e, 'retry_after', None))
+            logger.error(f"Error occurred: {e}. Retrying in {delay:.2f} seconds...")
+            time.sleep(delay)
         except Exception as err:
             logger.error(f"An unexpected error occurred: {err}")
             raise err
 
     logger.error(f"Failed after {MAX_RETRIES} attempts.")
     raise Exception(f"Max retries exceeded for function {func.__name__}")
+
+
+async def retry_request_async(func, *args, limiter: TokenBucket = None, retryable=(RetryableError,), **kwargs):
+    """
+    Async retry wrapper for coroutine functions making API requests. Each attempt first waits for the rate
+    limiter; failed attempts are retried up to MAX_RETRIES times in total with jittered exponential backoff.
+    A rate-limited attempt (RateLimitExceeded) pauses the whole limiter, so other callers back off as well.
+
+    :param func: Coroutine function to be retried.
+    :param args: Positional arguments to pass to the function.
+    :param limiter: Optional TokenBucket pacing the attempts.
+    :param retryable: Exception types that are retried; others are raised immediately.
+    :param kwargs: Keyword arguments to pass to the function.
+    :return: The result of the function if successful.
+    :raises: The last error once all attempts failed.
+    """
+    for attempt in range(MAX_RETRIES):
+        if limiter is not None:
+            await limiter.acquire()
+        try:
+            return await func(*args, **kwargs)
+        except retryable as e:
+            if attempt == MAX_RETRIES - 1:
+                logger.error(f"Failed after {MAX_RETRIES} attempts: {e}")
+                raise
+            delay = backoff_delay(attempt, getattr(e, 'retry_after', None))
+            logger.warning(f"Error occurred: {e}. Retrying in {delay:.2f} seconds...")
+            if limiter is not None and isinstance(e, RateLimitExceeded):
+                limiter.pause(delay)
+            await asyncio.sleep(delay)
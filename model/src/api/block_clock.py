@@ -0,0 +1,139 @@
+"""
+block_clock.py
+
+This module resolves timestamps to block numbers for block-range queries, such as the transactions of the last
+N days. The first block at or after a timestamp is looked up with Etherscan's block-by-time endpoint and the
+answer is kept in a persistent SQLite cache. Later resolutions are answered from the cache with an indexed
+search for the nearest earlier lookup, which bounds the block from below; callers filter the transactions they
+fetch by timestamp, so the ranges they return stay exact. The newest block is bounded from above by the
+12-second slots since a known block, so no block number request is needed either.
+
+Adheres to the Single Responsibility Principle (SRP) by focusing only on mapping timestamps to blocks.
+"""
+
+import os
+import time
+import sqlite3
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Optional, Tuple
+
+from ..utils.config import BLOCK_CACHE_PATH, BLOCK_LOOKUP_TOLERANCE
+from ..utils.logger import get_logger
+
+# Initialize logger
+logger = get_logger(__name__)
+
+# First proof-of-stake block; from it on every block has its own 12-second slot
+MERGE_BLOCK = 15537394
+MERGE_TIMESTAMP = 1663224179
+SLOT_SECONDS = 12
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS block_lookups (
+    timestamp INTEGER PRIMARY KEY,
+    block INTEGER NOT NULL
+);
+"""
+
+
+class BlockClock:
+    """
+    BlockClock maps timestamps to block numbers, caching every lookup on disk.
+
+    A cached lookup of timestamp T giving block B means B is the first block at or after T. Since blocks are
+    ordered by time, B is also a lower bound of the first block at or after any later timestamp.
+    """
+
+    def __init__(self, path: str = BLOCK_CACHE_PATH, tolerance: float = BLOCK_LOOKUP_TOLERANCE,
+                 clock: Callable[[], float] = time.time):
+        """
+        Initializes the clock; the cache file is created on first use.
+
+        :param path: Path of the SQLite cache file.
+        :param tolerance: Seconds a cached lookup may precede a timestamp and still be used for it; older
+                          lookups would make callers fetch too many blocks, so the timestamp is looked up.
+        :param clock: Function returning the current UNIX time.
+        """
+        self.path = path
+        self.tolerance = tolerance
+        self.clock = clock
+        self.lookups = 0
+        self._initialized = False
+
+    @contextmanager
+    def _connect(self):
+        """
+        Open a connection, creating the cache on first use, and commit (or roll back) on exit.
+        """
+        if not self._initialized:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=30)
+        try:
+            if not self._initialized:
+                connection.executescript(SCHEMA)
+                self._initialized = True
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def now(self) -> float:
+        """Current UNIX time."""
+        return self.clock()
+
+    def record(self, timestamp: int, block: int):
+        """
+        Cache that ``block`` is the first block at or after ``timestamp``.
+        """
+        with self._connect() as connection:
+            connection.execute("INSERT OR REPLACE INTO block_lookups VALUES (?, ?)", (int(timestamp), block))
+
+    def nearest(self, timestamp: int) -> Optional[Tuple[int, int]]:
+        """
+        Find the latest cached lookup at or before a timestamp.
+
+        :return: Tuple of the looked-up timestamp and its block, or None if there is none
+        """
+        with self._connect() as connection:
+            return connection.execute(
+                "SELECT timestamp, block FROM block_lookups WHERE timestamp <= ? ORDER BY timestamp DESC LIMIT 1",
+                (int(timestamp),)).fetchone()
+
+    def latest_block_bound(self) -> int:
+        """
+        Upper bound of the newest block, from the slots elapsed since the latest cached lookup (or the merge).
+        """
+        now = int(self.now())
+        anchor = self.nearest(now)
+        if anchor is None or anchor[0] < MERGE_TIMESTAMP:
+            anchor = (MERGE_TIMESTAMP, MERGE_BLOCK)
+        timestamp, block = anchor
+        # Every block after the anchor has its own slot, so at most one block per slot has been added since
+        return block + max(0, now - timestamp) // SLOT_SECONDS
+
+    async def block_range(self, start_time: float,
+                          lookup: Callable[[int], Awaitable[int]]) -> Tuple[int, int]:
+        """
+        Get a block range covering everything from a timestamp up to now.
+
+        :param start_time: UNIX time the range starts at
+        :param lookup: Coroutine function returning the first block at or after a timestamp, called when no
+                       cached lookup is close enough
+        :return: Tuple of the first and last block; the first block may precede ``start_time`` by up to the
+                 tolerance, so results must be filtered by timestamp
+        """
+        start_time = int(start_time)
+        cached = self.nearest(start_time)
+        if cached is not None and start_time - cached[0] <= self.tolerance:
+            start_block = cached[1]
+        else:
+            start_block = await lookup(start_time)
+            self.lookups += 1
+            self.record(start_time, start_block)
+        return start_block, max(start_block, self.latest_block_bound())
+
+
+# Block clock shared by all Etherscan API clients of the process
+block_clock = BlockClock()
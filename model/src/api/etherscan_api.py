@@ -4,43 +4,206 @@ etherscan_api.py
 This module provides functionality to interact with the Etherscan API for fetching
 blockchain transaction data.
 
+Requests go through a pooled asyncio HTTP client with a timeout, are paced by a rate limiter shared by all
+instances, and are retried with jittered exponential backoff when they are throttled or fail temporarily.
+Large transaction histories, which Etherscan truncates at 10000 records per query, are fetched in concurrent
+block windows by ``TransactionFetcher``. Day windows are resolved to block ranges by ``BlockClock``, from
+cached block-by-time lookups.
+
 Adheres to the Single Responsibility Principle (SRP) by handling only Etherscan API interactions.
 """
 
 import os
-import requests
+import asyncio
+import httpx
 from typing import List, Dict, Any, Optional
-from datetime import datetime, timedelta
 
+from .block_clock import BlockClock, block_clock
+from .transaction_fetcher import TransactionFetcher, merge_transactions
+from .api_utils import (TokenBucket, RetryableError, RateLimitExceeded, etherscan_rate_limiter,
+                        retry_request_async, retry_after_seconds)
+from ..utils.config import BASE_URL, REQUEST_TIMEOUT, ETHERSCAN_CONCURRENCY, ETHERSCAN_MAX_RESULTS
 from ..utils.logger import get_logger
 
 # Initialize logger
 logger = get_logger(__name__)
 
+# Block number standing for the latest block
+LATEST_BLOCK = 99999999
+
+# Message of an empty txlist result, which Etherscan reports with status "0"
+NO_TRANSACTIONS = "No transactions found"
+
+
+class EtherscanError(Exception):
+    """Raised when Etherscan answers a request with an error."""
+
+
 class EtherscanAPI:
     """
     Class for interacting with the Etherscan API.
     """
-    
-    def __init__(self, api_key: str):
+
+    def __init__(self, api_key: str, base_url: Optional[str] = None, concurrency: int = ETHERSCAN_CONCURRENCY,
+                 rate_limiter: Optional[TokenBucket] = etherscan_rate_limiter, clock: BlockClock = block_clock):
         """
         Initialize the EtherscanAPI class.
-        
+
         :param api_key: Etherscan API key
+        :param base_url: URL of the Etherscan API (or of a compatible local stand-in); defaults to the
+                         ETHERSCAN_BASE_URL environment variable if set, otherwise BASE_URL
+        :param concurrency: Maximum number of requests in flight while fetching a history
+        :param rate_limiter: TokenBucket pacing the requests; by default the one shared by all instances,
+                             None to disable rate limiting
+        :param clock: BlockClock resolving day windows to block ranges; by default the one shared by all
+                      instances
         """
         self.api_key = api_key
-        self.base_url = "https://api.etherscan.io/api"
-    
+        self.base_url = base_url or os.getenv("ETHERSCAN_BASE_URL") or BASE_URL
+        self.concurrency = concurrency
+        self.rate_limiter = rate_limiter
+        self.clock = clock
+
+    def client(self) -> httpx.AsyncClient:
+        """
+        Create an HTTP client whose connections are reused by all requests of one fetch.
+        """
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        return httpx.AsyncClient(timeout=REQUEST_TIMEOUT, limits=limits)
+
+    async def request(self, client: httpx.AsyncClient, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Send one API request, waiting for the rate limiter and retrying throttled or temporarily failed
+        attempts.
+
+        :param client: HTTP client from ``client()``
+        :param params: Query parameters, without the API key
+        :return: Decoded JSON response
+        :raises RetryableError: If all attempts were throttled or failed temporarily
+        :raises httpx.HTTPError: If the request fails with a client error
+        """
+        return await retry_request_async(self._send, client, params, limiter=self.rate_limiter)
+
+    async def _send(self, client: httpx.AsyncClient, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Send one attempt of an API request, classifying throttling and temporary failures as retryable.
+        """
+        try:
+            response = await client.get(self.base_url, params={**params, "apikey": self.api_key})
+        except httpx.TransportError as e:
+            raise RetryableError(f"Request failed: {e!r}")
+        if response.status_code == 429:
+            raise RateLimitExceeded("Rate limit exceeded (HTTP 429)", retry_after_seconds(response))
+        if response.status_code >= 500:
+            raise RetryableError(f"Server error (HTTP {response.status_code})")
+        response.raise_for_status()
+        data = response.json()
+        # Etherscan also reports throttling in the body of a successful response
+        if data.get("status") == "0" and "rate limit" in str(data.get("result", "")).lower():
+            raise RateLimitExceeded(str(data["result"]))
+        return data
+
+    async def query_transactions(self, client: httpx.AsyncClient, address: str, start_block: int,
+                                 end_block: int) -> List[Dict[str, Any]]:
+        """
+        Request one page of normal transactions for an address in a block range, oldest first.
+
+        :return: Up to ETHERSCAN_MAX_RESULTS transactions
+        :raises EtherscanError: If Etherscan reports an error
+        """
+        data = await self.request(client, {
+            "module": "account",
+            "action": "txlist",
+            "address": address,
+            "startblock": start_block,
+            "endblock": end_block,
+            "page": 1,
+            "offset": ETHERSCAN_MAX_RESULTS,
+            "sort": "asc"
+        })
+        if data.get("status") == "1":
+            return data["result"]
+        if data.get("message") == NO_TRANSACTIONS:
+            return []
+        raise EtherscanError(f"{data.get('message')}: {data.get('result')}")
+
+    async def latest_block(self, client: httpx.AsyncClient) -> int:
+        """
+        Get the number of the most recent block.
+
+        :raises EtherscanError: If Etherscan reports an error
+        """
+        data = await self.request(client, {"module": "proxy", "action": "eth_blockNumber"})
+        try:
+            return int(data["result"], 16)
+        except (KeyError, TypeError, ValueError):
+            raise EtherscanError(f"Unexpected block number response: {data}")
+
+    async def block_by_time(self, client: httpx.AsyncClient, timestamp: int) -> int:
+        """
+        Get the number of the first block at or after a timestamp.
+
+        :raises EtherscanError: If Etherscan reports an error
+        """
+        data = await self.request(client, {
+            "module": "block",
+            "action": "getblocknobytime",
+            "timestamp": timestamp,
+            "closest": "after"
+        })
+        if data.get("status") != "1":
+            raise EtherscanError(f"{data.get('message')}: {data.get('result')}")
+        return int(data["result"])
+
+    async def fetch_transactions(
+        self,
+        address: str,
+        start_block: int = 0,
+        end_block: int = LATEST_BLOCK,
+        sort: str = "desc",
+        client: Optional[httpx.AsyncClient] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Fetch all normal transactions of an address in a block range.
+
+        Histories longer than one query are split into block windows fetched concurrently; the results are
+        merged, deduplicated and sorted by block.
+
+        :param address: Ethereum address
+        :param start_block: Starting block number
+        :param end_block: Ending block number (LATEST_BLOCK for the most recent block)
+        :param sort: Sort order ('asc' or 'desc')
+        :param client: Optional HTTP client to use; by default one is created for this fetch
+        :return: List of transactions
+        :raises EtherscanError: If Etherscan reports an error
+        :raises httpx.HTTPError: If a request fails
+        """
+        if client is None:
+            async with self.client() as client:
+                return await self.fetch_transactions(address, start_block, end_block, sort, client)
+
+        if end_block >= LATEST_BLOCK:
+            end_block = await self.latest_block(client)
+
+        async def query(query_address, low, high):
+            return await self.query_transactions(client, query_address, low, high)
+
+        fetcher = TransactionFetcher(query, concurrency=self.concurrency)
+        batches = await fetcher.fetch(address, start_block, end_block)
+        transactions = merge_transactions(batches, sort)
+        logger.info(f"Fetched {len(transactions)} transactions for {address} with {fetcher.queries} queries.")
+        return transactions
+
     def get_transactions(
         self,
         address: str,
         start_block: int = 0,
-        end_block: int = 99999999,
+        end_block: int = LATEST_BLOCK,
         sort: str = "desc"
     ) -> List[Dict[str, Any]]:
         """
         Get normal transactions for an address.
-        
+
         :param address: Ethereum address
         :param start_block: Starting block number
         :param end_block: Ending block number
@@ -48,31 +211,34 @@ class EtherscanAPI:
         :return: List of transactions
         """
         try:
-            params = {
-                "module": "account",
-                "action": "txlist",
-                "address": address,
-                "startblock": start_block,
-                "endblock": end_block,
-                "sort": sort,
-                "apikey": self.api_key
-            }
-            
-            response = requests.get(self.base_url, params=params)
-            response.raise_for_status()
-            
-            data = response.json()
-            
-            if data["status"] == "1" and data["message"] == "OK":
-                return data["result"]
-            else:
-                logger.error(f"API Error: {data['message']}")
-                return []
-        
+            return asyncio.run(self.fetch_transactions(address, start_block, end_block, sort))
+
         except Exception as e:
             logger.error(f"Error fetching transactions: {str(e)}", exc_info=True)
             return []
-    
+
+    async def fetch_recent_transactions(self, address: str, days: int = 30,
+                                        sort: str = "desc") -> List[Dict[str, Any]]:
+        """
+        Fetch all normal transactions of an address within the last N days.
+
+        The block range is resolved by the block clock, usually from its cache; transactions from the
+        blocks it covers before the window are dropped, so exactly the transactions of the window are returned.
+
+        :param address: Ethereum address
+        :param days: Number of days to look back
+        :param sort: Sort order ('asc' or 'desc')
+        :return: List of transactions
+        :raises EtherscanError: If Etherscan reports an error
+        :raises httpx.HTTPError: If a request fails
+        """
+        start_time = int(self.clock.now() - days * 24 * 60 * 60)
+        async with self.client() as client:
+            start_block, end_block = await self.clock.block_range(
+                start_time, lambda timestamp: self.block_by_time(client, timestamp))
+            transactions = await self.fetch_transactions(address, start_block, end_block, sort, client)
+        return [t for t in transactions if int(t["timeStamp"]) >= start_time]
+
     def get_recent_transactions(
         self,
         address: str,
@@ -81,31 +247,15 @@ class EtherscanAPI:
     ) -> List[Dict[str, Any]]:
         """
         Get transactions for an address within the last N days.
-        
+
         :param address: Ethereum address
         :param days: Number of days to look back
         :param sort: Sort order ('asc' or 'desc')
         :return: List of transactions
         """
         try:
-            # Get current block number
-            current_block_params = {
-                "module": "proxy",
-                "action": "eth_blockNumber",
-                "apikey": self.api_key
-            }
-            
-            response = requests.get(self.base_url, params=current_block_params)
-            response.raise_for_status()
-            
-            current_block = int(response.json()["result"], 16)
-            
-            # Estimate start block (assuming ~15 second block time)
-            blocks_per_day = 24 * 60 * 60 // 15  # blocks per day
-            start_block = current_block - (blocks_per_day * days)
-            
-            return self.get_transactions(address, start_block, current_block, sort)
-        
+            return asyncio.run(self.fetch_recent_transactions(address, days, sort))
+
         except Exception as e:
             logger.error(f"Error fetching recent transactions: {str(e)}", exc_info=True)
             return []
@@ -0,0 +1,409 @@
+"""
+etherscan_stub.py
+
+This module provides a local stand-in for the parts of the Etherscan API used by ``EtherscanAPI``: the
+``txlist`` endpoint, with its block range filters, paging and 10000-record result window,
+``eth_blockNumber`` and ``getblocknobytime``, on a chain with one block every 12 seconds. It serves synthetic
+transaction histories of any size or histories recorded from Etherscan into a fixture file. A fixed latency
+per request, a calls-per-second quota enforced like Etherscan's, and random or scripted 429 and 500 responses
+can be injected, so the throughput and resilience of the fetch path can be tested and benchmarked offline.
+``EtherscanAPI`` is pointed at the stand-in with its ``base_url`` or the ETHERSCAN_BASE_URL environment
+variable.
+
+Usage:
+    python -m src.api.etherscan_stub --address 0xabc --transactions 100000 --port 8545
+    python -m src.api.etherscan_stub --record --address 0xabc --fixture history.json
+    python -m src.api.etherscan_stub --fixture history.json --error-rate 0.05 --throttle-rate 0.05
+
+Adheres to the Single Responsibility Principle (SRP) by focusing only on imitating the Etherscan API.
+"""
+
+import os
+import json
+import time
+import asyncio
+import random
+import argparse
+import threading
+from collections import deque, Counter
+from bisect import bisect_left, bisect_right
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+from ..utils.config import ETHERSCAN_MAX_RESULTS
+from ..utils.logger import get_logger
+
+# Initialize logger
+logger = get_logger(__name__)
+
+# Block and timestamp the synthetic histories start at
+FIRST_BLOCK = 15000000
+FIRST_TIMESTAMP = 1663224162
+BLOCK_TIME = 12  # seconds
+
+# Status of injected faults: HTTP 429 (rate limited) and HTTP 500 (server error)
+THROTTLE = 429
+ERROR = 500
+
+# Body Etherscan answers with when the calls-per-second quota is exceeded
+RATE_LIMITED = {"status": "0", "message": "NOTOK", "result": "Max calls per sec rate limit reached (5/sec)"}
+
+
+def synthetic_history(address: str, n_transactions: int, blocks: int = 1000000, seed: int = 0):
+    """
+    Generate a transaction history for an address, oldest first.
+
+    :param address: Ethereum address the transactions are sent from or to.
+    :param n_transactions: Number of transactions.
+    :param blocks: Number of blocks the history is spread over.
+    :param seed: Seed for the random number generator.
+    :return: List of transaction records shaped like txlist results
+    """
+    rng = random.Random(seed)
+    numbers = sorted(FIRST_BLOCK + rng.randrange(blocks) for _ in range(n_transactions))
+    history = []
+    index_in_block = 0
+    for i, number in enumerate(numbers):
+        index_in_block = index_in_block + 1 if i and numbers[i - 1] == number else 0
+        counterparty = f"0x{rng.getrandbits(160):040x}"
+        outgoing = rng.random() < 0.5
+        history.append({
+            "blockNumber": str(number),
+            "timeStamp": str(FIRST_TIMESTAMP + (number - FIRST_BLOCK) * BLOCK_TIME),
+            "hash": f"0x{rng.getrandbits(256):064x}",
+            "transactionIndex": str(index_in_block),
+            "from": address if outgoing else counterparty,
+            "to": counterparty if outgoing else address,
+            "value": str(rng.randrange(1, 10 ** 19)),
+            "gas": str(rng.choice([21000, 50000, 150000])),
+            "gasPrice": str(rng.randrange(1, 200) * 10 ** 9),
+            "isError": "0"
+        })
+    return history
+
+
+class EtherscanStub:
+    """
+    EtherscanStub serves transaction histories over HTTP in a background thread.
+    """
+
+    def __init__(self, histories=None, latest_block: int = None, latency: float = 0.0, rate_limit: float = None,
+                 throttle_status: int = 200, error_rate: float = 0.0, throttle_rate: float = 0.0,
+                 retry_after: float = 1, seed: int = 0):
+        """
+        Initializes the stand-in.
+
+        :param histories: Dictionary of address to its transactions, oldest first.
+        :param latest_block: Block number reported by eth_blockNumber; defaults to the last block of the
+                             histories.
+        :param latency: Seconds each request takes.
+        :param rate_limit: Calls allowed in any one-second window; further calls are rejected. None for no limit.
+        :param throttle_status: HTTP status of rejected calls: 200 with Etherscan's "Max calls per sec rate limit
+                                reached" body, or 429 with a Retry-After header.
+        :param error_rate: Share of requests answered with HTTP 500.
+        :param throttle_rate: Share of requests answered with HTTP 429, regardless of the quota.
+        :param retry_after: Seconds of the Retry-After header of 429 responses.
+        :param seed: Seed for the random number generator choosing the requests that fail.
+        """
+        self.histories = {}
+        self.blocks = {}
+        for address, history in (histories or {}).items():
+            self.add_history(address, history)
+        self._latest_block = latest_block
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.throttle_status = throttle_status
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.requests = 0
+        self.calls = Counter()
+        self.rejected = 0
+        self.injected = Counter()
+        self._recent = deque()
+        self._faults = deque()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+        self.base_url = None
+
+    @classmethod
+    def from_fixture(cls, path: str, **options):
+        """
+        Create a stand-in replaying the histories of a fixture file written by ``save_fixture``.
+
+        :param path: Path of the fixture file.
+        :param options: Further arguments of the stand-in, such as ``latency``.
+        """
+        fixture = load_fixture(path)
+        options.setdefault("latest_block", fixture.get("latest_block"))
+        return cls(fixture["histories"], **options)
+
+    def add_history(self, address: str, history):
+        """
+        Serve a transaction history (oldest first) for an address.
+        """
+        self.histories[address.lower()] = history
+        self.blocks[address.lower()] = [int(t["blockNumber"]) for t in history]
+
+    @property
+    def latest_block(self) -> int:
+        """Block number reported by eth_blockNumber."""
+        if self._latest_block is not None:
+            return self._latest_block
+        return max([blocks[-1] for blocks in self.blocks.values() if blocks], default=FIRST_BLOCK)
+
+    @latest_block.setter
+    def latest_block(self, number: int):
+        self._latest_block = number
+
+    def throttled(self) -> bool:
+        """
+        Count a call against the quota.
+
+        :return: True if the call exceeds the quota and must be rejected
+        """
+        if self.rate_limit is None:
+            return False
+        with self._lock:
+            now = time.monotonic()
+            while self._recent and self._recent[0] <= now - 1:
+                self._recent.popleft()
+            if len(self._recent) >= self.rate_limit:
+                self.rejected += 1
+                return True
+            self._recent.append(now)
+            return False
+
+    def inject(self, *faults: int):
+        """
+        Answer the next requests with the given faults, in order: THROTTLE (429) or ERROR (500).
+        """
+        with self._lock:
+            self._faults.extend(faults)
+
+    def fault(self):
+        """
+        Choose the fault, if any, the next request is answered with.
+
+        :return: THROTTLE, ERROR or None
+        """
+        with self._lock:
+            if self._faults:
+                fault = self._faults.popleft()
+            else:
+                draw = self._random.random()
+                fault = ERROR if draw < self.error_rate else \
+                    THROTTLE if draw < self.error_rate + self.throttle_rate else None
+            if fault is not None:
+                self.injected[fault] += 1
+            return fault
+
+    def respond(self, params):
+        """
+        Answer one HTTP request, rejecting it if it exceeds the quota or a fault is injected.
+
+        :param params: Dictionary of query parameters.
+        :return: Tuple of HTTP status, extra headers and JSON-serializable response body
+        """
+        throttled = self.throttled()
+        if throttled and self.throttle_status != THROTTLE:
+            return 200, {}, RATE_LIMITED
+        fault = THROTTLE if throttled else self.fault()
+        if fault == THROTTLE:
+            return THROTTLE, {"Retry-After": str(self.retry_after)}, {"status": "0", "message": "Too Many Requests"}
+        if fault == ERROR:
+            return ERROR, {}, {"status": "0", "message": "NOTOK", "result": "Internal server error"}
+        return 200, {}, self.handle(params)
+
+    def handle(self, params):
+        """
+        Answer one API request.
+
+        :param params: Dictionary of query parameters.
+        :return: JSON-serializable response body
+        """
+        module, action = params.get("module"), params.get("action")
+        with self._lock:
+            self.requests += 1
+            self.calls[action] += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if module == "proxy" and action == "eth_blockNumber":
+            return {"jsonrpc": "2.0", "id": 83, "result": hex(self.latest_block)}
+        if module == "block" and action == "getblocknobytime":
+            return self.block_by_time(params)
+        if module == "account" and action == "txlist":
+            return self.txlist(params)
+        return {"status": "0", "message": "NOTOK", "result": "Error! Missing Or invalid Module name"}
+
+    def txlist(self, params):
+        """
+        Answer a txlist request with Etherscan's filtering, sorting and paging rules.
+        """
+        address = params.get("address", "").lower()
+        history = self.histories.get(address, [])
+        blocks = self.blocks.get(address, [])
+        start_block = int(params.get("startblock", 0))
+        end_block = int(params.get("endblock", 99999999))
+        page = int(params.get("page", 1))
+        offset = int(params.get("offset", 0)) or ETHERSCAN_MAX_RESULTS
+        if page * offset > ETHERSCAN_MAX_RESULTS:
+            return {"status": "0", "message": "NOTOK",
+                    "result": "Result window is too large, PageNo x Offset size must be less than or equal "
+                              "to 10000"}
+
+        selected = history[bisect_left(blocks, start_block):bisect_right(blocks, end_block)]
+        if params.get("sort", "asc") == "desc":
+            selected = selected[::-1]
+        selected = selected[(page - 1) * offset:page * offset]
+        if not selected:
+            return {"status": "0", "message": "No transactions found", "result": []}
+        return {"status": "1", "message": "OK", "result": selected}
+
+    def block_by_time(self, params):
+        """
+        Answer a getblocknobytime request: the last block before or the first block after a timestamp.
+        """
+        offset = int(params.get("timestamp", 0)) - FIRST_TIMESTAMP
+        if params.get("closest", "before") == "after":
+            number = FIRST_BLOCK + max(0, -(-offset // BLOCK_TIME))
+        else:
+            number = FIRST_BLOCK + offset // BLOCK_TIME
+        if not FIRST_BLOCK <= number <= self.latest_block:
+            return {"status": "0", "message": "NOTOK", "result": "Error! No closest block found"}
+        return {"status": "1", "message": "OK", "result": str(number)}
+
+    def start(self, port: int = 0) -> str:
+        """
+        Start serving on a local port.
+
+        :param port: Port to listen on (0 picks a free port).
+        :return: Base URL to pass to EtherscanAPI
+        """
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                query = parse_qs(urlparse(self.path).query)
+                status, headers, body = stub.respond({key: values[-1] for key, values in query.items()})
+                body = json.dumps(body).encode()
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        self.base_url = f"http://127.0.0.1:{self._server.server_address[1]}/api"
+        return self.base_url
+
+    def stop(self):
+        """
+        Stop serving.
+        """
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+        return False
+
+
+def save_fixture(path: str, histories, latest_block: int = None):
+    """
+    Write transaction histories to a fixture file for ``EtherscanStub.from_fixture``.
+
+    :param path: Path of the fixture file.
+    :param histories: Dictionary of address to its transactions, oldest first.
+    :param latest_block: Block number the stand-in reports as the newest.
+    """
+    with open(path, "w") as f:
+        json.dump({"latest_block": latest_block, "histories": histories}, f)
+
+
+def load_fixture(path: str):
+    """
+    Read a fixture file written by ``save_fixture``.
+
+    :return: Dictionary with the "histories" and "latest_block" of the fixture
+    """
+    with open(path) as f:
+        return json.load(f)
+
+
+def record_fixture(path: str, addresses, api):
+    """
+    Record the histories of addresses from Etherscan (or another stand-in) into a fixture file.
+
+    :param path: Path of the fixture file.
+    :param addresses: Addresses whose full histories are recorded.
+    :param api: EtherscanAPI to fetch with.
+    :return: Dictionary of address to its recorded transactions
+    """
+    async def fetch():
+        async with api.client() as client:
+            latest_block = await api.latest_block(client)
+            histories = {}
+            for address in addresses:
+                histories[address.lower()] = await api.fetch_transactions(address, 0, latest_block, "asc", client)
+            return histories, latest_block
+
+    histories, latest_block = asyncio.run(fetch())
+    save_fixture(path, histories, latest_block)
+    logger.info(f"Recorded {sum(map(len, histories.values()))} transactions of {len(histories)} addresses "
+                f"to {path}")
+    return histories
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Serve synthetic Etherscan transaction histories locally')
+    parser.add_argument('--address', nargs='+', default=['0x' + '0' * 39 + '1'],
+                        help='Addresses with a synthetic history, or whose history is recorded')
+    parser.add_argument('--transactions', type=int, default=100000, help='Transactions in each synthetic history')
+    parser.add_argument('--fixture', help='Fixture file to replay, or to record to with --record')
+    parser.add_argument('--record', action='store_true',
+                        help='Record the histories of the addresses from Etherscan (ETHERSCAN_API_KEY) and exit')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds each request takes')
+    parser.add_argument('--rate-limit', type=float, default=None, help='Calls allowed per second')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Share of requests answered with 500')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='Share of requests answered with 429')
+    parser.add_argument('--port', type=int, default=8545, help='Port to listen on')
+    args = parser.parse_args()
+
+    if args.record:
+        from .etherscan_api import EtherscanAPI
+        if not args.fixture:
+            parser.error("--record requires --fixture")
+        record_fixture(args.fixture, args.address, EtherscanAPI(os.getenv("ETHERSCAN_API_KEY")))
+        raise SystemExit(0)
+
+    options = dict(latency=args.latency, rate_limit=args.rate_limit, error_rate=args.error_rate,
+                   throttle_rate=args.throttle_rate)
+    if args.fixture:
+        stub = EtherscanStub.from_fixture(args.fixture, **options)
+    else:
+        stub = EtherscanStub({address: synthetic_history(address, args.transactions, seed=i)
+                              for i, address in enumerate(args.address)}, **options)
+    logger.info(f"Serving {sum(map(len, stub.histories.values()))} transactions of {len(stub.histories)} "
+                f"addresses at {stub.start(args.port)}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        stub.stop()
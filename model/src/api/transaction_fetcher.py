@@ -0,0 +1,129 @@
+"""
+transaction_fetcher.py
+
+This module fetches the complete transaction history of an address from the Etherscan ``txlist`` endpoint,
+which returns at most 10000 records per query. The history is first requested in one query; when that query
+is truncated, the rest of the block range is split into windows that are fetched concurrently, and each window
+that is truncated in turn is split again. The windows are merged, deduplicated and sorted in block order.
+
+Adheres to the Single Responsibility Principle (SRP) by focusing only on splitting and merging history fetches.
+"""
+
+import math
+import asyncio
+from typing import List, Dict, Any, Callable, Awaitable
+
+from ..utils.config import ETHERSCAN_CONCURRENCY, ETHERSCAN_MAX_RESULTS
+from ..utils.logger import get_logger
+
+# Initialize logger
+logger = get_logger(__name__)
+
+# Share of the result limit a window is sized for, leaving room for uneven activity
+WINDOW_FILL = 0.8
+
+
+def block_number(transaction: Dict[str, Any]) -> int:
+    """Block number of a transaction record."""
+    return int(transaction["blockNumber"])
+
+
+def merge_transactions(batches: List[List[Dict[str, Any]]], sort: str = "asc") -> List[Dict[str, Any]]:
+    """
+    Merge batches of transactions, dropping duplicates, in block order.
+
+    :param batches: Lists of transactions, e.g. one per block window
+    :param sort: 'asc' for oldest first or 'desc' for newest first
+    :return: List of unique transactions
+    """
+    unique = {}
+    for batch in batches:
+        for transaction in batch:
+            unique.setdefault(transaction["hash"], transaction)
+    return sorted(unique.values(),
+                  key=lambda t: (block_number(t), int(t.get("transactionIndex") or 0)),
+                  reverse=(sort == "desc"))
+
+
+class TransactionFetcher:
+    """
+    TransactionFetcher splits the history of an address into block windows small enough for one query each.
+
+    Queries run concurrently, at most ``concurrency`` at a time. Must be created and used within one event
+    loop.
+    """
+
+    def __init__(self, query: Callable[..., Awaitable[List[Dict[str, Any]]]],
+                 concurrency: int = ETHERSCAN_CONCURRENCY, max_results: int = ETHERSCAN_MAX_RESULTS):
+        """
+        Initializes the fetcher.
+
+        :param query: Coroutine function ``query(address, start_block, end_block)`` returning the transactions
+                      of the address in that block range (inclusive), oldest first, at most ``max_results``.
+        :param concurrency: Maximum number of queries in flight.
+        :param max_results: Number of records at which a query is considered truncated.
+        """
+        self.query = query
+        self.concurrency = concurrency
+        self.max_results = max_results
+        self.queries = 0
+        self._slots = asyncio.Semaphore(concurrency)
+
+    async def fetch(self, address: str, start_block: int, end_block: int) -> List[List[Dict[str, Any]]]:
+        """
+        Fetch all transactions of an address in a block range.
+
+        :param address: Ethereum address
+        :param start_block: First block of the range
+        :param end_block: Last block of the range
+        :return: List of transaction batches, to be combined with ``merge_transactions``
+        """
+        batch, rest = await self._query_window(address, start_block, end_block)
+        if rest is None:
+            return [batch]
+
+        # The history is larger than one query: fetch the rest of the range in concurrent windows, sized
+        # from the density of the first result so that most of them fit in one query
+        start, end = rest
+        first = min(block_number(t) for t in batch) if batch else start
+        expected = self.max_results / max(1, start - first) * (end - start + 1)
+        n_windows = max(self.concurrency, math.ceil(expected / (WINDOW_FILL * self.max_results)))
+        width = max(1, -(-(end - start + 1) // n_windows))
+        windows = [(low, min(low + width - 1, end)) for low in range(start, end + 1, width)]
+        batches = await asyncio.gather(*[self._fetch_window(address, low, high) for low, high in windows])
+        return [batch] + [window_batch for window in batches for window_batch in window]
+
+    async def _fetch_window(self, address: str, start_block: int, end_block: int) -> List[List[Dict[str, Any]]]:
+        """
+        Fetch one block window, splitting what a truncated query left over into two halves.
+        """
+        batch, rest = await self._query_window(address, start_block, end_block)
+        if rest is None:
+            return [batch]
+        start, end = rest
+        middle = (start + end) // 2
+        halves = [(start, middle)] + ([(middle + 1, end)] if middle < end else [])
+        results = await asyncio.gather(*[self._fetch_window(address, low, high) for low, high in halves])
+        return [batch] + [half_batch for half in results for half_batch in half]
+
+    async def _query_window(self, address: str, start_block: int, end_block: int):
+        """
+        Run one query for a block window.
+
+        :return: Tuple of the complete part of the result and the (start, end) block range still to fetch,
+                 or None if the query was not truncated
+        """
+        async with self._slots:
+            self.queries += 1
+            transactions = await self.query(address, start_block, end_block)
+        if len(transactions) < self.max_results:
+            return transactions, None
+
+        # A truncated result is complete up to its last block, which may only be partly included
+        last_block = max(block_number(t) for t in transactions)
+        if last_block == start_block:
+            logger.warning(f"Block {start_block} alone has more than {self.max_results} transactions for "
+                           f"{address}; keeping the first {self.max_results}.")
+            return transactions, None
+        complete = [t for t in transactions if block_number(t) < last_block]
+        return complete, (last_block, end_block)
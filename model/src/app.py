@@ -5,16 +5,34 @@ This module provides a FastAPI interface for the blockchain anomaly detection sy
 It exposes endpoints for model training and anomaly detection.
 """
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, ValidationError
 from typing import List, Optional, Dict, Any
 import os
 import json
+import asyncio
 from datetime import datetime
 
-from .main import train_model, detect_anomalies, setup_environment
+from .main import detect_anomalies, detect_anomalies_batches, detect_anomalies_frame, setup_environment
+from .bulk_training import train_many, normalize_jobs
+from .detection_pool import BoundedExecutor, ExecutorSaturated
+from .request_coalescer import RequestCoalescer
+from .training_jobs import TrainingJobManager
+from .alert_hub import alert_hub
+from .warmup import WarmupStatus, warm_up_worker
+from .metrics import metrics
+from .anomaly_detection.model_registry import model_registry
+from .anomaly_detection.isolation_forest import build_results
+from .anomaly_detection.compiled_forest import NonFiniteFeatures
+from .anomaly_detection.result_cache import result_cache
+from .anomaly_detection.model_bundle import model_exists, model_files
+from .data_processing import columnar_io
+from .utils.config import (DETECT_RETRY_AFTER, DETECT_COALESCE, COALESCE_MAX_BODY_BYTES,
+                           DETECT_STREAM_CHUNK_SIZE, DETECT_STREAM_READ_AHEAD, DETECT_STREAM_MAX_LINE_BYTES,
+                           WARMUP_ENABLED)
+from .utils.serialization import dumps
 from .utils.logger import get_logger
 
 # Initialize logger
@@ -36,6 +54,29 @@ app.add_middleware(
     allow_headers=["*"],  # Allows all headers
 )
 
+class InFlightMiddleware:
+    """
+    ASGI middleware counting the requests in flight per endpoint, including the time spent streaming the
+    response. Paths with parameters are counted under "other" to keep the number of series bounded.
+    """
+    def __init__(self, app):
+        self.app = app
+        self.paths = None
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        if self.paths is None:
+            self.paths = {route.path for route in scope["app"].routes if "{" not in route.path}
+        endpoint = scope["path"] if scope["path"] in self.paths else "other"
+        metrics.add_gauge("requests_in_flight", 1, endpoint=endpoint)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            metrics.add_gauge("requests_in_flight", -1, endpoint=endpoint)
+
+app.add_middleware(InFlightMiddleware)
+
 class Transaction(BaseModel):
     """Pydantic model for a blockchain transaction."""
     hash: str
@@ -63,8 +104,19 @@ class TrainingResponse(BaseModel):
     """Pydantic model for training response."""
     status: str
     message: str
+    job_id: Optional[str] = None
     timestamp: datetime = Field(default_factory=datetime.now)
 
+class BulkTrainingJob(BaseModel):
+    """Pydantic model for one address of a bulk training request."""
+    address: str
+    transactions: Optional[List[Transaction]] = None
+
+class BulkTrainingRequest(BaseModel):
+    """Pydantic model for a bulk training request."""
+    jobs: List[BulkTrainingJob]
+    max_workers: Optional[int] = Field(None, ge=1)
+
 class AnomalyDetectionResponse(BaseModel):
     """Pydantic model for anomaly detection response."""
     results: List[Dict[str, Any]]
@@ -72,13 +124,312 @@ class AnomalyDetectionResponse(BaseModel):
     total_transactions: int
     anomalous_transactions: int
 
-def background_train(transactions: List[dict] = None):
-    """Background task for model training."""
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse encoding its content with orjson. NumPy types are encoded natively and NaN becomes null.
+    """
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+class BodyStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse for endpoints that keep reading the request body while the response is sent.
+    
+    Starlette's StreamingResponse listens for client disconnects by calling receive(), which would swallow
+    the remaining body messages; here a disconnect surfaces through request.stream() instead.
+    """
+    async def __call__(self, scope, receive, send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+# Detection runs on a bounded pool of worker processes so it never blocks the event loop; each worker warms up
+# its models before taking its first call
+detection_pool = BoundedExecutor(initializer=warm_up_worker if WARMUP_ENABLED else None)
+
+def resolve_model_path(address: Optional[str]) -> str:
+    """Return the model directory for an address, rejecting invalid addresses with a 400."""
     try:
-        train_model(transactions)
-        logger.info("Model training completed successfully")
+        return model_registry.model_path(address)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def detection_response(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Build the AnomalyDetectionResponse document for detection results.
+    
+    The results are produced by the pipeline itself, so they are not validated again by the response model.
+    """
+    return {
+        "results": results,
+        "timestamp": datetime.now(),
+        "total_transactions": len(results),
+        "anomalous_transactions": sum(1 for r in results if r['is_anomaly'])
+    }
+
+def anomalous(results: List[dict], collect_alerts: bool) -> List[dict]:
+    """The anomalous results to publish as alerts, or none if nobody subscribed to them."""
+    return [result for result in results if result['is_anomaly']] if collect_alerts else []
+
+def run_detection(body: bytes, address: Optional[str] = None,
+                  top_k: Optional[int] = None, collect_alerts: bool = False) -> tuple:
+    """
+    Parse the request body, run detection and render the JSON response. Called on a detection worker,
+    so that none of the per-transaction work runs on the event loop.
+    
+    Returns:
+        tuple: HTTP status code, JSON response body and the anomalous results if ``collect_alerts`` is set
+    """
+    try:
+        transactions = TransactionList.model_validate_json(body)
+    except ValidationError as e:
+        # Same shape as FastAPI's own request validation errors
+        return 422, json.dumps({"detail": json.loads(e.json(include_url=False))}).encode(), []
+    trans_list = transactions.model_dump()["transactions"]
+    
+    # Detect anomalies
+    try:
+        results = detect_anomalies(trans_list, address=address, top_k=top_k, cache=result_cache)
+    except NonFiniteFeatures as e:
+        return 422, dumps({"detail": str(e)}), []
+    
+    # Rendered here rather than by FastAPI, which would serialize on the event loop
+    return 200, dumps(detection_response(results)), anomalous(results, collect_alerts)
+
+def run_columnar_detection(body: bytes, fmt: str, address: Optional[str] = None,
+                           top_k: Optional[int] = None, collect_alerts: bool = False) -> tuple:
+    """
+    Decode an Arrow or Parquet request body, run detection and encode the result table in the same format.
+    Called on a detection worker.
+    
+    Returns:
+        tuple: HTTP status code, response body, media type and the anomalous results if ``collect_alerts``
+        is set
+    """
+    try:
+        df = columnar_io.to_frame(columnar_io.read_table(body, fmt))
+    except ValueError as e:
+        return 422, dumps({"detail": str(e)}), "application/json", []
+    
+    try:
+        columns = detect_anomalies_frame(df, address=address, top_k=top_k)
+    except NonFiniteFeatures as e:
+        return 422, dumps({"detail": str(e)}), "application/json", []
+    content = columnar_io.write_table(columnar_io.results_table(columns), fmt=fmt)
+    alerts = anomalous(build_results(columns), True) if collect_alerts and columns['is_anomaly'].any() else []
+    return 200, content, columnar_io.FORMATS[fmt], alerts
+
+def run_detection_batches(batches: List[List[dict]], address: Optional[str] = None) -> List[tuple]:
+    """
+    Run detection for a micro-batch of coalesced requests. Called on a detection worker.
+    
+    Returns:
+        list: One (HTTP status code, results or error message) tuple per request
+    """
+    try:
+        return [(200, results) for results in detect_anomalies_batches(batches, address=address)]
+    except Exception:
+        # Fall back to one call per request, so a bad request only fails itself
+        outcomes = []
+        for batch in batches:
+            try:
+                outcomes.append((200, detect_anomalies(batch, address=address)))
+            except NonFiniteFeatures as e:
+                outcomes.append((422, str(e)))
+            except Exception as e:
+                outcomes.append((500, str(e)))
+        return outcomes
+
+# Optional micro-batching of small detection requests
+detection_coalescer = RequestCoalescer(detection_pool, run_detection_batches) if DETECT_COALESCE else None
+
+async def coalesced_detection(body: bytes, address: Optional[str]) -> Response:
+    """Validate a small request on the event loop and let the coalescer batch its detection."""
+    try:
+        transactions = TransactionList.model_validate_json(body)
+    except ValidationError as e:
+        return JSONResponse(status_code=422, content={"detail": json.loads(e.json(include_url=False))})
+    trans_list = transactions.model_dump()["transactions"]
+    
+    status_code, outcome = await detection_coalescer.submit(trans_list, len(trans_list), key=address)
+    if status_code != 200:
+        raise HTTPException(status_code=status_code, detail=outcome)
+    
+    alert_hub.publish(address, outcome)
+    return FastJSONResponse(content=detection_response(outcome))
+
+def run_detection_chunk(lines: List[bytes], first_line: int, address: Optional[str] = None,
+                        collect_alerts: bool = False) -> tuple:
+    """
+    Validate and analyze one chunk of NDJSON transaction lines and render the results as NDJSON.
+    Called on a detection worker.
+    
+    Invalid lines, and chunks that fail as a whole, produce an error record instead of results.
+    
+    Returns:
+        tuple: One JSON document per line, and the anomalous results if ``collect_alerts`` is set
+    """
+    results = []
+    records = []
+    trans_list = []
+    for number, line in enumerate(lines, start=first_line):
+        try:
+            trans_list.append(Transaction.model_validate_json(line).model_dump())
+        except ValidationError as e:
+            records.append({"line": number, "error": json.loads(e.json(include_url=False))})
+    
+    if trans_list:
+        try:
+            results = detect_anomalies(trans_list, address=address, cache=result_cache)
+            records.extend(results)
+        except Exception as e:
+            logger.error(f"Error during streaming detection: {str(e)}", exc_info=True)
+            records.append({"lines": [first_line, first_line + len(lines) - 1], "error": str(e)})
+    
+    return b"".join(dumps(record) + b"\n" for record in records), anomalous(results, collect_alerts)
+
+class LineTooLong(ValueError):
+    """Raised when an NDJSON line exceeds DETECT_STREAM_MAX_LINE_BYTES."""
+    
+    def __init__(self, line_number: int):
+        super().__init__(f"Line {line_number} is longer than {DETECT_STREAM_MAX_LINE_BYTES} bytes")
+        self.line_number = line_number
+
+async def read_ndjson_chunks(request: Request, chunk_size: int,
+                             max_line_bytes: int = DETECT_STREAM_MAX_LINE_BYTES):
+    """
+    Read an NDJSON request body incrementally and yield it in chunks of at most ``chunk_size`` lines.
+    
+    The pieces of an unfinished line are kept apart and joined once, when its newline arrives, so a long line
+    is not copied again for every piece of the body.
+    
+    Yields:
+        tuple: Line number of the first line in the chunk (1-based) and the list of non-empty lines
+    Raises:
+        LineTooLong: If a line is longer than ``max_line_bytes``
+    """
+    pending = []
+    pending_size = 0
+    lines = []
+    line_number = 0
+    first_line = 1
+    async for data in request.stream():
+        *complete, rest = data.split(b"\n")
+        if complete and pending:
+            complete[0] = b"".join(pending) + complete[0]
+            pending = []
+            pending_size = 0
+        for line in complete:
+            line_number += 1
+            if len(line) > max_line_bytes:
+                raise LineTooLong(line_number)
+            if not line.strip():
+                continue
+            if not lines:
+                first_line = line_number
+            lines.append(line)
+            if len(lines) == chunk_size:
+                yield first_line, lines
+                lines = []
+        if rest:
+            pending.append(rest)
+            pending_size += len(rest)
+            if pending_size > max_line_bytes:
+                raise LineTooLong(line_number + 1)
+    if pending:
+        buffer = b"".join(pending)
+        if buffer.strip():
+            line_number += 1
+            if not lines:
+                first_line = line_number
+            lines.append(buffer)
+    if lines:
+        yield first_line, lines
+
+def read_ahead(chunks, max_chunks: int = DETECT_STREAM_READ_AHEAD):
+    """
+    Consume an async iterator of chunks in a background task and return an async iterator over them.
+    
+    At most ``max_chunks`` chunks wait for detection; once they are queued, reading the request body pauses
+    until detection catches up, so memory stays bounded whatever the size of the body. Clients must
+    therefore read the response while they send the request.
+    """
+    queue = asyncio.Queue(maxsize=max_chunks)
+    
+    async def pump():
+        try:
+            async for chunk in chunks:
+                await queue.put(chunk)
+        except Exception as e:
+            await queue.put(e)
+        else:
+            await queue.put(None)
+    
+    task = asyncio.ensure_future(pump())
+    
+    async def buffered():
+        try:
+            while True:
+                chunk = await queue.get()
+                if chunk is None:
+                    return
+                if isinstance(chunk, Exception):
+                    raise chunk
+                yield chunk
+        finally:
+            task.cancel()
+    
+    return buffered()
+
+async def run_detection_chunk_alerting(lines: List[bytes], first_line: int, address: Optional[str]) -> bytes:
+    """Run a chunk on the detection pool and publish its anomalies to the alert subscribers."""
+    content, alerts = await detection_pool.run(run_detection_chunk, lines, first_line, address,
+                                               alert_hub.has_subscribers(address))
+    alert_hub.publish(address, alerts)
+    return content
+
+async def run_detection_chunk_when_free(lines: List[bytes], first_line: int, address: Optional[str]) -> bytes:
+    """Run a chunk on the detection pool, waiting for a free slot instead of failing once streaming."""
+    while True:
+        try:
+            return await run_detection_chunk_alerting(lines, first_line, address)
+        except ExecutorSaturated:
+            await asyncio.sleep(DETECT_RETRY_AFTER)
+
+# Training requested through /train runs as jobs in separate processes. Nothing is reloaded here: the detection
+# workers' model caches compare the bundle on disk with the cached version on every lookup
+training_jobs = TrainingJobManager(on_success=model_registry.record_stored)
+
+# Startup warm-up, reported by /ready; without models to warm up it finishes immediately
+warmup = WarmupStatus(addresses=None if WARMUP_ENABLED else [])
+
+@app.on_event("startup")
+async def start_warmup():
+    """Warm up the models and detection workers in the background; /ready turns ready once done."""
+    warmup.start(detection_pool)
+
+# Progress of the current (or last) bulk training run
+bulk_training_status: Dict[str, Any] = {"status": "idle"}
+
+def background_train_many(jobs: List[tuple], max_workers: Optional[int] = None):
+    """Background task for bulk model training."""
+    def progress(result, completed, total):
+        bulk_training_status["completed"] = completed
+        bulk_training_status["results"].append(result)
+        if result["status"] == "success":
+            model_registry.record_stored(result["address"])
+        else:
+            bulk_training_status["failed"] += 1
+
+    try:
+        train_many(jobs, max_workers=max_workers, progress=progress)
+        logger.info("Bulk model training completed")
     except Exception as e:
-        logger.error(f"Error in background training: {str(e)}", exc_info=True)
+        logger.error(f"Error in bulk training: {str(e)}", exc_info=True)
+        bulk_training_status["error"] = str(e)
+    finally:
+        bulk_training_status["status"] = "finished"
+        bulk_training_status["finished_at"] = datetime.now().isoformat()
 
 @app.get("/", tags=["Root"])
 async def root():
@@ -88,89 +439,414 @@ async def root():
         "version": "1.0.0",
         "endpoints": {
             "POST /train": "Train the anomaly detection model",
+            "GET /train/{job_id}": "Check the status of a training job",
+            "DELETE /train/{job_id}": "Cancel a training job",
+            "POST /train/bulk": "Train models for many addresses in parallel",
+            "GET /train/bulk/status": "Check bulk training progress",
             "POST /detect": "Detect anomalies in transactions",
-            "GET /model/status": "Check model status"
+            "POST /detect/stream": "Detect anomalies in an NDJSON stream of transactions",
+            "POST /detect/columnar": "Detect anomalies in an Arrow or Parquet table of transactions",
+            "WS /alerts": "Live anomaly alerts for subscribed addresses",
+            "GET /model/status": "Check model status",
+            "GET /ready": "Readiness probe, ready once the startup warm-up has finished",
+            "GET /metrics": "Pipeline metrics in the Prometheus text format"
         }
     }
 
 @app.post("/train", response_model=TrainingResponse, tags=["Model Management"])
 async def train(
-    background_tasks: BackgroundTasks,
-    transactions: Optional[TransactionList] = None
+    transactions: Optional[TransactionList] = None,
+    address: Optional[str] = Query(None, description="Address (or tenant identifier) to train a model for")
 ):
     """
     Train the anomaly detection model.
     
     - If transactions are provided, uses them for training
     - If no transactions are provided, fetches data from Etherscan
-    - Training runs in the background
+    - If an address is given, the model is stored for that address only
+    - Training runs as a job in a separate process; its progress is reported by GET /train/{job_id}
+    - A request identical to a queued or running job returns that job instead of training again
     
     Returns:
-        TrainingResponse: Status of the training request
+        TrainingResponse: Status of the training request and the job ID
     """
     try:
+        resolve_model_path(address)
         trans_list = [t.dict() for t in transactions.transactions] if transactions else None
-        background_tasks.add_task(background_train, trans_list)
+        job, created = training_jobs.submit(address, trans_list)
         
         return TrainingResponse(
             status="success",
-            message="Model training started in background"
+            message=("Model training started in background" if created
+                     else "An identical training job is already queued or running"),
+            job_id=job["job_id"]
         )
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error initiating training: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/detect", response_model=AnomalyDetectionResponse, tags=["Anomaly Detection"])
-async def detect(transactions: TransactionList):
+@app.get("/train/{job_id}", tags=["Model Management"])
+async def train_status(job_id: str):
+    """
+    Report the status of a training job.
+    
+    Returns:
+        dict: Job status, timestamps and, once finished, the model version or error
+    """
+    job = training_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown training job: {job_id}")
+    return job
+
+@app.delete("/train/{job_id}", tags=["Model Management"])
+async def cancel_training(job_id: str):
+    """
+    Cancel a queued or running training job. The model is left as it was before the job.
+    
+    Returns:
+        dict: Status of the cancelled job
+    """
+    try:
+        job = training_jobs.cancel(job_id)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown training job: {job_id}")
+    return job
+
+@app.post("/train/bulk", response_model=TrainingResponse, tags=["Model Management"])
+async def train_bulk(request: BulkTrainingRequest, background_tasks: BackgroundTasks):
+    """
+    Train one model per address in parallel worker processes.
+    
+    - Addresses without transactions have their training data fetched from Etherscan
+    - A failure for one address does not affect the others
+    - Progress is reported by GET /train/bulk/status
+    
+    Returns:
+        TrainingResponse: Status of the training request
+    """
+    if bulk_training_status["status"] == "running":
+        raise HTTPException(status_code=409, detail="A bulk training run is already in progress.")
+    
+    try:
+        jobs = normalize_jobs([
+            (job.address, [t.dict() for t in job.transactions] if job.transactions else None)
+            for job in request.jobs
+        ])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    bulk_training_status.clear()
+    bulk_training_status.update({
+        "status": "running",
+        "total": len(jobs),
+        "completed": 0,
+        "failed": 0,
+        "results": [],
+        "started_at": datetime.now().isoformat()
+    })
+    background_tasks.add_task(background_train_many, jobs, request.max_workers)
+    
+    return TrainingResponse(
+        status="success",
+        message=f"Training of {len(jobs)} models started in background"
+    )
+
+@app.get("/train/bulk/status", tags=["Model Management"])
+async def train_bulk_status():
+    """
+    Report the progress of the current or last bulk training run.
+    
+    Returns:
+        dict: Bulk training progress and per-address results
+    """
+    return bulk_training_status
+
+@app.post(
+    "/detect",
+    response_model=AnomalyDetectionResponse,
+    tags=["Anomaly Detection"],
+    # The body is parsed on a detection worker, so its schema is declared here rather than in the signature
+    openapi_extra={"requestBody": {
+        "required": True,
+        "content": {"application/json": {"schema": {"$ref": "#/components/schemas/TransactionList"}}}
+    }}
+)
+async def detect(
+    request: Request,
+    address: Optional[str] = Query(None, description="Address (or tenant identifier) whose model is used"),
+    top_k: Optional[int] = Query(None, ge=1, description="Only return the K most anomalous transactions")
+):
     """
     Detect anomalies in provided transactions.
     
+    Every result carries an anomaly score (negative values are anomalies; the lower, the more abnormal).
+    A batch whose features are undefined, such as a single transaction or transactions that all have the
+    same value, cannot be scored and is rejected with 422.
+    Detection runs on a bounded worker pool; when it is saturated the request is rejected with 503 and
+    a Retry-After header. If micro-batching is enabled, small requests without top_k are processed
+    together with other small requests arriving within a few milliseconds.
+    
     Args:
-        transactions (TransactionList): List of transactions to analyze
+        request (Request): Request whose JSON body is a TransactionList of transactions to analyze
+        address (str, optional): Address whose model is used instead of the default model
+        top_k (int, optional): Only return the K most anomalous transactions, most anomalous first
     
     Returns:
         AnomalyDetectionResponse: Detection results for each transaction
     """
     try:
         # Check if model exists
-        if not os.path.exists('models/isolation_forest.joblib'):
+        if not model_exists(resolve_model_path(address)):
             raise HTTPException(
                 status_code=400,
                 detail="No trained model found. Please train the model first."
             )
         
-        # Convert Pydantic model to list of dicts
-        trans_list = [t.dict() for t in transactions.transactions]
+        body = await request.body()
+        if detection_coalescer is not None and top_k is None and len(body) <= COALESCE_MAX_BODY_BYTES:
+            return await coalesced_detection(body, address)
         
-        # Detect anomalies
-        results = detect_anomalies(trans_list)
-        
-        # Count anomalous transactions
-        anomalous = sum(1 for r in results if r['is_anomaly'])
-        
-        return AnomalyDetectionResponse(
-            results=results,
-            total_transactions=len(results),
-            anomalous_transactions=anomalous
-        )
+        status_code, content, alerts = await detection_pool.run(run_detection, body, address, top_k,
+                                                                alert_hub.has_subscribers(address))
+        alert_hub.publish(address, alerts)
+        return Response(content=content, status_code=status_code, media_type="application/json")
     
+    except ExecutorSaturated as e:
+        logger.warning(f"Rejecting detection request: {str(e)}")
+        raise HTTPException(
+            status_code=503,
+            detail="Server is busy. Please retry later.",
+            headers={"Retry-After": str(DETECT_RETRY_AFTER)}
+        )
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error during anomaly detection: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post(
+    "/detect/stream",
+    tags=["Anomaly Detection"],
+    response_class=StreamingResponse,
+    openapi_extra={"requestBody": {
+        "required": True,
+        "content": {"application/x-ndjson": {"schema": {"$ref": "#/components/schemas/Transaction"}}}
+    }}
+)
+async def detect_stream(
+    request: Request,
+    address: Optional[str] = Query(None, description="Address (or tenant identifier) whose model is used"),
+    chunk_size: int = Query(DETECT_STREAM_CHUNK_SIZE, ge=1, le=100000,
+                            description="Transactions processed per chunk")
+):
+    """
+    Detect anomalies in a stream of transactions.
+    
+    The request body is NDJSON with one transaction per line. Transactions are read incrementally and
+    analyzed in chunks of ``chunk_size``, each processed like a separate /detect batch. Results are
+    streamed back as NDJSON, one result per line, as soon as each chunk is done; invalid lines and failed
+    chunks produce a line with an "error" field instead. A line longer than DETECT_STREAM_MAX_LINE_BYTES
+    is answered with 413, or ends the stream with an error line if results were already sent.
+    
+    The body is read only a few chunks ahead of detection, so memory stays bounded: clients must read the
+    response while they send the request (a client that sends everything before reading will stall once
+    the network buffers fill up).
+    
+    Returns:
+        StreamingResponse: NDJSON detection results
+    """
+    if not model_exists(resolve_model_path(address)):
+        raise HTTPException(
+            status_code=400,
+            detail="No trained model found. Please train the model first."
+        )
+    
+    chunks = read_ahead(read_ndjson_chunks(request, chunk_size))
+    try:
+        first_line, lines = await chunks.__anext__()
+    except StopAsyncIteration:
+        return StreamingResponse(iter([]), media_type="application/x-ndjson")
+    except LineTooLong as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    
+    # The first chunk is scheduled before the response starts, so a saturated pool can still answer 503
+    try:
+        first_results = await run_detection_chunk_alerting(lines, first_line, address)
+    except ExecutorSaturated as e:
+        logger.warning(f"Rejecting streaming detection request: {str(e)}")
+        await chunks.aclose()
+        raise HTTPException(
+            status_code=503,
+            detail="Server is busy. Please retry later.",
+            headers={"Retry-After": str(DETECT_RETRY_AFTER)}
+        )
+    
+    async def results():
+        yield first_results
+        try:
+            async for first_line, lines in chunks:
+                yield await run_detection_chunk_when_free(lines, first_line, address)
+        except LineTooLong as e:
+            yield dumps({"line": e.line_number, "error": str(e)}) + b"\n"
+    
+    return BodyStreamingResponse(results(), media_type="application/x-ndjson")
+
+@app.post(
+    "/detect/columnar",
+    tags=["Anomaly Detection"],
+    response_class=Response,
+    openapi_extra={"requestBody": {
+        "required": True,
+        "content": {media_type: {"schema": {"type": "string", "format": "binary"}}
+                    for media_type in columnar_io.FORMATS.values()}
+    }}
+)
+async def detect_columnar(
+    request: Request,
+    fmt: str = Query("arrow", alias="format", pattern="^(arrow|parquet)$",
+                     description="Format of the request and response bodies"),
+    address: Optional[str] = Query(None, description="Address (or tenant identifier) whose model is used"),
+    top_k: Optional[int] = Query(None, ge=1, description="Only return the K most anomalous transactions")
+):
+    """
+    Detect anomalies in a table of transactions.
+    
+    The request body is an Arrow IPC stream (or file) or a Parquet file with one row per transaction and
+    the columns hash, timeStamp, value, gas and gasPrice. Columns go straight into the detection pipeline,
+    without a Python object per transaction, and the results are returned as a table in the same format
+    with the columns transaction_hash, is_anomaly, anomaly_score, anomaly_types (list of type and
+    severity), value, gas, gasPrice and timestamp. Detection runs on the same bounded worker pool as
+    /detect, and a table whose features are undefined is rejected with 422 in the same way.
+    
+    Returns:
+        Response: Result table in the requested format
+    """
+    try:
+        if not model_exists(resolve_model_path(address)):
+            raise HTTPException(
+                status_code=400,
+                detail="No trained model found. Please train the model first."
+            )
+        
+        body = await request.body()
+        status_code, content, media_type, alerts = await detection_pool.run(
+            run_columnar_detection, body, fmt, address, top_k, alert_hub.has_subscribers(address))
+        alert_hub.publish(address, alerts)
+        return Response(content=content, status_code=status_code, media_type=media_type)
+    
+    except ExecutorSaturated as e:
+        logger.warning(f"Rejecting columnar detection request: {str(e)}")
+        raise HTTPException(
+            status_code=503,
+            detail="Server is busy. Please retry later.",
+            headers={"Retry-After": str(DETECT_RETRY_AFTER)}
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error during columnar anomaly detection: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.websocket("/alerts")
+async def alerts(
+    websocket: WebSocket,
+    address: List[str] = Query([], description="Addresses to follow from the start")
+):
+    """
+    Push live anomaly alerts over a WebSocket.
+    
+    The client follows addresses (``default`` for the default model; Ethereum addresses in any case), either
+    with ``address`` query parameters (an invalid one closes the connection with code 1008) or by sending
+    {"action": "subscribe" | "unsubscribe", "addresses": [...]}; each such message is answered with
+    {"type": "subscribed", "addresses": [...]}. Every anomalous result of a detection run (/detect,
+    /detect/stream, /detect/columnar) for a followed address is then sent as {"type": "alert", "address":
+    ..., "result": {...}}. Alerts wait in a bounded buffer per connection; when a slow client falls behind,
+    the oldest alerts are dropped and a {"type": "dropped", "count": ..., "total": ...} message precedes the
+    next alerts sent.
+    """
+    await websocket.accept()
+    subscriber = alert_hub.connect()
+    try:
+        alert_hub.subscribe(subscriber, address)
+    except ValueError as e:
+        alert_hub.disconnect(subscriber)
+        await websocket.close(code=1008, reason=str(e))
+        return
+    
+    async def send_alerts():
+        try:
+            while True:
+                for message in await subscriber.next_messages():
+                    await websocket.send_text(message)
+        except (WebSocketDisconnect, RuntimeError):
+            # The client went away; the receive loop notices and cleans up
+            pass
+    
+    sender = asyncio.ensure_future(send_alerts())
+    try:
+        while True:
+            try:
+                request = await websocket.receive_json()
+                action = request["action"]
+                addresses = [str(item) for item in request["addresses"]]
+                if action == "subscribe":
+                    alert_hub.subscribe(subscriber, addresses)
+                elif action == "unsubscribe":
+                    alert_hub.unsubscribe(subscriber, addresses)
+                else:
+                    raise ValueError(f"Unknown action '{action}'")
+            except (ValueError, KeyError, TypeError) as e:
+                await websocket.send_json({"type": "error", "detail": f"Invalid subscription message: {e}"})
+                continue
+            await websocket.send_json({"type": "subscribed", "addresses": sorted(subscriber.addresses)})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        sender.cancel()
+        alert_hub.disconnect(subscriber)
+
+def result_cache_stats() -> Dict[str, Any]:
+    """Hit ratio of the detection result cache, summed over all detection workers."""
+    hits = metrics.value("result_cache_hits_total")
+    misses = metrics.value("result_cache_misses_total")
+    return {
+        "enabled": result_cache.enabled,
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": hits / (hits + misses) if hits + misses else 0.0
+    }
+
+def model_cache_stats() -> Dict[str, Any]:
+    """Model cache lookups summed over all detection workers, and the number of stored per-address models."""
+    metrics.sync_cache_stats()
+    hits = metrics.value("model_cache_hits_total")
+    misses = metrics.value("model_cache_misses_total")
+    return {
+        "stored_models": model_registry.stored_count(),
+        "hits": hits,
+        "misses": misses,
+        "loads": metrics.value("model_cache_loads_total"),
+        "evictions": metrics.value("model_cache_evictions_total"),
+        "hit_rate": hits / (hits + misses) if hits + misses else 0.0
+    }
+
 @app.get("/model/status", tags=["Model Management"])
-async def model_status():
+async def model_status(
+    address: Optional[str] = Query(None, description="Address (or tenant identifier) to report on")
+):
     """
     Check if a trained model exists and get its details.
     
     Returns:
         dict: Model status information
     """
-    model_path = 'models/isolation_forest.joblib'
-    if not os.path.exists(model_path):
+    files = model_files(resolve_model_path(address))
+    if not files:
         return JSONResponse(
             status_code=404,
             content={
@@ -180,14 +856,51 @@ async def model_status():
         )
     
     # Get model file details
-    stats = os.stat(model_path)
+    stats = [os.stat(f) for f in files]
     
     return {
         "status": "available",
-        "last_modified": datetime.fromtimestamp(stats.st_mtime).isoformat(),
-        "size_bytes": stats.st_size
+        "last_modified": datetime.fromtimestamp(max(s.st_mtime for s in stats)).isoformat(),
+        "size_bytes": sum(s.st_size for s in stats),
+        "manifest": model_registry.manifest(address),
+        "cache": model_cache_stats(),
+        "detection_pool": detection_pool.stats(),
+        "coalescer": detection_coalescer.stats() if detection_coalescer is not None else None,
+        "result_cache": result_cache_stats(),
+        "training_jobs": training_jobs.stats(),
+        "alerts": alert_hub.stats()
     }
 
+@app.get("/ready", tags=["Monitoring"])
+async def ready():
+    """
+    Readiness probe for load balancers.
+    
+    Returns 503 while the startup warm-up (model loading and a synthetic batch through the detection
+    pipeline on every worker) is running, and 200 once it has finished. The body reports the warm-up
+    state and its measured duration per stage; a failed warm-up still counts as finished and reports its
+    error.
+    
+    Returns:
+        JSONResponse: Warm-up progress
+    """
+    return FastJSONResponse(status_code=200 if warmup.ready else 503, content=warmup.report())
+
+@app.get("/metrics", response_class=PlainTextResponse, tags=["Monitoring"])
+async def metrics_endpoint():
+    """
+    Expose per-stage pipeline latencies, processed rows, coalesced batch sizes, model cache lookups and
+    requests in flight in the Prometheus text format. Work done in detection workers and training processes
+    is included once it has finished.
+    
+    Returns:
+        PlainTextResponse: Metrics page
+    """
+    pool = detection_pool.stats()
+    metrics.set_gauge("detection_queue_pending", pool["pending"])
+    metrics.set_gauge("detection_queue_rejected_total", pool["rejected"])
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 # Error handlers
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request, exc):
@@ -196,7 +909,8 @@ async def http_exception_handler(request, exc):
         content={
             "error": exc.detail,
             "timestamp": datetime.now().isoformat()
-        }
+        },
+        headers=getattr(exc, "headers", None)
     )
 
 @app.exception_handler(Exception)
@@ -0,0 +1,118 @@
+"""
+bulk_training.py
+
+This module retrains many per-address models at once. Each address runs the full training pipeline
+(fetch, cleaning, transformation, Isolation Forest training and atomic bundle write) in a worker process of a
+bounded process pool, so independent models train in parallel. A failure for one address is recorded in its
+result and never stops the others.
+
+Adheres to the Single Responsibility Principle (SRP) by focusing only on coordinating bulk model training.
+"""
+
+import os
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .main import train_model
+from .metrics import metrics, call_collecting
+from .anomaly_detection.model_registry import normalize_address
+from .utils.config import TRAINING_WORKERS, WORKER_START_METHOD
+from .utils.logger import get_logger
+
+# Initialize logger
+logger = get_logger(__name__)
+
+
+def normalize_jobs(jobs):
+    """
+    Turn the accepted job specifications into a list of (address, data) pairs.
+
+    :param jobs: List of addresses (data is fetched from Etherscan), list of (address, data) pairs, or
+                 dictionary mapping addresses to their training data (None to fetch)
+    :return: List of (address, data) tuples with validated addresses
+    :raises ValueError: If an address is invalid or listed twice
+    """
+    if isinstance(jobs, dict):
+        jobs = list(jobs.items())
+    pairs = []
+    seen = set()
+    for job in jobs:
+        address, data = (job, None) if isinstance(job, str) else job
+        address = normalize_address(address)
+        if address in seen:
+            raise ValueError(f"Address listed more than once: {address}")
+        seen.add(address)
+        pairs.append((address, data))
+    return pairs
+
+
+def _train_address(address, data=None):
+    """
+    Train and save the model of one address. Runs in a worker process.
+
+    :param address: Address (or tenant identifier) to train for
+    :param data: Optional training transactions (fetched from Etherscan when None)
+    :return: Result dictionary for the address
+    """
+    start = time.perf_counter()
+    try:
+        detector = train_model(data, address=address)
+        return {
+            'address': address,
+            'status': 'success',
+            'model_version': detector.manifest.get('model_version'),
+            'training_rows': detector.manifest.get('training_rows'),
+            'duration_seconds': time.perf_counter() - start
+        }
+    except Exception as e:
+        return {
+            'address': address,
+            'status': 'failed',
+            'error': str(e),
+            'duration_seconds': time.perf_counter() - start
+        }
+
+
+def train_many(jobs, max_workers=None, progress=None):
+    """
+    Train models for many addresses in parallel.
+
+    :param jobs: Addresses or (address, data) pairs, see ``normalize_jobs``
+    :param max_workers: Maximum number of concurrent training processes (default: TRAINING_WORKERS, capped by
+                        the number of CPUs)
+    :param progress: Optional callable ``progress(result, completed, total)`` invoked as each address finishes
+    :return: List of result dictionaries, in the order the jobs were given
+    """
+    pairs = normalize_jobs(jobs)
+    if not pairs:
+        return []
+
+    if max_workers is None:
+        max_workers = min(TRAINING_WORKERS, os.cpu_count() or 1)
+    max_workers = max(1, min(max_workers, len(pairs)))
+    logger.info(f"Training {len(pairs)} models with {max_workers} worker processes.")
+
+    results = {}
+    with ProcessPoolExecutor(max_workers=max_workers,
+                             mp_context=multiprocessing.get_context(WORKER_START_METHOD)) as executor:
+        futures = {executor.submit(call_collecting, _train_address, address, data): address
+                   for address, data in pairs}
+        for completed, future in enumerate(as_completed(futures), start=1):
+            address = futures[future]
+            try:
+                result, delta = future.result()
+                metrics.merge(delta)
+            except Exception as e:
+                # The worker process itself died (e.g. killed for running out of memory)
+                result = {'address': address, 'status': 'failed', 'error': str(e) or type(e).__name__}
+
+            results[address] = result
+            if result['status'] == 'success':
+                logger.info(f"[{completed}/{len(pairs)}] Trained model for {address}.")
+            else:
+                logger.error(f"[{completed}/{len(pairs)}] Training failed for {address}: {result['error']}")
+            if progress is not None:
+                progress(result, completed, len(pairs))
+
+    return [results[address] for address, _ in pairs]
@@ -0,0 +1,155 @@
+"""
+columnar_io.py
+
+This module reads transactions from and writes detection results to columnar formats: Apache Arrow IPC
+(stream or file) and Parquet. Transactions are loaded into a DataFrame column by column, so numeric columns
+feed the cleaning and feature pipeline without per-row Python objects, and results are written straight from
+the result columns of ``detect_anomalies_columnar`` without building per-transaction dictionaries.
+
+Adheres to the Single Responsibility Principle (SRP) by focusing only on columnar input and output.
+"""
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+from utils.logger import get_logger
+
+# Initialize logger
+logger = get_logger(__name__)
+
+# Supported formats and their media types
+FORMATS = {
+    'arrow': 'application/vnd.apache.arrow.stream',
+    'parquet': 'application/vnd.apache.parquet'
+}
+
+# Columns every transaction table must have
+REQUIRED_COLUMNS = ('hash', 'timeStamp', 'value', 'gas', 'gasPrice')
+
+# Schema of the result tables
+RESULT_SCHEMA = pa.schema([
+    ('transaction_hash', pa.string()),
+    ('is_anomaly', pa.bool_()),
+    ('anomaly_score', pa.float64()),
+    ('anomaly_types', pa.list_(pa.struct([('type', pa.string()), ('severity', pa.string())]))),
+    ('value', pa.float64()),
+    ('gas', pa.float64()),
+    ('gasPrice', pa.float64()),
+    ('timestamp', pa.string())
+])
+
+
+def _check_format(fmt):
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format '{fmt}', expected one of: {', '.join(FORMATS)}")
+
+
+def read_table(source, fmt='arrow'):
+    """
+    Read a transaction table.
+
+    :param source: Bytes of the encoded table, or a file path.
+    :param fmt: 'arrow' (IPC stream or file) or 'parquet'.
+    :return: pyarrow.Table with the transactions
+    :raises ValueError: If the data cannot be decoded or has no rows.
+    """
+    _check_format(fmt)
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = pa.BufferReader(source)
+    try:
+        if fmt == 'parquet':
+            table = pq.read_table(source)
+        else:
+            try:
+                table = ipc.open_stream(source).read_all()
+            except pa.ArrowInvalid:
+                if not isinstance(source, pa.BufferReader):
+                    raise
+                source.seek(0)
+                table = ipc.open_file(source).read_all()
+    except (pa.ArrowException, OSError) as e:
+        raise ValueError(f"Could not read {fmt} data: {str(e)}")
+
+    if table.num_rows == 0:
+        raise ValueError("No transactions found in input")
+    return table
+
+
+def to_frame(table):
+    """
+    Convert a transaction table to a DataFrame for the cleaning and feature pipeline.
+
+    :param table: pyarrow.Table with one row per transaction.
+    :return: DataFrame with the transaction columns
+    :raises ValueError: If required columns are missing or have unsupported types.
+    """
+    missing = [name for name in REQUIRED_COLUMNS if name not in table.column_names]
+    if missing:
+        raise ValueError(f"Missing required columns: {', '.join(missing)}")
+
+    for name in REQUIRED_COLUMNS:
+        column_type = table.schema.field(name).type
+        if pa.types.is_decimal(column_type):
+            # Wei amounts may not fit in 64-bit integers; decimals would become Python objects per row
+            table = table.set_column(table.schema.get_field_index(name), name,
+                                     table.column(name).cast(pa.float64()))
+        elif not (pa.types.is_integer(column_type) or pa.types.is_floating(column_type)
+                  or pa.types.is_string(column_type) or pa.types.is_large_string(column_type)):
+            raise ValueError(f"Column '{name}' has unsupported type {column_type}")
+
+    return table.to_pandas()
+
+
+def results_table(columns):
+    """
+    Build the result table from the output of ``detect_anomalies_columnar``.
+
+    Anomaly types are a list of (type, severity) pairs per transaction; detail strings are not included.
+
+    :param columns: Dictionary of result columns.
+    :return: pyarrow.Table with one row per transaction
+    """
+    n_rows = len(columns['anomaly_score'])
+    offsets, types, severities = columns['anomaly_types'].to_columns(n_rows)
+    anomaly_types = pa.ListArray.from_arrays(
+        pa.array(offsets, type=pa.int32()),
+        pa.StructArray.from_arrays([pa.array(types, type=pa.string()), pa.array(severities, type=pa.string())],
+                                   names=['type', 'severity'])
+    )
+    return pa.Table.from_arrays([
+        pa.array(columns['transaction_hash'], type=pa.string()),
+        pa.array(np.asarray(columns['is_anomaly'], dtype=bool)),
+        pa.array(np.asarray(columns['anomaly_score'], dtype=np.float64)),
+        anomaly_types,
+        pa.array(columns['value'], type=pa.float64()),
+        pa.array(columns['gas'], type=pa.float64()),
+        pa.array(columns['gasPrice'], type=pa.float64()),
+        pa.array(columns['timestamp'], type=pa.string())
+    ], schema=RESULT_SCHEMA)
+
+
+def write_table(table, destination=None, fmt='arrow'):
+    """
+    Encode a table.
+
+    :param table: pyarrow.Table to write.
+    :param destination: Output file path, or None to return the encoded bytes.
+    :param fmt: 'arrow' (IPC stream) or 'parquet'.
+    :return: Encoded bytes if no destination was given, otherwise None
+    """
+    _check_format(fmt)
+    sink = pa.BufferOutputStream() if destination is None else pa.OSFile(destination, 'wb')
+    try:
+        if fmt == 'parquet':
+            pq.write_table(table, sink)
+        else:
+            with ipc.new_stream(sink, table.schema) as writer:
+                writer.write_table(table)
+    finally:
+        if destination is not None:
+            sink.close()
+    if destination is None:
+        return sink.getvalue().to_pybytes()
+    logger.info(f"Wrote {table.num_rows} rows to {destination} as {fmt}.")
+    return None
@@ -33,20 +33,29 @@ class DataTransformer:
 
         :return: DataFrame with converted timestamps.
         """
-        self.df['timeStamp'] = pd.to_datetime(self.df['timeStamp'], unit='s', errors='coerce')
+        # Strings are converted to numbers first; parsing them with unit='s' loses sub-minute precision
+        timestamps = pd.to_numeric(self.df['timeStamp'], errors='coerce')
+        self.df['timeStamp'] = pd.to_datetime(timestamps, unit='s', errors='coerce')
         logger.info("Converted UNIX timestamps to human-readable datetime format.")
         return self.df
 
-    def normalize_column(self, column_name):
+    def normalize_column(self, column_name, group_column=None):
         """
         Normalizes the specified numeric column using min-max scaling.
 
         :param column_name: The name of the column to normalize.
+        :param group_column: Optional column identifying independent groups of rows; each group is
+                             scaled by its own minimum and maximum.
         :return: DataFrame with normalized column values.
         """
         if column_name in self.df.columns:
-            min_val = self.df[column_name].min()
-            max_val = self.df[column_name].max()
+            if group_column is not None:
+                grouped = self.df.groupby(group_column, sort=False)[column_name]
+                min_val = grouped.transform('min')
+                max_val = grouped.transform('max')
+            else:
+                min_val = self.df[column_name].min()
+                max_val = self.df[column_name].max()
             self.df[column_name] = (self.df[column_name] - min_val) / (max_val - min_val)
             logger.info(f"Normalized column '{column_name}' using min-max scaling.")
         else:
@@ -54,13 +63,15 @@ class DataTransformer:
             raise KeyError(f"Column '{column_name}' is missing.")
         return self.df
 
-    def transform_data(self):
+    def transform_data(self, group_column=None):
         """
         Applies all transformations: converts timestamps and normalizes numeric columns.
 
+        :param group_column: Optional column identifying independent groups of rows, which are normalized
+                             separately, as if each group were transformed on its own.
         :return: Fully transformed DataFrame.
         """
         self.convert_timestamp()
-        self.normalize_column('value')  # Example: Normalizing the 'value' column
+        self.normalize_column('value', group_column)  # Example: Normalizing the 'value' column
         logger.info("Data transformation process completed successfully.")
         return self.df
@@ -0,0 +1,192 @@
+"""
+transaction_store.py
+
+This module keeps a local, persistent copy of the transaction histories fetched from Etherscan in a SQLite
+database. Transactions are stored per address, clustered by block number, so the history of an address (or a
+block range of it) is read back with one indexed range query. The last block synced for each address is
+recorded, so a later sync only requests the blocks added since and appends them, and a history synced
+recently enough is not requested at all.
+
+Adheres to the Single Responsibility Principle (SRP) by focusing only on storing transaction histories.
+"""
+
+import os
+import time
+import sqlite3
+import asyncio
+from contextlib import contextmanager
+
+import orjson
+import pandas as pd
+from utils.logger import get_logger
+from utils.config import TRANSACTION_STORE_PATH, TRANSACTION_SYNC_INTERVAL
+
+# Initialize logger
+logger = get_logger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transactions (
+    address TEXT NOT NULL,
+    block_number INTEGER NOT NULL,
+    transaction_index INTEGER NOT NULL,
+    hash TEXT NOT NULL,
+    record BLOB NOT NULL,
+    PRIMARY KEY (address, block_number, transaction_index, hash)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS sync_state (
+    address TEXT PRIMARY KEY,
+    last_block INTEGER NOT NULL,
+    synced_at REAL NOT NULL
+);
+"""
+
+
+class TransactionStore:
+    """
+    TransactionStore holds the transaction histories of addresses in a SQLite database.
+
+    Each operation opens its own connection, so one store can be used from several threads and processes.
+    """
+
+    def __init__(self, path: str = TRANSACTION_STORE_PATH, sync_interval: float = TRANSACTION_SYNC_INTERVAL):
+        """
+        Initializes the store; the database file is created on first use.
+
+        :param path: Path of the SQLite database file.
+        :param sync_interval: Seconds a synced history is considered current and not requested again.
+        """
+        self.path = path
+        self.sync_interval = sync_interval
+        self._initialized = False
+
+    @contextmanager
+    def _connect(self):
+        """
+        Open a connection, creating the database on first use, and commit (or roll back) on exit.
+        """
+        if not self._initialized:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=30)
+        try:
+            if not self._initialized:
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.executescript(SCHEMA)
+                self._initialized = True
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def add(self, address: str, transactions, last_block: int = None) -> int:
+        """
+        Store transactions of an address, replacing those already stored, and optionally record the last block
+        synced.
+
+        :param address: Address the transactions belong to
+        :param transactions: Iterable of txlist records
+        :param last_block: Block up to which the history of the address is now complete
+        :return: Number of transactions written
+        """
+        address = address.lower()
+        rows = [(address, int(t['blockNumber']), int(t.get('transactionIndex') or 0), t['hash'], orjson.dumps(t))
+                for t in transactions]
+        with self._connect() as connection:
+            connection.executemany("INSERT OR REPLACE INTO transactions VALUES (?, ?, ?, ?, ?)", rows)
+            if last_block is not None:
+                connection.execute("INSERT OR REPLACE INTO sync_state VALUES (?, ?, ?)",
+                                   (address, last_block, time.time()))
+        return len(rows)
+
+    def transactions(self, address: str, start_block: int = None, end_block: int = None):
+        """
+        Read the stored transactions of an address in a block range, oldest first.
+
+        :param address: Ethereum address
+        :param start_block: First block of the range (None for the first stored)
+        :param end_block: Last block of the range (None for the last stored)
+        :return: List of txlist records
+        """
+        query = "SELECT record FROM transactions WHERE address = ?"
+        params = [address.lower()]
+        if start_block is not None:
+            query += " AND block_number >= ?"
+            params.append(start_block)
+        if end_block is not None:
+            query += " AND block_number <= ?"
+            params.append(end_block)
+        query += " ORDER BY block_number, transaction_index"
+        with self._connect() as connection:
+            records = [row[0] for row in connection.execute(query, params)]
+        # Decode all records at once as one JSON array
+        return orjson.loads(b"[" + b",".join(records) + b"]")
+
+    def frame(self, address: str, start_block: int = None, end_block: int = None) -> pd.DataFrame:
+        """
+        Read the stored transactions of an address in a block range as a DataFrame, oldest first.
+        """
+        return pd.DataFrame(self.transactions(address, start_block, end_block))
+
+    def count(self, address: str) -> int:
+        """
+        Number of transactions stored for an address.
+        """
+        with self._connect() as connection:
+            return connection.execute("SELECT COUNT(*) FROM transactions WHERE address = ?",
+                                      (address.lower(),)).fetchone()[0]
+
+    def sync_state(self, address: str):
+        """
+        Get the last block synced for an address and when it was synced.
+
+        :return: Tuple of the last block and the UNIX time of the sync, or None if never synced
+        """
+        with self._connect() as connection:
+            return connection.execute("SELECT last_block, synced_at FROM sync_state WHERE address = ?",
+                                      (address.lower(),)).fetchone()
+
+    def is_current(self, address: str) -> bool:
+        """
+        Whether the history of an address was synced within the sync interval.
+        """
+        state = self.sync_state(address)
+        return state is not None and time.time() - state[1] < self.sync_interval
+
+    async def sync_async(self, address: str, api) -> int:
+        """
+        Fetch the blocks added to the history of an address since its last sync and append them.
+
+        :param address: Ethereum address
+        :param api: EtherscanAPI to fetch with
+        :return: Number of new transactions fetched
+        """
+        state = self.sync_state(address)
+        start_block = state[0] + 1 if state is not None else 0
+        async with api.client() as client:
+            end_block = await api.latest_block(client)
+            if end_block < start_block:
+                transactions = []
+            else:
+                transactions = await api.fetch_transactions(address, start_block, end_block, 'asc', client)
+        self.add(address, transactions, last_block=end_block)
+        logger.info(f"Synced {len(transactions)} new transactions for {address} "
+                    f"(blocks {start_block}-{end_block}).")
+        return len(transactions)
+
+    def sync(self, address: str, api, force: bool = False) -> int:
+        """
+        Bring the stored history of an address up to date, unless it was synced within the sync interval.
+
+        :param address: Ethereum address
+        :param api: EtherscanAPI to fetch with
+        :param force: Sync even if the history is current
+        :return: Number of new transactions fetched
+        """
+        if not force and self.is_current(address):
+            return 0
+        return asyncio.run(self.sync_async(address, api))
+
+
+# Transaction store shared by the training and detection entry points
+transaction_store = TransactionStore()
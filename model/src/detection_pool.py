@@ -0,0 +1,156 @@
+"""
+detection_pool.py
+
+This module provides a bounded executor for running CPU-bound detection work off the asyncio event loop.
+Work runs in a fixed number of worker processes (or threads) behind a queue of limited depth; when both are
+full, new work is rejected immediately instead of piling up, so the API can answer with 503 and keep serving
+other requests.
+
+Adheres to the Single Responsibility Principle (SRP) by focusing only on scheduling detection work.
+"""
+
+import asyncio
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from .metrics import metrics, call_collecting
+from .utils.config import DETECT_WORKERS, DETECT_QUEUE_DEPTH, DETECT_USE_PROCESSES, WORKER_START_METHOD
+from .utils.logger import get_logger
+
+# Initialize logger
+logger = get_logger(__name__)
+
+
+class ExecutorSaturated(Exception):
+    """Raised when the executor's workers are busy and its queue is full."""
+
+
+class BoundedExecutor:
+    """
+    BoundedExecutor runs functions in a process or thread pool, admitting at most ``max_workers + queue_depth``
+    pending calls at a time.
+
+    Processes are the default: the cleaning and result-building steps hold the GIL, and worker threads
+    contending for it delay the event loop thread by several switch intervals per request. Worker processes
+    each keep their own model cache, and functions and their arguments must be picklable. Workers are started
+    with WORKER_START_METHOD ('spawn'), so they import the modules they need rather than inheriting this
+    process's state. The metrics a call records in a worker process are merged into this process's registry
+    when the call returns.
+    """
+
+    def __init__(self, max_workers: int = DETECT_WORKERS, queue_depth: int = DETECT_QUEUE_DEPTH,
+                 use_processes: bool = DETECT_USE_PROCESSES, initializer=None, initargs=()):
+        """
+        Initializes the executor. Worker processes are started on first use.
+
+        :param max_workers: Number of workers.
+        :param queue_depth: Number of calls allowed to wait for a free worker.
+        :param use_processes: Whether to run calls in worker processes rather than threads.
+        :param initializer: Optional callable run in every worker, including restarted ones, before it takes
+                            its first call. It must not raise, or the pool breaks.
+        :param initargs: Arguments passed to the initializer.
+        """
+        self.max_workers = max_workers
+        self.queue_depth = queue_depth
+        self.use_processes = use_processes
+        self.initializer = initializer
+        self.initargs = initargs
+        self._executor = self._create_executor()
+        self._slots = threading.BoundedSemaphore(max_workers + queue_depth)
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.rejected = 0
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        Schedule ``fn(*args, **kwargs)`` on a worker.
+
+        :return: concurrent.futures.Future for the call.
+        :raises ExecutorSaturated: If all workers are busy and the queue is full.
+        """
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise ExecutorSaturated(f"Detection queue is full ({self.pending} calls pending).")
+        with self._lock:
+            self.pending += 1
+        if self.use_processes:
+            fn, args = call_collecting, (fn,) + args
+        try:
+            try:
+                future = self._executor.submit(fn, *args, **kwargs)
+            except BrokenProcessPool:
+                # A worker died (e.g. it was killed for running out of memory); start a fresh pool
+                logger.warning("Detection worker pool is broken, restarting it.")
+                self._executor = self._create_executor()
+                future = self._executor.submit(fn, *args, **kwargs)
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(lambda _: self._release())
+        return self._merge_metrics(future) if self.use_processes else future
+
+    @staticmethod
+    def _merge_metrics(future):
+        """
+        Return a future for the result of a ``call_collecting`` call, merging the metrics it carries.
+        """
+        result = Future()
+
+        def relay(done):
+            try:
+                value, delta = done.result()
+            except BaseException as e:
+                result.set_exception(e)
+                return
+            metrics.merge(delta)
+            result.set_result(value)
+
+        future.add_done_callback(relay)
+        return result
+
+    async def run(self, fn, *args, **kwargs):
+        """
+        Run ``fn(*args, **kwargs)`` on a worker and await its result without blocking the event loop.
+
+        :return: The function's return value.
+        :raises ExecutorSaturated: If all workers are busy and the queue is full.
+        """
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def _create_executor(self):
+        if self.use_processes:
+            return ProcessPoolExecutor(max_workers=self.max_workers,
+                                       mp_context=multiprocessing.get_context(WORKER_START_METHOD),
+                                       initializer=self.initializer, initargs=self.initargs)
+        return ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='detect',
+                                  initializer=self.initializer, initargs=self.initargs)
+
+    def _release(self):
+        with self._lock:
+            self.pending -= 1
+        self._slots.release()
+
+    def stats(self):
+        """
+        Return executor statistics.
+
+        :return: Dictionary with the worker count, queue depth, pending calls and rejected calls
+        """
+        return {
+            'workers': self.max_workers,
+            'worker_type': 'process' if self.use_processes else 'thread',
+            'queue_depth': self.queue_depth,
+            'pending': self.pending,
+            'rejected': self.rejected
+        }
+
+    def shutdown(self, wait: bool = True):
+        """
+        Stop accepting work and release the workers.
+
+        :param wait: Whether to wait for pending calls to finish.
+        """
+        self._executor.shutdown(wait=wait)
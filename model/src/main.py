@@ -11,33 +11,25 @@ import os
 import json
 import pandas as pd
 import numpy as np
-from datetime import datetime
 from multiprocessing import freeze_support
 from dotenv import load_dotenv
 
 from .api.etherscan_api import EtherscanAPI
 from .data_processing.data_cleaning import DataCleaner
 from .data_processing.data_transformation import DataTransformer
-from .anomaly_detection.isolation_forest import AnomalyDetectorIsolationForest
+from .data_processing import columnar_io
+from .data_processing.transaction_store import transaction_store
+from .anomaly_detection.isolation_forest import AnomalyDetectorIsolationForest, build_results, top_k_indices
+from .anomaly_detection.model_registry import model_registry
+from .metrics import metrics
+from .utils import serialization
 from .utils.logger import get_logger
 
 # Initialize logger
 logger = get_logger(__name__)
 
-class JSONEncoder(json.JSONEncoder):
-    """Custom JSON encoder to handle special data types."""
-    def default(self, obj):
-        if isinstance(obj, (np.int_, np.intc, np.intp, np.int8,
-            np.int16, np.int32, np.int64, np.uint8,
-            np.uint16, np.uint32, np.uint64)):
-            return int(obj)
-        elif isinstance(obj, (np.float_, np.float16, np.float32, np.float64)):
-            return float(obj)
-        elif isinstance(obj, (pd.Timestamp, datetime)):
-            return obj.isoformat()
-        elif isinstance(obj, np.ndarray):
-            return obj.tolist()
-        return super().default(obj)
+# Column tagging the rows of each batch in detect_anomalies_batches
+BATCH_COLUMN = '_batch'
 
 def setup_environment():
     """
@@ -51,45 +43,77 @@ def setup_environment():
         if not os.path.exists(directory):
             os.makedirs(directory)
 
-def train_model(data=None):
+def load_stored_transactions(address, start_block=None, end_block=None, refresh=False, store=None,
+                             pipeline='train'):
     """
-    Train the anomaly detection model using either provided data or fetching from Etherscan.
+    Read the history of an address from the local transaction store, first syncing the blocks added since
+    its last sync from Etherscan unless it was synced recently.
+    
+    :param address: Ethereum address
+    :param start_block: Optional first block of the history to read
+    :param end_block: Optional last block of the history to read
+    :param refresh: Sync with Etherscan even if the stored history was synced recently
+    :param store: TransactionStore to use (defaults to the shared store)
+    :param pipeline: Pipeline the sync and read are timed for
+    :return: DataFrame of transactions, oldest first
+    """
+    store = store or transaction_store
+    if refresh or not store.is_current(address):
+        api_key = os.getenv("ETHERSCAN_API_KEY")
+        if not api_key:
+            raise ValueError("Missing API key in environment variables")
+        with metrics.stage(pipeline, 'fetch'):
+            store.sync(address, EtherscanAPI(api_key=api_key), force=True)
+    with metrics.stage(pipeline, 'load'):
+        return store.frame(address, start_block, end_block)
+
+def train_model(data=None, address=None, refresh=False):
+    """
+    Train the anomaly detection model using either provided data or the address's stored history, which is
+    synced incrementally from Etherscan.
     
     :param data: Optional DataFrame or list of transactions for training
+    :param address: Optional address (or tenant identifier) the model is trained for; the model is stored
+                    in that address's registry slot instead of the default model directory
+    :param refresh: Sync the stored history with Etherscan even if it was synced recently
     :return: Trained model
     """
     try:
+        model_path = model_registry.model_path(address)
+        
         if data is None:
-            # Fetch data from Etherscan
-            api_key = os.getenv("ETHERSCAN_API_KEY")
-            address = os.getenv("ETHERSCAN_ADDRESS")
+            # Read the history from the local store, fetching only new blocks from Etherscan
+            fetch_address = address or os.getenv("ETHERSCAN_ADDRESS")
             
-            if not api_key or not address:
-                raise ValueError("Missing API key or Ethereum address in environment variables")
+            if not fetch_address:
+                raise ValueError("Missing Ethereum address in environment variables")
             
-            api = EtherscanAPI(api_key=api_key)
-            transactions = api.get_transactions(address)
+            data = load_stored_transactions(fetch_address, refresh=refresh)
             
-            if not transactions:
-                raise ValueError("Failed to fetch transactions from Etherscan")
-            
-            data = pd.DataFrame(transactions)
+            if data.empty:
+                raise ValueError(f"No transactions stored for {fetch_address}")
         elif isinstance(data, list):
             data = pd.DataFrame(data)
+        metrics.inc('pipeline_rows_total', len(data), pipeline='train')
         
         # Clean and transform data
-        cleaner = DataCleaner(data)
-        cleaned_data = cleaner.clean_data()
+        with metrics.stage('train', 'clean'):
+            cleaner = DataCleaner(data)
+            cleaned_data = cleaner.clean_data()
         
-        transformer = DataTransformer(cleaned_data)
-        transformed_data = transformer.transform_data()
+        with metrics.stage('train', 'transform'):
+            transformer = DataTransformer(cleaned_data)
+            transformed_data = transformer.transform_data()
         
         # Train model
-        detector = AnomalyDetectorIsolationForest(transformed_data)
-        detector.train_model()
+        with metrics.stage('train', 'train'):
+            detector = AnomalyDetectorIsolationForest(transformed_data)
+            detector.train_model()
         
         # Save model
-        detector.save_model()
+        with metrics.stage('train', 'save'):
+            detector.save_model(model_path)
+        model_registry.record_stored(address)
         
         return detector
     
@@ -97,49 +121,246 @@ def train_model(data=None):
         logger.error(f"Error during model training: {str(e)}", exc_info=True)
         raise
 
-def detect_anomalies(transactions, model_path='models'):
+def detect_anomalies(transactions, model_path='models', address=None, top_k=None, cache=None):
     """
     Detect anomalies in the provided transactions.
     
     :param transactions: List of transaction dictionaries or DataFrame
     :param model_path: Path to the saved model files
+    :param address: Optional address (or tenant identifier) whose model is used instead of ``model_path``
+    :param top_k: Optional number of most anomalous transactions to return, most anomalous first
+    :param cache: Optional ResultCache; transactions already scored by the same model version are answered
+                  from it and only the others are scored by the model. The batch statistics used to scale the
+                  features are still computed over the whole request, so a fresh result is the same as without
+                  the cache. Results are then returned in input order, one per transaction hash
     :return: List of dictionaries containing anomaly detection results
     """
     try:
-        # Convert transactions to DataFrame if needed
+        metrics.inc('pipeline_rows_total', len(transactions), pipeline='detect')
+        detector, model_path = load_detector(model_path, address)
+        
+        version = detector.manifest.get('model_version')
         if isinstance(transactions, list):
-            df = pd.DataFrame(transactions)
+            hashes = [transaction.get('hash') for transaction in transactions]
         else:
-            df = transactions
+            hashes = transactions['hash'].tolist() if 'hash' in transactions.columns else None
+        if cache is None or not cache.enabled or version is None or hashes is None:
+            return score_transactions(to_frame(transactions), detector, top_k=top_k)
         
-        # Clean and transform data
+        cache.activate(os.path.abspath(model_path), version)
+        cached = cache.get_many(version, hashes)
+        metrics.inc('result_cache_hits_total', len(cached))
+        metrics.inc('result_cache_misses_total', len(set(hashes)) - len(cached))
+        if not cached:
+            results = score_transactions(to_frame(transactions), detector, top_k=top_k)
+            cache.put_many(version, results)
+            return results
+        
+        # Only transactions missing from the cache are scored, but with the whole request as their batch: the
+        # per-batch scaling of a few new rows on their own would differ (or be undefined for a single row)
+        missing = set(hashes) - cached.keys()
+        fresh = score_transactions(to_frame(transactions), detector, allow_empty=True,
+                                   only_hashes=missing) if missing else []
+        cache.put_many(version, fresh)
+        
+        # Merge cached and fresh results in input order
+        for result in fresh:
+            cached.setdefault(result['transaction_hash'], result)
+        results = [cached[tx_hash] for tx_hash in dict.fromkeys(hashes) if tx_hash in cached]
+        if top_k is not None:
+            scores = np.array([result['anomaly_score'] for result in results], dtype=np.float64)
+            results = [results[i] for i in top_k_indices(scores, top_k)]
+        return results
+    
+    except Exception as e:
+        logger.error(f"Error during anomaly detection: {str(e)}", exc_info=True)
+        raise
+
+def load_detector(model_path='models', address=None):
+    """
+    Get a detector ready for inference from the in-process model cache.
+    
+    :param model_path: Path to the saved model files
+    :param address: Optional address (or tenant identifier) whose model is used instead of ``model_path``
+    :return: Tuple of the detector and the path of its model files
+    """
+    with metrics.stage('detect', 'model_load'):
+        if address is not None:
+            return model_registry.get(address), model_registry.model_path(address)
+        return model_registry.cache.get(model_path), model_path
+
+def detect_anomalies_frame(df, model_path='models', address=None, top_k=None):
+    """
+    Detect anomalies in a DataFrame of transactions and return the result columns.
+    
+    Used for columnar input and output: no per-transaction dictionaries are built.
+    
+    :param df: DataFrame of raw transactions
+    :param model_path: Path to the saved model files
+    :param address: Optional address (or tenant identifier) whose model is used instead of ``model_path``
+    :param top_k: Optional number of most anomalous transactions to return, most anomalous first
+    :return: Dictionary of result columns, as returned by ``detect_anomalies_columnar``
+    """
+    try:
+        metrics.inc('pipeline_rows_total', len(df), pipeline='detect')
+        detector, _ = load_detector(model_path, address)
+        return score_columns(df, detector, top_k=top_k)
+    
+    except Exception as e:
+        logger.error(f"Error during anomaly detection: {str(e)}", exc_info=True)
+        raise
+
+def to_frame(transactions):
+    """
+    Convert a list of transaction dictionaries to a DataFrame; DataFrames are returned as they are.
+    """
+    return pd.DataFrame(transactions) if isinstance(transactions, list) else transactions
+
+def score_transactions(df, detector, top_k=None, allow_empty=False, only_hashes=None):
+    """
+    Clean, transform and score transactions with a loaded detector.
+    
+    :param df: DataFrame of raw transactions
+    :param detector: AnomalyDetectorIsolationForest ready for inference
+    :param top_k: Optional number of most anomalous transactions to return, most anomalous first
+    :param allow_empty: Return no results, instead of failing, when no valid transactions remain after cleaning
+    :param only_hashes: Optional set of transaction hashes to score; the other transactions only contribute
+                        to the batch statistics
+    :return: List of dictionaries containing anomaly detection results
+    """
+    columns = score_columns(df, detector, top_k=top_k, allow_empty=allow_empty, only_hashes=only_hashes)
+    if columns is None:
+        return []
+    
+    # Build the results straight from the result columns
+    with metrics.stage('detect', 'build_results'):
+        return build_results(columns)
+
+def score_columns(df, detector, top_k=None, allow_empty=False, only_hashes=None):
+    """
+    Clean, transform and score transactions with a loaded detector, returning the result columns.
+    
+    :param df: DataFrame of raw transactions
+    :param detector: AnomalyDetectorIsolationForest ready for inference
+    :param top_k: Optional number of most anomalous transactions to return, most anomalous first
+    :param allow_empty: Return None, instead of failing, when no valid transactions remain after cleaning
+    :param only_hashes: Optional set of transaction hashes to score; the other transactions only contribute
+                        to the batch statistics
+    :return: Dictionary of result columns, as returned by ``detect_anomalies_columnar``
+    """
+    # Clean and transform data
+    with metrics.stage('detect', 'clean'):
         cleaner = DataCleaner(df)
         cleaned_data = cleaner.clean_data()
-        
+    if allow_empty and cleaned_data.empty:
+        return None
+    
+    with metrics.stage('detect', 'transform'):
         transformer = DataTransformer(cleaned_data)
         transformed_data = transformer.transform_data()
-        
-        # Load model and detect anomalies
-        detector = AnomalyDetectorIsolationForest.load_model(model_path)
+    
+    with metrics.stage('detect', 'prepare_features'):
         detector.df = transformed_data
         detector.prepare_features()  # Now safe to call after setting df
-        results_df = detector.detect_anomalies()
+        if only_hashes is not None:
+            detector.select_rows(detector.df['hash'].isin(only_hashes).to_numpy())
+    if allow_empty and detector.df.empty:
+        return None
+    
+    with metrics.stage('detect', 'predict'):
+        return detector.detect_anomalies_columnar(top_k=top_k)
+
+def detect_anomalies_batches(batches, model_path='models', address=None):
+    """
+    Detect anomalies in several independent batches of transactions with one pass through the pipeline.
+    
+    The batches are cleaned, transformed, scored and converted to results together, but duplicate removal,
+    normalization and feature scaling are applied per batch, so each batch gets the same results as a
+    separate ``detect_anomalies`` call.
+    
+    :param batches: List of batches, each a list of transaction dictionaries
+    :param model_path: Path to the saved model files
+    :param address: Optional address (or tenant identifier) whose model is used instead of ``model_path``
+    :return: List with one list of result dictionaries per batch
+    :raises ValueError: If a batch has no valid transactions left after cleaning
+    """
+    try:
+        sizes = [len(batch) for batch in batches]
+        df = pd.DataFrame([transaction for batch in batches for transaction in batch])
+        df[BATCH_COLUMN] = np.repeat(np.arange(len(batches)), sizes)
+        metrics.inc('pipeline_rows_total', len(df), pipeline='detect')
         
-        # Extract results
-        results = results_df['anomaly_result'].tolist()
-        return results
+        # Clean and transform data; the batch column keeps duplicates in different batches apart
+        with metrics.stage('detect', 'clean'):
+            cleaner = DataCleaner(df)
+            cleaned_data = cleaner.clean_data()
+        
+        with metrics.stage('detect', 'transform'):
+            transformer = DataTransformer(cleaned_data)
+            transformed_data = transformer.transform_data(group_column=BATCH_COLUMN)
+        
+        batch_ids = transformed_data[BATCH_COLUMN].to_numpy()
+        counts = np.bincount(batch_ids, minlength=len(batches))
+        if (counts == 0).any():
+            raise ValueError("A batch has no valid transactions to analyze")
+        
+        detector, _ = load_detector(model_path, address)
+        with metrics.stage('detect', 'prepare_features'):
+            detector.df = transformed_data
+            detector.prepare_features(groups=batch_ids)
+        with metrics.stage('detect', 'predict'):
+            columns = detector.detect_anomalies_columnar()
+        with metrics.stage('detect', 'build_results'):
+            results = build_results(columns)
+        
+        # Split the results back into their batches
+        bounds = np.concatenate([[0], np.cumsum(counts)]).tolist()
+        return [results[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
     
     except Exception as e:
-        logger.error(f"Error during anomaly detection: {str(e)}", exc_info=True)
+        logger.error(f"Error during batched anomaly detection: {str(e)}", exc_info=True)
         raise
 
-def process_json_input(input_file, output_file=None, should_train=False):
+def detect_anomalies_streaming(transactions, detector):
+    """
+    Score transactions with a streaming detector and let it learn from them.
+
+    Uses the same cleaning and feature path as ``detect_anomalies``. Only the timestamp conversion of the
+    transformer is applied: per-batch min-max normalization would make a transaction's features depend on
+    which micro-batch it arrives in.
+
+    :param transactions: List of transaction dictionaries or DataFrame (one or more transactions)
+    :param detector: StreamingAnomalyDetector instance holding the stream state
+    :return: List of dictionaries containing anomaly detection results
+    """
+    try:
+        if isinstance(transactions, list):
+            df = pd.DataFrame(transactions)
+        else:
+            df = transactions
+        
+        cleaner = DataCleaner(df)
+        cleaned_data = cleaner.clean_data()
+        
+        transformer = DataTransformer(cleaned_data)
+        transformed_data = transformer.convert_timestamp()
+        
+        columns = detector.update(transformed_data)
+        return build_results(columns)
+    
+    except Exception as e:
+        logger.error(f"Error during streaming anomaly detection: {str(e)}", exc_info=True)
+        raise
+
+def process_json_input(input_file, output_file=None, should_train=False, address=None, top_k=None):
     """
     Process transactions from a JSON file and detect anomalies.
     
     :param input_file: Path to input JSON file
     :param output_file: Path to output JSON file (optional)
     :param should_train: Whether to train a new model
+    :param address: Optional address (or tenant identifier) whose model is used
+    :param top_k: Optional number of most anomalous transactions to return
     :return: Detection results
     """
     try:
@@ -152,17 +373,16 @@ def process_json_input(input_file, output_file=None, should_train=False):
             raise ValueError("No transactions found in input file")
         
         # Train model if requested or if no model exists
-        if should_train or not os.path.exists('models/isolation_forest.joblib'):
+        if should_train or not model_registry.exists(address):
             logger.info("Training new model...")
-            train_model(transactions)
+            train_model(transactions, address=address)
         
         # Detect anomalies
-        results = detect_anomalies(transactions)
+        results = detect_anomalies(transactions, address=address, top_k=top_k)
         
         # Save results if output file is specified
         if output_file:
-            with open(output_file, 'w') as f:
-                json.dump(results, f, indent=2, cls=JSONEncoder)
+            serialization.dump(results, output_file)
             logger.info(f"Results saved to {output_file}")
         
         return results
@@ -171,33 +391,141 @@ def process_json_input(input_file, output_file=None, should_train=False):
         logger.error(f"Error processing JSON input: {str(e)}", exc_info=True)
         raise
 
+def process_stored_transactions(address, output_file=None, should_train=False, top_k=None, start_block=None,
+                                end_block=None):
+    """
+    Detect anomalies in the stored history of an address, synced incrementally from Etherscan.
+    
+    :param address: Ethereum address whose history and model are used
+    :param output_file: Path to output JSON file (optional)
+    :param should_train: Whether to train a new model
+    :param top_k: Optional number of most anomalous transactions to return
+    :param start_block: Optional first block of the history to analyze
+    :param end_block: Optional last block of the history to analyze
+    :return: Detection results
+    """
+    try:
+        # Train model if requested or if no model exists
+        if should_train or not model_registry.exists(address):
+            logger.info("Training new model...")
+            train_model(address=address)
+        
+        df = load_stored_transactions(address, start_block, end_block, pipeline='detect')
+        if df.empty:
+            raise ValueError(f"No transactions stored for {address} in the requested blocks")
+        
+        # Detect anomalies
+        results = build_results(detect_anomalies_frame(df, address=address, top_k=top_k))
+        
+        # Save results if output file is specified
+        if output_file:
+            serialization.dump(results, output_file)
+            logger.info(f"Results saved to {output_file}")
+        
+        return results
+    
+    except Exception as e:
+        logger.error(f"Error processing stored transactions: {str(e)}", exc_info=True)
+        raise
+
+def process_columnar_input(input_file, output_file=None, fmt='parquet', should_train=False, address=None,
+                           top_k=None):
+    """
+    Process transactions from a Parquet or Arrow file and detect anomalies.
+    
+    :param input_file: Path to input file with one row per transaction
+    :param output_file: Path to output file for the results, written in the same format (optional)
+    :param fmt: 'parquet' or 'arrow'
+    :param should_train: Whether to train a new model
+    :param address: Optional address (or tenant identifier) whose model is used
+    :param top_k: Optional number of most anomalous transactions to return
+    :return: Dictionary of result columns
+    """
+    try:
+        df = columnar_io.to_frame(columnar_io.read_table(input_file, fmt))
+        
+        # Train model if requested or if no model exists
+        if should_train or not model_registry.exists(address):
+            logger.info("Training new model...")
+            train_model(df.copy(), address=address)
+        
+        # Detect anomalies
+        columns = detect_anomalies_frame(df, address=address, top_k=top_k)
+        
+        # Save results if output file is specified
+        if output_file:
+            columnar_io.write_table(columnar_io.results_table(columns), output_file, fmt)
+            logger.info(f"Results saved to {output_file}")
+        
+        return columns
+    
+    except Exception as e:
+        logger.error(f"Error processing {fmt} input: {str(e)}", exc_info=True)
+        raise
+
 def main():
     """
     Main function that handles command line arguments and runs the application.
     """
     import argparse
+    from .bulk_training import train_many
     
-    parser = argparse.ArgumentParser(description='Blockchain Transaction Anomaly Detection')
-    parser.add_argument('--input', '-i', help='Path to input JSON file containing transactions')
-    parser.add_argument('--output', '-o', help='Path to output JSON file for results')
+    parser = argparse.ArgumentParser(description='Blockchain Transaction Anomaly Detection',
+                                     fromfile_prefix_chars='@')
+    parser.add_argument('--input', '-i', help='Path to input file containing transactions')
+    parser.add_argument('--output', '-o', help='Path to output file for results')
+    parser.add_argument('--format', choices=['json', 'parquet', 'arrow'], default='json',
+                        help='Format of the input and output files')
     parser.add_argument('--train', '-t', action='store_true', help='Train a new model')
-    parser.add_argument('--fetch', '-f', action='store_true', help='Fetch new training data from Etherscan')
+    parser.add_argument('--fetch', '-f', action='store_true',
+                        help='Sync the stored training data with Etherscan even if it was synced recently')
+    parser.add_argument('--stored', action='store_true',
+                        help='Detect anomalies in the stored history of --address, synced from Etherscan')
+    parser.add_argument('--start-block', type=int, help='First block of the stored history to analyze')
+    parser.add_argument('--end-block', type=int, help='Last block of the stored history to analyze')
+    parser.add_argument('--address', '-a', help='Address (or tenant identifier) whose model is trained and used')
+    parser.add_argument('--train-addresses', nargs='+', metavar='ADDRESS',
+                        help='Train one model per address in parallel (use @file to read addresses from a file)')
+    parser.add_argument('--workers', type=int, help='Maximum number of parallel training processes')
+    parser.add_argument('--top-k', type=int, help='Only output the K most anomalous transactions')
     
     args = parser.parse_args()
     
     try:
         setup_environment()
         
+        if args.train_addresses:
+            results = train_many(args.train_addresses, max_workers=args.workers)
+            failed = [r['address'] for r in results if r['status'] != 'success']
+            logger.info(f"Bulk training finished: {len(results) - len(failed)} succeeded, {len(failed)} failed.")
+            if failed:
+                logger.error(f"Training failed for: {', '.join(failed)}")
+        
         if args.fetch or args.train:
             logger.info("Training new model...")
-            train_model()
+            train_model(address=args.address, refresh=args.fetch)
+        
+        if args.stored:
+            if not args.address:
+                parser.error("--stored requires --address")
+            results = process_stored_transactions(args.address, args.output, top_k=args.top_k,
+                                                  start_block=args.start_block, end_block=args.end_block)
+            if not args.output:
+                print(serialization.dumps(results, indent=True).decode())
         
         if args.input:
             logger.info(f"Processing transactions from {args.input}")
-            results = process_json_input(args.input, args.output, should_train=args.train)
+            if args.format == 'json':
+                results = process_json_input(args.input, args.output, should_train=args.train,
+                                             address=args.address, top_k=args.top_k)
+            else:
+                columns = process_columnar_input(args.input, args.output, fmt=args.format,
+                                                 should_train=args.train, address=args.address,
+                                                 top_k=args.top_k)
+                results = build_results(columns) if not args.output else None
             
             if not args.output:
-                print(json.dumps(results, indent=2, cls=JSONEncoder))
+                print(serialization.dumps(results, indent=True).decode())
         
     except Exception as e:
         logger.error(f"Application error: {str(e)}", exc_info=True)
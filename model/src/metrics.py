@@ -0,0 +1,272 @@
+"""
+metrics.py
+
+This module collects operational metrics of the anomaly detection service and renders them in the Prometheus
+text format: latency histograms for each stage of the detection and training pipelines, the number of rows
+processed, the sizes of coalesced detection batches, model and result cache hits and misses, and requests in
+flight.
+
+Metrics are kept per process. Work that runs in worker processes (detection workers, training jobs) is
+wrapped with ``call_collecting``, which hands the metrics recorded during the call back to the parent along
+with the result, where ``merge`` adds them to the parent's registry.
+
+Adheres to the Single Responsibility Principle (SRP) by focusing only on recording and exposing metrics.
+"""
+
+import os
+import threading
+from bisect import bisect_left
+from time import perf_counter
+
+from .anomaly_detection.model_registry import model_registry
+
+# Upper bounds of the stage latency histogram buckets, in seconds
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Upper bounds of the coalescer batch size histogram buckets, in transactions
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+# Histograms with their own buckets; the others use the registry's latency buckets
+HISTOGRAM_BUCKETS = {'coalescer_batch_size': BATCH_SIZE_BUCKETS}
+
+# Metric types and help texts, in the order they are rendered
+METRICS = {
+    'pipeline_stage_seconds': ('histogram', 'Time spent in each stage of the detection and training pipelines'),
+    'pipeline_rows_total': ('counter', 'Transactions passed to the detection and training pipelines'),
+    'coalescer_batch_size': ('histogram', 'Transactions per micro-batch dispatched by the request coalescer'),
+    'model_cache_hits_total': ('counter', 'Model lookups served from the in-memory model cache'),
+    'model_cache_misses_total': ('counter', 'Model lookups that had to check or load the model files'),
+    'model_cache_loads_total': ('counter', 'Models loaded from disk'),
+    'model_cache_evictions_total': ('counter', 'Models evicted from the in-memory model cache'),
+    'result_cache_hits_total': ('counter', 'Transactions answered from the detection result cache'),
+    'result_cache_misses_total': ('counter', 'Transactions not found in the detection result cache'),
+    'requests_in_flight': ('gauge', 'Requests currently being processed, per endpoint'),
+    'detection_queue_pending': ('gauge', 'Detection calls running or waiting for a worker'),
+    'detection_queue_rejected_total': ('counter', 'Detection calls rejected because the queue was full'),
+    'alert_subscribers': ('gauge', 'Connected anomaly alert subscribers'),
+    'alerts_published_total': ('counter', 'Anomaly alerts published to subscribers'),
+    'alerts_dropped_total': ('counter', 'Anomaly alerts dropped from the buffers of slow subscribers'),
+    'warmup_seconds': ('gauge', 'Duration of the startup warm-up')
+}
+
+# Model cache statistics mirrored as counters
+CACHE_COUNTERS = {
+    'hits': 'model_cache_hits_total',
+    'misses': 'model_cache_misses_total',
+    'loads': 'model_cache_loads_total',
+    'evictions': 'model_cache_evictions_total'
+}
+
+
+class StageTimer:
+    """
+    Context manager recording the duration of a pipeline stage.
+    """
+    __slots__ = ('registry', 'key', 'start')
+
+    def __init__(self, registry, key):
+        self.registry = registry
+        self.key = key
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.registry._observe(self.key, perf_counter() - self.start)
+        return False
+
+
+class MetricsRegistry:
+    """
+    MetricsRegistry holds the counters, gauges and histograms of one process.
+    """
+
+    def __init__(self, buckets=STAGE_BUCKETS):
+        """
+        Initializes an empty registry.
+
+        :param buckets: Upper bounds of the latency histogram buckets, in seconds.
+        """
+        self.buckets = tuple(buckets)
+        self.reset()
+
+    def reset(self):
+        """
+        Clear all metrics. Called in forked child processes so they report only their own work.
+        """
+        # A fresh lock, as another thread of the parent may have held the old one at fork time
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+        self._gauges = {}
+        self._cache_seen = self._cache_stats()
+
+    def stage(self, pipeline, stage):
+        """
+        Return a context manager timing one stage of a pipeline.
+
+        :param pipeline: Pipeline name (e.g. 'detect' or 'train').
+        :param stage: Stage name (e.g. 'clean').
+        """
+        return StageTimer(self, ('pipeline_stage_seconds', (('pipeline', pipeline), ('stage', stage))))
+
+    def inc(self, name, amount=1, **labels):
+        """
+        Increase a counter.
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def add_gauge(self, name, amount, **labels):
+        """
+        Add to (or, with a negative amount, subtract from) a gauge.
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._gauges[key] = self._gauges.get(key, 0) + amount
+
+    def set_gauge(self, name, value, **labels):
+        """
+        Set a gauge to a value.
+        """
+        with self._lock:
+            self._gauges[(name, tuple(sorted(labels.items())))] = value
+
+    def value(self, name, **labels):
+        """
+        Return the current value of a counter or gauge (0 if it was never set).
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            return self._counters.get(key, self._gauges.get(key, 0))
+
+    def observe(self, name, value, **labels):
+        """
+        Record a value in a histogram.
+        """
+        self._observe((name, tuple(sorted(labels.items()))), value)
+
+    def _bounds(self, name):
+        return HISTOGRAM_BUCKETS.get(name, self.buckets)
+
+    def _observe(self, key, value):
+        bounds = self._bounds(key[0])
+        index = bisect_left(bounds, value)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * (len(bounds) + 1), 0.0]
+            histogram[0][index] += 1
+            histogram[1] += value
+
+    def collect(self):
+        """
+        Return the counters and histograms recorded since the last call and clear them. Gauges describe the
+        state of this process and are not collected.
+
+        :return: Picklable dictionary for ``merge``
+        """
+        self.sync_cache_stats()
+        with self._lock:
+            delta = {'counters': self._counters, 'histograms': self._histograms}
+            self._counters = {}
+            self._histograms = {}
+        return delta
+
+    def merge(self, delta):
+        """
+        Add metrics collected in another process to this registry.
+
+        :param delta: Dictionary returned by ``collect``.
+        """
+        with self._lock:
+            for key, amount in delta['counters'].items():
+                self._counters[key] = self._counters.get(key, 0) + amount
+            for key, (counts, total) in delta['histograms'].items():
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    histogram = self._histograms[key] = [[0] * (len(self._bounds(key[0])) + 1), 0.0]
+                histogram[0] = [a + b for a, b in zip(histogram[0], counts)]
+                histogram[1] += total
+
+    def sync_cache_stats(self):
+        """
+        Add the model cache lookups of this process since the last sync to the cache counters.
+        """
+        stats = self._cache_stats()
+        with self._lock:
+            for field, name in CACHE_COUNTERS.items():
+                # The counters restart when the cache is replaced
+                seen = self._cache_seen.get(field, 0)
+                amount = stats[field] - seen if stats[field] >= seen else stats[field]
+                if amount:
+                    key = (name, ())
+                    self._counters[key] = self._counters.get(key, 0) + amount
+            self._cache_seen = stats
+
+    @staticmethod
+    def _cache_stats():
+        cache = model_registry.cache
+        return {'hits': cache.hits, 'misses': cache.misses, 'loads': cache.loads, 'evictions': cache.evictions}
+
+    def render(self):
+        """
+        Render all metrics in the Prometheus text exposition format.
+
+        :return: Text of the metrics page
+        """
+        self.sync_cache_stats()
+        with self._lock:
+            values = {**self._counters, **self._gauges}
+            histograms = {key: (list(counts), total) for key, (counts, total) in self._histograms.items()}
+
+        samples = {}
+        for (name, labels), value in sorted(values.items()):
+            samples.setdefault(name, []).append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        for (name, labels), (counts, total) in sorted(histograms.items()):
+            bounds = [repr(bound) for bound in self._bounds(name)] + ['+Inf']
+            lines = samples.setdefault(name, [])
+            cumulative = 0
+            for le, count in zip(bounds, counts):
+                cumulative += count
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', le),))} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+
+        output = []
+        for name, (kind, description) in METRICS.items():
+            output.append(f"# HELP {name} {description}")
+            output.append(f"# TYPE {name} {kind}")
+            output.extend(samples.get(name, []))
+        return '\n'.join(output) + '\n'
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+               for _, value in labels)
+    return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + '}'
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def call_collecting(fn, *args, **kwargs):
+    """
+    Call a function in a worker process and return its result along with the metrics it recorded.
+
+    :return: Tuple of (result, metrics delta for ``metrics.merge``)
+    """
+    result = fn(*args, **kwargs)
+    return result, metrics.collect()
+
+
+# Registry of this process
+metrics = MetricsRegistry()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=metrics.reset)
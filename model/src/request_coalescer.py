@@ -0,0 +1,136 @@
+"""
+request_coalescer.py
+
+This module coalesces many small detection requests into micro-batches. Requests for the same model are held
+for at most a few milliseconds (or until enough transactions have arrived), processed together in a single
+pass on the detection executor, and their results are handed back to each caller. This amortizes the fixed
+per-call cost of building DataFrames, cleaning and scoring over many tiny requests.
+
+Adheres to the Single Responsibility Principle (SRP) by focusing only on batching detection requests.
+"""
+
+import asyncio
+
+from .metrics import metrics, BATCH_SIZE_BUCKETS
+from .utils.config import COALESCE_MAX_WAIT_MS, COALESCE_MAX_BATCH
+from .utils.logger import get_logger
+
+# Initialize logger
+logger = get_logger(__name__)
+
+
+class RequestCoalescer:
+    """
+    RequestCoalescer gathers requests per key (e.g. per model) and runs each batch with one executor call.
+
+    The batch function receives the list of pending payloads and the key, and must return one outcome per
+    payload, in order. Must be used from a single event loop.
+    """
+
+    def __init__(self, executor, batch_fn, max_wait_ms: float = COALESCE_MAX_WAIT_MS,
+                 max_batch: int = COALESCE_MAX_BATCH):
+        """
+        Initializes the coalescer.
+
+        :param executor: BoundedExecutor that runs the batches.
+        :param batch_fn: Picklable function ``batch_fn(payloads, key)`` returning one outcome per payload.
+        :param max_wait_ms: Longest time the first request of a batch waits for others, in milliseconds.
+        :param max_batch: Number of transactions at which a batch is dispatched without waiting further.
+        """
+        self.executor = executor
+        self.batch_fn = batch_fn
+        self.max_wait = max_wait_ms / 1000
+        self.max_batch = max_batch
+        self._pending = {}
+        self._sizes = {}
+        self._timers = {}
+        self.batches = 0
+        self.requests = 0
+        self.transactions = 0
+        self.max_transactions = 0
+        self.histogram = [0] * (len(BATCH_SIZE_BUCKETS) + 1)
+
+    async def submit(self, payload, size: int, key=None):
+        """
+        Add a request to the current batch for ``key`` and wait for its outcome.
+
+        :param payload: Request payload passed on to the batch function.
+        :param size: Number of transactions in the payload.
+        :param key: Batching key; only requests with the same key are processed together.
+        :return: The outcome of the batch function for this payload.
+        :raises ExecutorSaturated: If the executor rejected the batch.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        batch = self._pending.setdefault(key, [])
+        batch.append((payload, size, future))
+        self._sizes[key] = self._sizes.get(key, 0) + size
+
+        if self._sizes[key] >= self.max_batch:
+            self._flush(key)
+        elif len(batch) == 1:
+            self._timers[key] = loop.call_later(self.max_wait, self._flush, key)
+        return await future
+
+    def _flush(self, key):
+        """
+        Dispatch the pending batch for ``key`` to the executor.
+        """
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(key, None)
+        self._sizes.pop(key, None)
+        if not batch:
+            return
+
+        size = sum(item[1] for item in batch)
+        self._record(len(batch), size)
+        asyncio.ensure_future(self._run(key, batch))
+
+    async def _run(self, key, batch):
+        """
+        Run one batch and resolve the futures of its requests.
+        """
+        try:
+            outcomes = await self.executor.run(self.batch_fn, [item[0] for item in batch], key)
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, _, future), outcome in zip(batch, outcomes):
+            # The caller may have gone away (e.g. the client disconnected) in the meantime
+            if not future.done():
+                future.set_result(outcome)
+
+    def _record(self, n_requests, n_transactions):
+        self.batches += 1
+        self.requests += n_requests
+        self.transactions += n_transactions
+        self.max_transactions = max(self.max_transactions, n_transactions)
+        bucket = next((i for i, bound in enumerate(BATCH_SIZE_BUCKETS) if n_transactions <= bound),
+                      len(BATCH_SIZE_BUCKETS))
+        self.histogram[bucket] += 1
+        metrics.observe('coalescer_batch_size', n_transactions)
+
+    def stats(self):
+        """
+        Return batching statistics.
+
+        :return: Dictionary with the settings, batch counts, average batch sizes and a histogram of batch
+                 sizes in transactions (keyed by bucket upper bound)
+        """
+        labels = [str(bound) for bound in BATCH_SIZE_BUCKETS] + ['+Inf']
+        return {
+            'max_wait_ms': self.max_wait * 1000,
+            'max_batch': self.max_batch,
+            'batches': self.batches,
+            'requests': self.requests,
+            'transactions': self.transactions,
+            'mean_requests_per_batch': self.requests / self.batches if self.batches else 0.0,
+            'mean_transactions_per_batch': self.transactions / self.batches if self.batches else 0.0,
+            'max_transactions_per_batch': self.max_transactions,
+            'batch_size_histogram': dict(zip(labels, self.histogram))
+        }
@@ -0,0 +1,266 @@
+"""
+training_jobs.py
+
+This module manages model training requested through the API. Each request becomes a job with an ID whose
+status can be queried. An identical request for a job that is still queued or running returns that job
+instead of starting another training. Jobs for the same address run one after another, at most a few jobs run
+at once, and each job trains in its own process, which keeps training CPU off the serving process and lets a
+running job be cancelled by terminating it.
+
+Adheres to the Single Responsibility Principle (SRP) by focusing only on scheduling training jobs.
+"""
+
+import os
+import glob
+import json
+import uuid
+import hashlib
+import shutil
+import threading
+import multiprocessing
+from collections import OrderedDict
+from datetime import datetime
+
+from .bulk_training import _train_address
+from .metrics import metrics, call_collecting
+from .anomaly_detection.model_registry import model_registry, normalize_address
+from .utils.config import TRAINING_JOB_WORKERS, TRAINING_JOB_HISTORY, WORKER_START_METHOD
+from .utils.logger import get_logger
+
+# Initialize logger
+logger = get_logger(__name__)
+
+# Job states
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCESS = 'success'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+ACTIVE_STATES = (QUEUED, RUNNING)
+
+
+def request_fingerprint(address, data):
+    """
+    Hash a training request, so identical requests can be recognized.
+
+    :param address: Normalized address (None for the default model)
+    :param data: Training transactions (None to fetch them from Etherscan)
+    :return: Hex digest identifying the request
+    """
+    payload = json.dumps([address, data], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _run_job(conn, train, address, data):
+    """
+    Train one model with ``train`` and send the result and the recorded metrics back to the manager. Runs in
+    the job's own process.
+    """
+    try:
+        conn.send(call_collecting(train, address, data))
+    finally:
+        conn.close()
+
+
+class TrainingJobManager:
+    """
+    TrainingJobManager runs training jobs in separate processes and keeps track of their status.
+    """
+
+    def __init__(self, max_running: int = TRAINING_JOB_WORKERS, history: int = TRAINING_JOB_HISTORY,
+                 on_success=None):
+        """
+        Initializes the job manager.
+
+        :param max_running: Maximum number of jobs training at the same time.
+        :param history: Number of finished jobs kept for status queries.
+        :param on_success: Optional callable ``on_success(address)`` run after a model was trained.
+        """
+        self.max_running = max(1, max_running)
+        self.history = history
+        self.on_success = on_success
+        self._jobs = OrderedDict()
+        self._processes = {}
+        # Address of each job whose process has not exited yet, including cancelled ones
+        self._busy = {}
+        self._lock = threading.Lock()
+
+    def submit(self, address=None, data=None):
+        """
+        Queue a training job, or return the queued or running job for an identical request.
+
+        :param address: Address (or tenant identifier) to train for (None for the default model).
+        :param data: Optional list of training transactions (fetched from Etherscan when None).
+        :return: Tuple of (job status dictionary, whether a new job was created).
+        :raises ValueError: If the address is not valid.
+        """
+        if address is not None:
+            address = normalize_address(address)
+        fingerprint = request_fingerprint(address, data)
+
+        with self._lock:
+            for job in self._jobs.values():
+                if job['fingerprint'] == fingerprint and job['status'] in ACTIVE_STATES:
+                    logger.info(f"Training request matches job {job['job_id']}; not starting another.")
+                    return self._public(job), False
+
+            job = {
+                'job_id': uuid.uuid4().hex,
+                'address': address,
+                'status': QUEUED,
+                'fingerprint': fingerprint,
+                'data': data,
+                'created_at': datetime.now().isoformat(),
+                'started_at': None,
+                'finished_at': None
+            }
+            self._jobs[job['job_id']] = job
+            self._dispatch()
+            self._trim()
+            return self._public(job), True
+
+    def get(self, job_id):
+        """
+        Return the status of a job.
+
+        :param job_id: Job ID.
+        :return: Job status dictionary, or None if the job is unknown.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return self._public(job) if job is not None else None
+
+    def jobs(self):
+        """
+        Return the status of all known jobs, oldest first.
+        """
+        with self._lock:
+            return [self._public(job) for job in self._jobs.values()]
+
+    def cancel(self, job_id):
+        """
+        Cancel a queued or running job. A running job's training process is terminated; its address stays
+        busy until the process has exited and its partial files are removed.
+
+        :param job_id: Job ID.
+        :return: Job status dictionary, or None if the job is unknown.
+        :raises ValueError: If the job has already finished.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if job['status'] not in ACTIVE_STATES:
+                raise ValueError(f"Job {job_id} has already finished with status '{job['status']}'.")
+
+            process = self._processes.get(job_id)
+            self._finish(job, CANCELLED)
+            if process is not None:
+                process.terminate()
+            else:
+                self._dispatch()
+            logger.info(f"Cancelled training job {job_id}.")
+            return self._public(job)
+
+    def stats(self):
+        """
+        Return the number of jobs in each state.
+        """
+        with self._lock:
+            counts = {state: 0 for state in (QUEUED, RUNNING, SUCCESS, FAILED, CANCELLED)}
+            for job in self._jobs.values():
+                counts[job['status']] += 1
+            return {'max_running': self.max_running, **counts}
+
+    def _dispatch(self):
+        """
+        Start queued jobs while there is room, never running two processes for the same address. Called with
+        the lock held.
+        """
+        for job in self._jobs.values():
+            if len(self._busy) >= self.max_running:
+                break
+            if job['status'] != QUEUED or job['address'] in self._busy.values():
+                continue
+
+            context = multiprocessing.get_context(WORKER_START_METHOD)
+            receiver, sender = context.Pipe(duplex=False)
+            process = context.Process(target=_run_job, args=(sender, _train_address, job['address'],
+                                                             job.pop('data')), daemon=True)
+            process.start()
+            sender.close()
+            self._processes[job['job_id']] = process
+            self._busy[job['job_id']] = job['address']
+            job['status'] = RUNNING
+            job['started_at'] = datetime.now().isoformat()
+            threading.Thread(target=self._watch, args=(job, process, receiver), daemon=True).start()
+            logger.info(f"Started training job {job['job_id']} (process {process.pid}).")
+
+    def _watch(self, job, process, receiver):
+        """
+        Wait for a job's process to exit, record the outcome and start the next jobs.
+        """
+        try:
+            result, delta = receiver.recv()
+            metrics.merge(delta)
+        except EOFError:
+            # The process exited without a result (terminated, or killed e.g. for running out of memory)
+            result = None
+        process.join()
+        receiver.close()
+
+        with self._lock:
+            self._processes.pop(job['job_id'], None)
+            # Only now, with its partial files removed below, may another job for the address start
+            del self._busy[job['job_id']]
+            if job['status'] == CANCELLED:
+                self._remove_partial_bundles(job['address'])
+            elif result is None:
+                self._finish(job, FAILED, error=f"Training process exited with code {process.exitcode}")
+            elif result['status'] == SUCCESS:
+                self._finish(job, SUCCESS, model_version=result.get('model_version'),
+                             training_rows=result.get('training_rows'),
+                             duration_seconds=result.get('duration_seconds'))
+            else:
+                self._finish(job, FAILED, error=result.get('error'))
+            self._dispatch()
+
+        # A job cancelled just after it finished may still have replaced the model
+        if result is not None and result['status'] == SUCCESS and self.on_success is not None:
+            self.on_success(job['address'])
+        if job['status'] == SUCCESS:
+            logger.info(f"Training job {job['job_id']} completed.")
+        elif job['status'] == FAILED:
+            logger.error(f"Training job {job['job_id']} failed: {job['error']}")
+
+    def _finish(self, job, status, **details):
+        job.pop('data', None)
+        job.update(details)
+        job['status'] = status
+        job['finished_at'] = datetime.now().isoformat()
+
+    def _trim(self):
+        """
+        Forget the oldest finished jobs beyond the history limit. Called with the lock held.
+        """
+        finished = [job_id for job_id, job in self._jobs.items() if job['status'] not in ACTIVE_STATES]
+        for job_id in finished[:max(0, len(finished) - self.history)]:
+            del self._jobs[job_id]
+
+    @staticmethod
+    def _remove_partial_bundles(address):
+        """
+        Delete temporary bundle files and forest directories left behind by a terminated training process.
+        """
+        for path in glob.glob(os.path.join(model_registry.model_path(address), '.bundle-*.tmp')):
+            try:
+                if os.path.isdir(path):
+                    shutil.rmtree(path)
+                else:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    @staticmethod
+    def _public(job):
+        return {key: value for key, value in job.items() if key not in ('fingerprint', 'data')}
@@ -11,15 +11,79 @@ Adheres to the principle of Single Responsibility by isolating all configuration
 # Etherscan API Key - Used to authenticate requests to the Etherscan API
 API_KEY = "YOUR_ETHERSCAN_API_KEY"
 
-# Base URL for Etherscan API
+# Base URL for Etherscan API (the ETHERSCAN_BASE_URL environment variable overrides it, e.g. with a local stand-in)
 BASE_URL = "https://api.etherscan.io/api"
 
 # Timeout settings for API requests
 REQUEST_TIMEOUT = 10  # seconds
 
+# Etherscan history fetching
+ETHERSCAN_CONCURRENCY = 5  # Requests in flight while fetching one address's history
+ETHERSCAN_MAX_RESULTS = 10000  # Records Etherscan returns at most for one txlist query
+
 # Retry settings in case of request failure
 MAX_RETRIES = 3  # Number of times to retry on failure
 RETRY_BACKOFF = 2  # Backoff multiplier for retries
+RETRY_BASE_DELAY = 0.5  # Upper bound of the first jittered retry delay, in seconds
+RETRY_MAX_DELAY = 30  # Upper bound of any retry delay, in seconds
+
+# Client-side rate limit shared by all Etherscan requests of all processes, set slightly below the API plan's quota
+# (5 calls per second on the free plan) so that network jitter does not push a one-second window over it
+ETHERSCAN_CALLS_PER_SECOND = 4.5
+ETHERSCAN_BURST = 1  # Calls allowed at once after a quiet period (1 keeps every one-second window within the quota)
+ETHERSCAN_RATE_LIMIT_PATH = 'data/rate_limit.db'  # SQLite database file holding the bucket shared by processes
+
+# Local store of fetched transaction histories, synced incrementally from Etherscan
+TRANSACTION_STORE_PATH = 'data/transactions.db'  # SQLite database file
+TRANSACTION_SYNC_INTERVAL = 300  # Seconds a synced history is reused without asking Etherscan for new blocks
+
+# Cache of timestamp to block lookups used for day-window queries
+BLOCK_CACHE_PATH = 'data/blocks.db'  # SQLite database file
+BLOCK_LOOKUP_TOLERANCE = 3600  # Seconds a cached lookup may precede a window start and still be used for it
+
+# Maximum number of trained models (one per address) kept loaded in memory
+MODEL_CACHE_SIZE = 128
+
+# Detection results cached per model version and transaction hash (in each detection worker)
+RESULT_CACHE_SIZE = 20000  # Maximum number of cached results (0 disables the cache)
+RESULT_CACHE_TTL = 600  # Seconds a cached result stays valid
+
+# Start method of all worker processes (detection, training jobs, bulk training). 'spawn' starts each from a
+# fresh interpreter: forking the threaded API process could copy a lock held by another thread, leaving the child
+# blocked forever. ('forkserver' children would keep the working directory the server was started in.)
+WORKER_START_METHOD = 'spawn'
+
+# Maximum number of worker processes used for bulk (multi-address) training
+TRAINING_WORKERS = 4
+
+# Training jobs started through the API
+TRAINING_JOB_WORKERS = 1  # Jobs training at the same time, each in its own process
+TRAINING_JOB_HISTORY = 100  # Finished jobs kept for status queries
+
+# Detection executor settings for the API
+DETECT_WORKERS = 4  # Number of workers running detection requests
+DETECT_USE_PROCESSES = True  # Run detection in worker processes (False: threads in the API process)
+DETECT_QUEUE_DEPTH = 16  # Requests allowed to wait for a free worker before returning 503
+DETECT_RETRY_AFTER = 1  # Seconds clients are asked to wait when the queue is full
+
+# /detect/stream settings
+DETECT_STREAM_CHUNK_SIZE = 1000  # Transactions analyzed per chunk
+DETECT_STREAM_READ_AHEAD = 2  # Chunks read from the request body ahead of detection before reading pauses
+DETECT_STREAM_MAX_LINE_BYTES = 1048576  # Longest accepted NDJSON line; longer lines end the stream with an error
+
+# Undelivered anomaly alerts kept per /alerts WebSocket subscriber; older ones are dropped first
+ALERT_BUFFER_SIZE = 1000
+
+# Warm-up of the API at startup; /ready reports not-ready until it has finished
+WARMUP_ENABLED = True  # Preload models and run a synthetic batch through the pipeline at startup
+WARMUP_ROWS = 1000  # Transactions in the synthetic warm-up batch
+WARMUP_ADDRESSES = []  # Addresses whose models are warmed up besides the default model
+
+# Micro-batching of small /detect requests (opt-in)
+DETECT_COALESCE = False  # Gather small requests into one detection pass
+COALESCE_MAX_WAIT_MS = 5  # Longest time a request waits for others to join its batch
+COALESCE_MAX_BATCH = 256  # Transactions at which a batch is dispatched immediately
+COALESCE_MAX_BODY_BYTES = 16384  # Larger requests are processed on their own
 
 # Environment settings
 ENVIRONMENT = "development"  # Change to "production" in production environment
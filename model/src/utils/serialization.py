@@ -0,0 +1,50 @@
+"""
+serialization.py
+
+This module provides fast JSON encoding for detection results. Encoding is done by orjson: NumPy scalars and
+arrays, datetimes and the built-in types are encoded natively, without a Python hook per object, and NaN or
+infinite floats become null. Only pandas Timestamps, which orjson does not know, go through a fallback hook.
+
+Adheres to the Single Responsibility Principle (SRP) by focusing only on serializing results to JSON.
+"""
+
+import orjson
+import numpy as np
+import pandas as pd
+
+# Options used for all documents
+OPTIONS = orjson.OPT_SERIALIZE_NUMPY
+
+
+def _default(obj):
+    """
+    Encode the types orjson does not handle natively.
+    """
+    if isinstance(obj, pd.Timestamp):
+        return obj.isoformat()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj, indent: bool = False) -> bytes:
+    """
+    Encode an object as JSON.
+
+    :param obj: Object to encode (e.g. a list of detection results).
+    :param indent: Whether to pretty-print with an indentation of two spaces.
+    :return: UTF-8 encoded JSON document
+    """
+    return orjson.dumps(obj, default=_default, option=(OPTIONS | orjson.OPT_INDENT_2) if indent else OPTIONS)
+
+
+def dump(obj, path: str, indent: bool = True):
+    """
+    Write an object as JSON to a file.
+
+    :param obj: Object to encode.
+    :param path: Output file path.
+    :param indent: Whether to pretty-print with an indentation of two spaces.
+    """
+    with open(path, 'wb') as f:
+        f.write(dumps(obj, indent=indent))
@@ -0,0 +1,201 @@
+"""
+warmup.py
+
+This module warms up the API before it takes traffic. It loads the stored models into the model cache and runs
+a synthetic batch of transactions through the full detection pipeline and the response encoder, so imports,
+model deserialization and the first-call overhead of pandas and scikit-learn are paid at startup rather than
+by the first requests. Detection workers are spawned and start cold, so each one runs the same warm-up in its
+pool initializer before it takes its first call. The progress and the measured durations are tracked for the
+readiness probe.
+
+Adheres to the Single Responsibility Principle (SRP) by focusing only on warming up the service.
+"""
+
+import os
+import time
+import asyncio
+import numpy as np
+from datetime import datetime
+
+from .main import detect_anomalies
+from .anomaly_detection.model_registry import model_registry
+from .metrics import metrics
+from .utils.config import WARMUP_ROWS, WARMUP_ADDRESSES
+from .utils.serialization import dumps
+from .utils.logger import get_logger
+
+# Initialize logger
+logger = get_logger(__name__)
+
+# Warm-up states
+PENDING = 'pending'
+WARMING = 'warming'
+READY = 'ready'
+FAILED = 'failed'
+
+
+def synthetic_transactions(n_rows: int = WARMUP_ROWS, seed: int = 0, start: int = 0, prefix: str = '0xwarmup'):
+    """
+    Generate a deterministic batch of raw transactions, shaped like API input.
+
+    :param n_rows: Number of transactions.
+    :param seed: Seed for the random number generator.
+    :param start: Index of the first transaction, used for its hash and timestamp.
+    :param prefix: Prefix of the transaction hashes.
+    :return: List of transaction dictionaries
+    """
+    rng = np.random.default_rng(seed)
+    values = rng.integers(1, 10 ** 18, size=n_rows)
+    gas = rng.choice([21000, 50000, 150000], size=n_rows)
+    gas_prices = rng.integers(1, 100, size=n_rows) * 10 ** 9
+    return [{
+        'hash': f'{prefix}{start + i:x}',
+        'timeStamp': str(1678901234 + start + i),
+        'value': str(int(values[i])),
+        'gas': str(int(gas[i])),
+        'gasPrice': str(int(gas_prices[i]))
+    } for i in range(n_rows)]
+
+
+def warm_up_models(addresses, n_rows: int = WARMUP_ROWS):
+    """
+    Load the models of the given addresses and run a synthetic batch through the pipeline for each.
+
+    Addresses without a stored model are skipped. The result cache is not used, so no synthetic results
+    are kept.
+
+    :param addresses: Addresses whose models are warmed up (None for the default model).
+    :param n_rows: Transactions in the synthetic batch.
+    :return: Dictionary with the seconds spent loading models and running the pipeline, and the addresses
+             warmed up
+    """
+    transactions = synthetic_transactions(n_rows)
+    load_seconds = pipeline_seconds = 0.0
+    warmed = []
+    for address in addresses:
+        if not model_registry.exists(address):
+            continue
+        start = time.perf_counter()
+        model_registry.get(address)
+        load_seconds += time.perf_counter() - start
+
+        start = time.perf_counter()
+        dumps(detect_anomalies(transactions, address=address))
+        pipeline_seconds += time.perf_counter() - start
+        warmed.append(address)
+    return {'model_load': load_seconds, 'pipeline': pipeline_seconds, 'models': warmed}
+
+
+def warm_up_worker(addresses=None, n_rows: int = WARMUP_ROWS):
+    """
+    Warm up a detection worker. Used as the detection pool's initializer, so it runs in every worker process
+    before the worker takes its first call. Failures are logged rather than raised, since a failing initializer
+    would break the pool.
+
+    :param addresses: Addresses whose models are warmed up; defaults to the default model and WARMUP_ADDRESSES.
+    :param n_rows: Transactions in the synthetic batch.
+    """
+    if addresses is None:
+        addresses = [None] + list(WARMUP_ADDRESSES)
+    try:
+        warm_up_models(addresses, n_rows)
+    except Exception as e:
+        logger.error(f"Worker warm-up failed: {str(e)}", exc_info=True)
+
+
+class WarmupStatus:
+    """
+    WarmupStatus runs the warm-up once and reports its progress to the readiness probe.
+    """
+
+    def __init__(self, addresses=None, n_rows: int = WARMUP_ROWS):
+        """
+        Initializes a pending warm-up.
+
+        :param addresses: Addresses whose models are warmed up; defaults to the default model and
+                          WARMUP_ADDRESSES.
+        :param n_rows: Transactions in the synthetic batch.
+        """
+        self.addresses = addresses if addresses is not None else [None] + list(WARMUP_ADDRESSES)
+        self.n_rows = n_rows
+        self.state = PENDING
+        self.started_at = None
+        self.finished_at = None
+        self.seconds = None
+        self.stages = {}
+        self.models = []
+        self.error = None
+        self._task = None
+
+    @property
+    def ready(self) -> bool:
+        """
+        Whether the warm-up has finished. A failed warm-up also counts as finished, so a broken model does
+        not keep the whole service out of rotation; the error is reported instead.
+        """
+        return self.state in (READY, FAILED)
+
+    def start(self, executor=None):
+        """
+        Run the warm-up in the background on the running event loop.
+
+        :param executor: Optional BoundedExecutor whose workers are warmed up as well.
+        :return: asyncio.Task of the warm-up
+        """
+        if self._task is None:
+            self._task = asyncio.ensure_future(self.run(executor))
+        return self._task
+
+    async def run(self, executor=None):
+        """
+        Warm up the models in a thread, then start the workers of the executor, which warm up in its initializer.
+
+        :param executor: Optional BoundedExecutor whose workers are warmed up as well.
+        """
+        self.state = WARMING
+        self.started_at = datetime.now()
+        start = time.perf_counter()
+        logger.info("Warming up the detection pipeline...")
+        try:
+            loop = asyncio.get_running_loop()
+            warmed = await loop.run_in_executor(None, warm_up_models, self.addresses, self.n_rows)
+            self.models = warmed.pop('models')
+            self.stages.update(warmed)
+
+            if executor is not None and self.models:
+                # Starts the workers, which warm up in their initializer before running a call. A fast worker
+                # may take two of these calls, so another one can still be warming up when this returns; it
+                # only takes requests once it is warm
+                stage_start = time.perf_counter()
+                await asyncio.gather(*[
+                    asyncio.wrap_future(executor.submit(os.getpid))
+                    for _ in range(executor.max_workers)
+                ])
+                self.stages['workers'] = time.perf_counter() - stage_start
+            self.state = READY
+        except Exception as e:
+            logger.error(f"Warm-up failed: {str(e)}", exc_info=True)
+            self.error = str(e)
+            self.state = FAILED
+        finally:
+            self.seconds = time.perf_counter() - start
+            self.finished_at = datetime.now()
+            metrics.set_gauge('warmup_seconds', self.seconds)
+        logger.info(f"Warm-up {self.state} after {self.seconds:.2f}s.")
+
+    def report(self):
+        """
+        Return the warm-up progress.
+
+        :return: Dictionary with the readiness, state, timestamps, durations and warmed-up models
+        """
+        return {
+            'ready': self.ready,
+            'status': self.state,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'warmup_seconds': self.seconds,
+            'stages': dict(self.stages),
+            'models': [address if address is not None else 'default' for address in self.models],
+            'error': self.error
+        }
@@ -0,0 +1,41 @@
+import os
+import functools
+import pytest
+
+# Address whose synthetic history the Etherscan stand-in serves when the tests run offline
+OFFLINE_ADDRESS = '0x' + '5a' * 20
+
+_stub = None
+
+
+def pytest_configure(config):
+    """
+    Without an ETHERSCAN_API_KEY, point the Etherscan tests at a local stand-in serving a synthetic history.
+    """
+    global _stub
+    if os.getenv('ETHERSCAN_API_KEY'):
+        return
+    from src.api.etherscan_stub import EtherscanStub, synthetic_history
+
+    _stub = EtherscanStub({OFFLINE_ADDRESS: synthetic_history(OFFLINE_ADDRESS, 2000, blocks=50000)})
+    os.environ['ETHERSCAN_BASE_URL'] = _stub.start()
+    os.environ['ETHERSCAN_API_KEY'] = 'offline'
+    os.environ.setdefault('ETHERSCAN_ADDRESS', OFFLINE_ADDRESS)
+
+
+def pytest_unconfigure(config):
+    if _stub is not None:
+        _stub.stop()
+        for name in ('ETHERSCAN_BASE_URL', 'ETHERSCAN_API_KEY'):
+            os.environ.pop(name, None)
+
+
+@pytest.fixture
+def make_transactions():
+    """
+    Return a generator of deterministic raw transactions, called as make_transactions(n_rows, seed, start=0).
+    Give batches that must not share cached results distinct start indices.
+    """
+    from src.warmup import synthetic_transactions
+
+    return functools.partial(synthetic_transactions, prefix='0x')
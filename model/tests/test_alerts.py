@@ -0,0 +1,136 @@
+import json
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+from src import app as app_module
+from src.main import train_model
+from src.detection_pool import BoundedExecutor
+from src.alert_hub import AlertHub, DEFAULT_CHANNEL
+
+ADDRESS = '0x' + 'ab' * 20
+
+
+def result(tx_hash, is_anomaly=True):
+    return {'transaction_hash': tx_hash, 'is_anomaly': is_anomaly, 'anomaly_score': -0.1}
+
+
+def test_publish_to_followers_only():
+    async def scenario():
+        hub = AlertHub(buffer_size=10)
+        follower, other = hub.connect(), hub.connect()
+        hub.subscribe(follower, ['0xabc'])
+        hub.subscribe(other, [DEFAULT_CHANNEL])
+
+        assert hub.has_subscribers('0xabc') and hub.has_subscribers(None)
+        assert not hub.has_subscribers('0xdef')
+        assert hub.publish('0xabc', [result('0x1'), result('0x2', is_anomaly=False)]) == 1
+
+        messages = [json.loads(m) for m in await follower.next_messages()]
+        assert messages == [{'type': 'alert', 'address': '0xabc', 'result': result('0x1')}]
+        assert not other.buffer, "Subscribers of other addresses should not get the alert."
+
+        hub.disconnect(follower)
+        assert not hub.has_subscribers('0xabc'), "Disconnecting should remove the subscriber's addresses."
+        assert hub.stats()['subscribers'] == 1
+
+    asyncio.run(scenario())
+
+
+def test_slow_subscriber_drops_oldest():
+    async def scenario():
+        hub = AlertHub(buffer_size=3)
+        subscriber = hub.connect()
+        hub.subscribe(subscriber, ['0xabc'])
+
+        hub.publish('0xabc', [result(f'0x{i}') for i in range(5)])
+
+        messages = [json.loads(m) for m in await subscriber.next_messages()]
+        assert messages[0] == {'type': 'dropped', 'count': 2, 'total': 2}
+        assert [m['result']['transaction_hash'] for m in messages[1:]] == ['0x2', '0x3', '0x4'], \
+            "The oldest alerts should be dropped first."
+        assert subscriber.dropped == 2 and hub.stats()['dropped'] == 2
+
+        hub.publish('0xabc', [result('0x5')])
+        messages = [json.loads(m) for m in await subscriber.next_messages()]
+        assert [m['type'] for m in messages] == ['alert'], "Drops should only be reported once."
+
+    asyncio.run(scenario())
+
+
+def test_thousands_of_idle_subscribers():
+    async def scenario(n_subscribers):
+        hub = AlertHub(buffer_size=100)
+        subscribers = [hub.connect() for _ in range(n_subscribers)]
+        for i, subscriber in enumerate(subscribers):
+            hub.subscribe(subscriber, [f'0x{i % 10}'])
+        waiters = [asyncio.ensure_future(subscriber.next_messages()) for subscriber in subscribers]
+        await asyncio.sleep(0)
+
+        hub.publish('0x3', [result('0xaa')])
+        await asyncio.sleep(0)
+
+        woken = [i for i, waiter in enumerate(waiters) if waiter.done()]
+        assert woken == list(range(3, n_subscribers, 10)), "Only the followers of the address should wake up."
+        for waiter in waiters:
+            waiter.cancel()
+        for subscriber in subscribers:
+            hub.disconnect(subscriber)
+        assert hub.stats() == {'subscribers': 0, 'addresses': 0, 'published': 1, 'buffered': 0, 'dropped': 0}
+
+    asyncio.run(scenario(5000))
+
+
+def test_addresses_are_normalized():
+    async def scenario():
+        hub = AlertHub(buffer_size=10)
+        checksummed, lower = hub.connect(), hub.connect()
+        hub.subscribe(checksummed, [ADDRESS.upper().replace('0X', '0x')])
+        hub.subscribe(lower, [ADDRESS])
+
+        assert hub.has_subscribers(ADDRESS.upper().replace('0X', '0x'))
+        assert hub.publish(ADDRESS.upper().replace('0X', '0x'), [result('0x1')]) == 1
+        for subscriber in (checksummed, lower):
+            messages = [json.loads(m) for m in await subscriber.next_messages()]
+            assert messages == [{'type': 'alert', 'address': ADDRESS, 'result': result('0x1')}], \
+                "Both spellings of the address should share one channel."
+
+        hub.unsubscribe(checksummed, [ADDRESS])
+        assert checksummed.addresses == set() and hub.stats()['addresses'] == 1
+        with pytest.raises(ValueError):
+            hub.subscribe(lower, ['../etc'])
+
+    asyncio.run(scenario())
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch, make_transactions):
+    monkeypatch.chdir(tmp_path)
+    train_model(make_transactions(300, seed=0))
+    pool = BoundedExecutor(max_workers=1, queue_depth=1, use_processes=False)
+    monkeypatch.setattr(app_module, 'detection_pool', pool)
+    monkeypatch.setattr(app_module, 'alert_hub', AlertHub())
+    yield TestClient(app_module.app)
+    pool.shutdown()
+
+
+def test_websocket_alerts(client, make_transactions):
+    transactions = make_transactions(200, seed=1, start=1000)
+
+    with client.websocket_connect('/alerts') as websocket:
+        websocket.send_json({'action': 'subscribe', 'addresses': [DEFAULT_CHANNEL]})
+        assert websocket.receive_json() == {'type': 'subscribed', 'addresses': [DEFAULT_CHANNEL]}
+        websocket.send_json({'action': 'listen'})
+        assert websocket.receive_json()['type'] == 'error'
+
+        response = client.post('/detect', json={'transactions': transactions})
+        anomalies = [r for r in response.json()['results'] if r['is_anomaly']]
+        assert anomalies, "The batch should contain anomalies."
+        alerts = [websocket.receive_json() for _ in anomalies]
+
+        assert [a['result'] for a in alerts] == anomalies
+        assert all(a['type'] == 'alert' and a['address'] == DEFAULT_CHANNEL for a in alerts)
+
+        websocket.send_json({'action': 'unsubscribe', 'addresses': [DEFAULT_CHANNEL]})
+        assert websocket.receive_json() == {'type': 'subscribed', 'addresses': []}
+
+    assert client.get('/model/status').json()['alerts']['subscribers'] == 0
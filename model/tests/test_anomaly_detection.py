@@ -1,6 +1,7 @@
 import pytest
+import numpy as np
 import pandas as pd
-from src.anomaly_detection.isolation_forest import AnomalyDetectorIsolationForest
+from src.anomaly_detection.isolation_forest import AnomalyDetectorIsolationForest, build_results, top_k_indices
 
 
 @pytest.fixture
@@ -27,3 +28,58 @@ def test_detect_anomalies(sample_data):
 
     assert 'anomaly' in result_df.columns, "Anomaly detection failed."
     assert result_df['anomaly'].isin(['normal', 'anomaly']).all(), "Invalid anomaly labels detected."
+
+
+def test_detect_anomalies_columnar(sample_data):
+    sample_data['hash'] = [f'0x{i}' for i in range(len(sample_data))]
+    sample_data['timeStamp'] = pd.to_datetime([1678901234] * len(sample_data), unit='s')
+    detector = AnomalyDetectorIsolationForest(sample_data)
+    detector.train_model()
+    columns = detector.detect_anomalies_columnar()
+
+    assert len(columns['is_anomaly']) == len(sample_data), "Columnar result has the wrong length."
+    assert list(columns['transaction_hash']) == list(sample_data['hash']), "Hashes are misaligned."
+    assert all(columns['timestamp'] == '2023-03-15T17:27:14'), "Timestamps were not formatted as ISO-8601."
+
+
+def test_build_results_schema(sample_data):
+    detector = AnomalyDetectorIsolationForest(sample_data)
+    detector.train_model()
+    results = build_results(detector.detect_anomalies_columnar())
+
+    assert len(results) == len(sample_data), "Result count does not match input."
+    for result in results:
+        assert result['transaction_hash'] == 'N/A', "Missing hash column should yield 'N/A'."
+        assert result['transaction_details']['timestamp'] == 'N/A', "Missing timestamp should yield 'N/A'."
+        assert isinstance(result['is_anomaly'], bool), "is_anomaly should be a Python bool."
+        assert result['anomaly_types'], "Every result should carry at least one anomaly type."
+
+
+def test_anomaly_scores_match_sklearn(sample_data):
+    detector = AnomalyDetectorIsolationForest(sample_data)
+    detector.train_model()
+    columns = detector.detect_anomalies_columnar()
+    expected = detector.model.decision_function(detector.scaled_features)
+
+    assert np.allclose(columns['anomaly_score'], expected), "Scores should match the sklearn decision function."
+    assert (columns['is_anomaly'] == (expected < 0)).all(), "Labels should be derived from the scores."
+
+
+def test_top_k_returns_most_anomalous(sample_data):
+    sample_data['hash'] = [f'0x{i}' for i in range(len(sample_data))]
+    detector = AnomalyDetectorIsolationForest(sample_data)
+    detector.train_model()
+    scores = detector.detect_anomalies_columnar()['anomaly_score']
+    columns = detector.detect_anomalies_columnar(top_k=3)
+
+    expected = [f'0x{i}' for i in np.argsort(scores, kind='stable')[:3]]
+    assert list(columns['transaction_hash']) == expected, "top_k should return the lowest scores, lowest first."
+    assert len(build_results(columns)) == 3, "top_k should limit the number of results."
+
+
+def test_top_k_indices():
+    scores = np.array([0.3, -0.2, 0.1, -0.2, -0.5])
+
+    assert top_k_indices(scores, 3).tolist() == [4, 1, 3], "Ties should be broken by position."
+    assert top_k_indices(scores, 10).tolist() == [4, 1, 3, 2, 0], "k larger than n should return everything."
+    assert len(top_k_indices(scores, 0)) == 0
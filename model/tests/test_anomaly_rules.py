@@ -0,0 +1,48 @@
+import pytest
+import pandas as pd
+from src.anomaly_detection.anomaly_rules import (
+    AnomalyTypeMatrix, ThresholdRule, compute_thresholds, get_rules, register_rule, unregister_rule
+)
+
+
+@pytest.fixture
+def sample_features():
+    data = {
+        'value': [100.0, 200.0, 5000.0],
+        'gas': [21000.0, 90000.0, 21000.0],
+        'gasPrice': [50.0, 50.0, 50.0],
+        'value_per_gas': [0.005, 0.002, 0.24]
+    }
+    return pd.DataFrame(data)
+
+
+def test_matrix_matches_thresholds(sample_features):
+    thresholds = {'value': 1000.0, 'gas': 50000.0, 'gasPrice': 100.0, 'value_per_gas': 0.1}
+    matrix = AnomalyTypeMatrix.evaluate(sample_features, thresholds)
+
+    assert matrix.mask.shape == (3, len(get_rules())), "Mask should be rows x rules."
+    assert matrix.counts()['high_value_transaction'] == 1, "High value rule count is wrong."
+    assert matrix.row_types(0)[0]['type'] == 'normal', "Row below all thresholds should be normal."
+    assert [t['type'] for t in matrix.row_types(2)] == ['high_value_transaction', 'unusual_value_gas_ratio']
+
+
+def test_details_are_optional(sample_features):
+    thresholds = {'value': 1000.0}
+    matrix = AnomalyTypeMatrix.evaluate(sample_features, thresholds)
+
+    assert 'details' not in matrix.row_types(2, include_details=False)[0], "Details should be skipped."
+    assert matrix.row_types(2)[0]['details'] == "Transaction value (5000.0) exceeds threshold (1000.0)"
+
+
+def test_register_rule(sample_features):
+    rule = ThresholdRule('low_gas_price_spike', 'gasPrice', 'low', "Gas price ({value}) above {threshold}",
+                         percentile=50, threshold_key='gasPrice_p50')
+    register_rule(rule)
+    try:
+        thresholds = compute_thresholds(sample_features)
+        assert 'gasPrice_p50' in thresholds and 'gasPrice' in thresholds, "Registered rule threshold was not computed."
+        assert 'low_gas_price_spike' in [r.name for r in get_rules()], "Rule was not registered."
+    finally:
+        unregister_rule('low_gas_price_spike')
+
+    assert 'low_gas_price_spike' not in [r.name for r in get_rules()], "Rule was not unregistered."
@@ -0,0 +1,69 @@
+import asyncio
+import pytest
+from src.api.api_utils import TokenBucket
+from src.api.block_clock import BlockClock, MERGE_BLOCK, MERGE_TIMESTAMP
+from src.api.etherscan_api import EtherscanAPI
+from src.api.etherscan_stub import EtherscanStub, synthetic_history, FIRST_TIMESTAMP, BLOCK_TIME
+
+ADDRESS = '0x' + '12' * 20
+DAY = 24 * 60 * 60
+
+
+@pytest.fixture(scope='module')
+def history():
+    return synthetic_history(ADDRESS, 20000, blocks=100000)
+
+
+@pytest.fixture
+def stub(history):
+    stub = EtherscanStub({ADDRESS: history})
+    stub.start()
+    yield stub
+    stub.stop()
+
+
+class Clock:
+    def __init__(self, now):
+        self.time = now
+
+    def __call__(self):
+        return self.time
+
+
+def window(history, now, days):
+    return [t['hash'] for t in reversed(history) if now - days * DAY <= int(t['timeStamp']) <= now]
+
+
+def test_day_windows_are_exact_and_cached(stub, history, tmp_path):
+    clock = Clock(FIRST_TIMESTAMP + 90000 * BLOCK_TIME + 5)
+    path = str(tmp_path / 'blocks.db')
+    api = EtherscanAPI('key', stub.base_url, rate_limiter=TokenBucket(rate=1000, capacity=1000),
+                       clock=BlockClock(path, clock=clock))
+
+    assert [t['hash'] for t in api.get_recent_transactions(ADDRESS, days=2)] == window(history, clock.time, 2)
+    assert stub.calls['getblocknobytime'] == 1
+    assert stub.calls['eth_blockNumber'] == 0, "The newest block should be bounded without a request."
+
+    clock.time += 600
+    api.clock = BlockClock(path, clock=clock)
+    assert [t['hash'] for t in api.get_recent_transactions(ADDRESS, days=2)] == window(history, clock.time, 2)
+    assert stub.calls['getblocknobytime'] == 1, "A repeated window should be resolved from the cache on disk."
+
+    clock.time += 2 * 3600
+    assert [t['hash'] for t in api.get_recent_transactions(ADDRESS, days=2)] == window(history, clock.time, 2)
+    assert stub.calls['getblocknobytime'] == 2, "A cached lookup older than the tolerance should be refreshed."
+
+
+def test_block_range_bounds(tmp_path):
+    clock = Clock(MERGE_TIMESTAMP + 120)
+    block_clock = BlockClock(str(tmp_path / 'blocks.db'), clock=clock)
+
+    assert block_clock.latest_block_bound() == MERGE_BLOCK + 10
+
+    async def lookup(timestamp):
+        return MERGE_BLOCK + 5
+
+    assert asyncio.run(block_clock.block_range(MERGE_TIMESTAMP + 60, lookup)) == (MERGE_BLOCK + 5, MERGE_BLOCK + 10)
+    clock.time += 1200
+    assert block_clock.latest_block_bound() == MERGE_BLOCK + 5 + 105
+    assert block_clock.lookups == 1
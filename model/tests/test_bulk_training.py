@@ -0,0 +1,37 @@
+import os
+import pytest
+from src.bulk_training import train_many, normalize_jobs
+from src.anomaly_detection.model_bundle import model_exists
+
+ADDRESS = '0x' + 'ab' * 20
+
+
+def test_normalize_jobs():
+    jobs = normalize_jobs([ADDRESS.upper().replace('0X', '0x'), ('tenant-1', [])])
+
+    assert jobs == [(ADDRESS, None), ('tenant-1', [])]
+    with pytest.raises(ValueError):
+        normalize_jobs(['../x'])
+    with pytest.raises(ValueError):
+        normalize_jobs([ADDRESS, ADDRESS.upper().replace('0X', '0x')])
+
+
+def test_train_many_isolates_failures(tmp_path, monkeypatch, make_transactions):
+    monkeypatch.chdir(tmp_path)
+    progress = []
+    jobs = {
+        ADDRESS: make_transactions(200, 0),
+        'tenant-1': make_transactions(200, 1),
+        'broken': [{'unexpected': 1}]
+    }
+
+    results = train_many(jobs, max_workers=2, progress=lambda r, done, total: progress.append((done, total)))
+
+    assert [r['address'] for r in results] == [ADDRESS, 'tenant-1', 'broken'], "Results should keep job order."
+    assert [r['status'] for r in results] == ['success', 'success', 'failed'], \
+        "A failing address should not affect the others."
+    assert results[0]['training_rows'] == 200
+    assert 'error' in results[2]
+    assert progress == [(1, 3), (2, 3), (3, 3)], "Progress should be reported for every address."
+    assert model_exists(os.path.join('models', 'addresses', ADDRESS))
+    assert not model_exists(os.path.join('models', 'addresses', 'broken'))
@@ -0,0 +1,115 @@
+import json
+import pytest
+import pyarrow as pa
+from fastapi.testclient import TestClient
+from src import app as app_module
+from src.main import train_model, detect_anomalies, process_columnar_input, load_detector, score_columns, to_frame
+from src.detection_pool import BoundedExecutor
+from src.data_processing import columnar_io
+from src.anomaly_detection.anomaly_rules import NORMAL_TYPE
+
+
+def make_table(transactions):
+    return pa.table({
+        'hash': [t['hash'] for t in transactions],
+        'timeStamp': pa.array([int(t['timeStamp']) for t in transactions], type=pa.int64()),
+        'value': pa.array([int(t['value']) for t in transactions], type=pa.int64()),
+        'gas': pa.array([int(t['gas']) for t in transactions], type=pa.int64()),
+        'gasPrice': pa.array([int(t['gasPrice']) for t in transactions], type=pa.int64())
+    })
+
+
+def to_dicts(table):
+    """Result table rows in the shape of the JSON results, without anomaly details."""
+    rows = table.to_pylist()
+    for row in rows:
+        row['anomaly_types'] = [(t['type'], t['severity']) for t in row['anomaly_types']]
+    return rows
+
+
+def expected_rows(results):
+    return [{
+        'transaction_hash': r['transaction_hash'],
+        'is_anomaly': r['is_anomaly'],
+        'anomaly_score': r['anomaly_score'],
+        'anomaly_types': [(t['type'], t['severity']) for t in r['anomaly_types']],
+        'value': r['transaction_details']['value'],
+        'gas': r['transaction_details']['gas'],
+        'gasPrice': r['transaction_details']['gasPrice'],
+        'timestamp': r['transaction_details']['timestamp']
+    } for r in results]
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch, make_transactions):
+    monkeypatch.chdir(tmp_path)
+    train_model(make_transactions(300, seed=0))
+    pool = BoundedExecutor(max_workers=1, queue_depth=1, use_processes=False)
+    monkeypatch.setattr(app_module, 'detection_pool', pool)
+    yield TestClient(app_module.app)
+    pool.shutdown()
+
+
+@pytest.mark.parametrize('fmt', ['arrow', 'parquet'])
+def test_endpoint_matches_json_results(client, fmt, make_transactions):
+    transactions = make_transactions(200, seed=1, start=1000)
+    body = columnar_io.write_table(make_table(transactions), fmt=fmt)
+
+    response = client.post(f'/detect/columnar?format={fmt}', content=body)
+
+    assert response.status_code == 200
+    assert response.headers['content-type'] == columnar_io.FORMATS[fmt]
+    table = columnar_io.read_table(response.content, fmt)
+    assert table.schema == columnar_io.RESULT_SCHEMA
+    assert to_dicts(table) == expected_rows(detect_anomalies(transactions)), \
+        "Columnar results should match the JSON results for the same transactions."
+
+
+def test_endpoint_top_k_and_arrow_file(client, make_transactions):
+    transactions = make_transactions(200, seed=2, start=2000)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_file(sink, make_table(transactions).schema) as writer:
+        writer.write_table(make_table(transactions))
+
+    response = client.post('/detect/columnar?format=arrow&top_k=5', content=sink.getvalue().to_pybytes())
+
+    assert response.status_code == 200, "The Arrow file format should be accepted as well as the stream format."
+    assert to_dicts(columnar_io.read_table(response.content)) == \
+        expected_rows(detect_anomalies(transactions, top_k=5))
+
+
+def test_endpoint_rejects_invalid_tables(client, make_transactions):
+    missing = columnar_io.write_table(make_table(make_transactions(10, seed=3)).drop(['gas']))
+
+    assert client.post('/detect/columnar', content=missing).status_code == 422
+    assert client.post('/detect/columnar', content=b'not arrow').status_code == 422
+    assert client.post('/detect/columnar?format=csv', content=missing).status_code == 422
+
+
+def test_process_columnar_input(tmp_path, monkeypatch, make_transactions):
+    monkeypatch.chdir(tmp_path)
+    transactions = make_transactions(300, seed=4)
+    columnar_io.write_table(make_table(transactions), 'transactions.parquet', fmt='parquet')
+
+    columns = process_columnar_input('transactions.parquet', 'results.parquet', fmt='parquet')
+
+    table = columnar_io.read_table('results.parquet', 'parquet')
+    assert table.num_rows == len(columns['anomaly_score']) == 300
+    assert to_dicts(table) == expected_rows(json.loads(json.dumps(detect_anomalies(transactions))))
+
+
+def test_anomaly_type_columns_match_lists(tmp_path, monkeypatch, make_transactions):
+    monkeypatch.chdir(tmp_path)
+    train_model(make_transactions(300, seed=0))
+    detector, _ = load_detector()
+    columns = score_columns(to_frame(make_transactions(100, seed=5)), detector)
+    n_rows = len(columns['anomaly_score'])
+
+    offsets, types, severities = columns['anomaly_types'].to_columns(n_rows)
+    lists = columns['anomaly_types'].to_lists(n_rows)
+
+    assert offsets[0] == 0 and offsets[-1] == len(types) == len(severities)
+    assert any(anomaly_types for anomaly_types in lists), "Some rows should have triggered a rule."
+    for i, anomaly_types in enumerate(lists):
+        pairs = list(zip(types[offsets[i]:offsets[i + 1]], severities[offsets[i]:offsets[i + 1]]))
+        assert pairs == [(t['type'], t['severity']) for t in anomaly_types or [NORMAL_TYPE]]
@@ -0,0 +1,42 @@
+import pytest
+import numpy as np
+from sklearn.ensemble import IsolationForest
+from src.anomaly_detection.compiled_forest import CompiledIsolationForest, NonFiniteFeatures
+
+
+@pytest.fixture
+def sample_data():
+    rng = np.random.default_rng(0)
+    return rng.standard_normal((500, 5)) * [1, 10, 100, 1, 1000]
+
+
+@pytest.mark.parametrize('params', [{}, {'max_features': 0.6}, {'max_samples': 50, 'n_estimators': 20}])
+def test_scores_match_sklearn(sample_data, params):
+    model = IsolationForest(contamination=0.01, random_state=42, **params).fit(sample_data)
+    compiled = CompiledIsolationForest.from_sklearn(model)
+    X = sample_data * 1.5
+
+    np.testing.assert_allclose(compiled.score_samples(X), model.score_samples(X), atol=1e-12)
+    np.testing.assert_allclose(compiled.decision_function(X), model.decision_function(X), atol=1e-12)
+    assert (compiled.predict(X) == model.predict(X)).all(), "Predictions differ from sklearn."
+
+
+def test_array_round_trip(sample_data):
+    model = IsolationForest(contamination=0.01, random_state=42).fit(sample_data)
+    compiled = CompiledIsolationForest.from_sklearn(model)
+    restored = CompiledIsolationForest.from_arrays(compiled.to_arrays())
+
+    np.testing.assert_array_equal(restored.score_samples(sample_data), compiled.score_samples(sample_data))
+
+
+@pytest.mark.parametrize('value', [np.nan, np.inf, 1e39])
+def test_rejects_non_finite_features(sample_data, value):
+    model = IsolationForest(contamination=0.01, random_state=42).fit(sample_data)
+    compiled = CompiledIsolationForest.from_sklearn(model)
+    X = sample_data[:3].copy()
+    X[1, 2] = value
+
+    with pytest.raises(NonFiniteFeatures):
+        compiled.score_samples(X)
+    with pytest.raises(ValueError):
+        model.score_samples(X)
@@ -0,0 +1,112 @@
+import json
+import asyncio
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from src import app as app_module
+from src.main import train_model, detect_anomalies
+from src.detection_pool import BoundedExecutor
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch, make_transactions):
+    monkeypatch.chdir(tmp_path)
+    train_model(make_transactions(300, seed=0))
+    pool = BoundedExecutor(max_workers=1, queue_depth=1, use_processes=False)
+    monkeypatch.setattr(app_module, 'detection_pool', pool)
+    yield TestClient(app_module.app)
+    pool.shutdown()
+
+
+def to_ndjson(transactions):
+    return ''.join(json.dumps(t) + '\n' for t in transactions).encode()
+
+
+def test_stream_results_per_chunk(client, make_transactions):
+    transactions = make_transactions(25, seed=1, start=1000)
+
+    response = client.post('/detect/stream', params={'chunk_size': 10}, content=to_ndjson(transactions),
+                           headers={'Content-Type': 'application/x-ndjson'})
+    lines = response.text.splitlines()
+
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('application/x-ndjson')
+    assert len(lines) == 25, "Every transaction should produce one result line."
+    expected = [r for i in range(0, 25, 10) for r in detect_anomalies(transactions[i:i + 10])]
+    assert [json.loads(line) for line in lines] == json.loads(json.dumps(expected)), \
+        "Each chunk should be analyzed like a separate /detect batch."
+
+
+def test_stream_reports_invalid_lines(client, make_transactions):
+    transactions = make_transactions(5, seed=2, start=2000)
+    body = to_ndjson(transactions[:2]) + b'{"hash": "0xbad"}\n\n' + to_ndjson(transactions[2:])
+
+    response = client.post('/detect/stream', content=body)
+    records = [json.loads(line) for line in response.text.splitlines()]
+
+    errors = [r for r in records if 'error' in r]
+    assert len(records) == 6, "Valid lines should still be analyzed."
+    assert len(errors) == 1 and errors[0]['line'] == 3, "The invalid line should be reported by number."
+
+
+def test_stream_empty_body(client):
+    response = client.post('/detect/stream', content=b'')
+
+    assert response.status_code == 200
+    assert response.text == ''
+
+
+def test_stream_body_sent_in_pieces(client, make_transactions):
+    transactions = make_transactions(30, seed=3, start=3000)
+    body = to_ndjson(transactions)
+
+    async def pieces():
+        for i in range(0, len(body), 500):
+            yield body[i:i + 500]
+
+    async def send():
+        transport = httpx.ASGITransport(app=app_module.app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as async_client:
+            return await async_client.post('/detect/stream', params={'chunk_size': 10}, content=pieces())
+
+    response = asyncio.run(asyncio.wait_for(send(), timeout=30))
+
+    assert len(response.text.splitlines()) == 30, \
+        "Body received after streaming starts should not be lost."
+
+
+def test_stream_rejects_overlong_lines(make_transactions):
+    transactions = make_transactions(5, seed=4, start=4000)
+
+    async def chunks(body, chunk_size):
+        class Body:
+            async def stream(self):
+                for i in range(0, len(body), 100):
+                    yield body[i:i + 100]
+        return [chunk async for chunk in app_module.read_ndjson_chunks(Body(), chunk_size, max_line_bytes=1000)]
+
+    assert asyncio.run(chunks(to_ndjson(transactions), 2))[-1][0] == 5
+    with pytest.raises(app_module.LineTooLong):
+        asyncio.run(chunks(to_ndjson(transactions[:2]) + b'x' * 5000, 2))
+
+
+def test_stream_reads_body_ahead_of_detection_boundedly():
+    consumed = []
+
+    async def source():
+        for i in range(20):
+            consumed.append(i)
+            yield i
+
+    async def read():
+        chunks = app_module.read_ahead(source(), max_chunks=2)
+        first = await chunks.__anext__()
+        await asyncio.sleep(0.05)
+        read_before_detection = len(consumed)
+        rest = [chunk async for chunk in chunks]
+        return first, read_before_detection, rest
+
+    first, read_before_detection, rest = asyncio.run(read())
+
+    assert [first] + rest == list(range(20))
+    assert read_before_detection <= 4, "Reading should pause while detection lags behind."
@@ -0,0 +1,91 @@
+import os
+import threading
+import pytest
+from fastapi.testclient import TestClient
+from src import app as app_module
+from src.main import train_model
+from src.detection_pool import BoundedExecutor, ExecutorSaturated
+
+TRANSACTION = {
+    'hash': '0x1',
+    'timeStamp': '1678901234',
+    'value': '1000000000000000000',
+    'gas': '21000',
+    'gasPrice': '50000000000'
+}
+
+
+@pytest.fixture
+def saturated_pool():
+    release = threading.Event()
+    pool = BoundedExecutor(max_workers=1, queue_depth=1, use_processes=False)
+    pool.submit(release.wait)
+    pool.submit(release.wait)
+    yield pool
+    release.set()
+    pool.shutdown()
+
+
+def test_rejects_when_saturated(saturated_pool):
+    with pytest.raises(ExecutorSaturated):
+        saturated_pool.submit(lambda: None)
+
+    stats = saturated_pool.stats()
+    assert stats['pending'] == 2, "Running and queued calls should be counted as pending."
+    assert stats['rejected'] == 1, "Rejected calls should be counted."
+
+
+@pytest.mark.parametrize('use_processes', [False, True])
+def test_slots_released_after_completion(use_processes):
+    pool = BoundedExecutor(max_workers=1, queue_depth=0, use_processes=use_processes)
+    for i in range(3):
+        assert pool.submit(abs, -i).result() == i
+    assert pool.stats()['pending'] == 0, "Completed calls should free their slots."
+    pool.shutdown()
+
+
+def test_initializer_runs_in_workers(tmp_path):
+    pool = BoundedExecutor(max_workers=1, queue_depth=0, use_processes=True,
+                           initializer=os.chdir, initargs=(str(tmp_path),))
+
+    assert pool.submit(os.getcwd).result() == str(tmp_path), "Workers should run the initializer first."
+    pool.shutdown()
+
+
+def test_detect_returns_503_when_saturated(saturated_pool, monkeypatch):
+    monkeypatch.setattr(app_module, 'detection_pool', saturated_pool)
+    monkeypatch.setattr(app_module, 'model_exists', lambda path: True)
+    client = TestClient(app_module.app)
+
+    response = client.post('/detect', json={'transactions': [TRANSACTION]})
+
+    assert response.status_code == 503, "A saturated pool should reject the request."
+    assert response.headers['Retry-After'] == str(app_module.DETECT_RETRY_AFTER), \
+        "The rejection should tell clients when to retry."
+
+
+def test_detect_runs_on_worker_pool(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    transactions = [dict(TRANSACTION, hash=f'0x{i}', value=str(10 ** 15 * (i + 1))) for i in range(50)]
+    train_model(transactions)
+    client = TestClient(app_module.app)
+
+    response = client.post('/detect', json={'transactions': transactions[:5]})
+    invalid = client.post('/detect', json={'transactions': [{'hash': '0x1'}]})
+
+    assert response.status_code == 200, "Detection should succeed on the worker pool."
+    assert response.json()['total_transactions'] == 5
+    assert invalid.status_code == 422, "An invalid body should be rejected as a validation error."
+    assert invalid.json()['detail'][0]['loc'] == ['transactions', 0, 'timeStamp']
+
+
+def test_detect_rejects_undefined_features(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    transactions = [dict(TRANSACTION, hash=f'0x{i}', value=str(10 ** 15 * (i + 1))) for i in range(50)]
+    train_model(transactions)
+    client = TestClient(app_module.app)
+
+    response = client.post('/detect', json={'transactions': [dict(transactions[0], hash='0xnew')]})
+
+    assert response.status_code == 422, "A batch that cannot be normalized should not be scored."
+    assert 'undefined' in response.json()['detail']
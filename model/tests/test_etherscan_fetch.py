@@ -0,0 +1,68 @@
+import asyncio
+import pytest
+from src.api.etherscan_api import EtherscanAPI
+from src.api.etherscan_stub import EtherscanStub, synthetic_history
+from src.api.transaction_fetcher import TransactionFetcher, merge_transactions
+
+ADDRESS = '0x' + 'ab' * 20
+
+
+@pytest.fixture(scope='module')
+def history():
+    return synthetic_history(ADDRESS, 32000, blocks=200000)
+
+
+@pytest.fixture
+def stub(history):
+    stub = EtherscanStub({ADDRESS: history})
+    stub.start()
+    yield stub
+    stub.stop()
+
+
+def test_fetches_history_beyond_result_window(stub, history):
+    api = EtherscanAPI('key', base_url=stub.base_url)
+
+    transactions = api.get_transactions(ADDRESS)
+
+    assert len(transactions) == len(history), "Histories longer than 10000 records should not be truncated."
+    assert [t['hash'] for t in transactions] == [t['hash'] for t in reversed(history)], \
+        "Transactions should be returned newest first, without duplicates."
+
+
+def test_block_range_and_sort(stub, history):
+    api = EtherscanAPI('key', base_url=stub.base_url)
+    start, end = int(history[5000]['blockNumber']), int(history[25000]['blockNumber'])
+
+    transactions = api.get_transactions(ADDRESS, start, end, sort='asc')
+
+    expected = [t['hash'] for t in history if start <= int(t['blockNumber']) <= end]
+    assert [t['hash'] for t in transactions] == expected
+    assert api.get_transactions('0x' + '00' * 20) == [], "An address without transactions should give []."
+
+
+def test_errors_give_empty_result():
+    api = EtherscanAPI('key', base_url='http://127.0.0.1:9/api')
+
+    assert api.get_transactions(ADDRESS) == []
+
+
+def test_truncated_windows_are_split():
+    records = [{'hash': f'0x{i}', 'blockNumber': str(i // 3), 'transactionIndex': str(i % 3)} for i in range(100)]
+    calls = []
+
+    async def query(address, start_block, end_block):
+        calls.append((start_block, end_block))
+        selected = [r for r in records if start_block <= int(r['blockNumber']) <= end_block]
+        return selected[:10]
+
+    async def fetch():
+        fetcher = TransactionFetcher(query, concurrency=3, max_results=10)
+        return await fetcher.fetch(ADDRESS, 0, 40), fetcher.queries
+
+    batches, queries = asyncio.run(fetch())
+    merged = merge_transactions(batches + [records[:5]], sort='asc')
+
+    assert [r['hash'] for r in merged] == [r['hash'] for r in records], \
+        "Every transaction should be fetched once, in block order."
+    assert queries == len(calls) and calls[0] == (0, 40)
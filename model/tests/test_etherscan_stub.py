@@ -0,0 +1,55 @@
+import pytest
+from src.api.api_utils import TokenBucket
+from src.api.etherscan_api import EtherscanAPI
+from src.api.etherscan_stub import EtherscanStub, synthetic_history, record_fixture, THROTTLE, ERROR
+
+ADDRESS = '0x' + '34' * 20
+
+
+@pytest.fixture(scope='module')
+def history():
+    return synthetic_history(ADDRESS, 15000, blocks=60000)
+
+
+def api_for(stub):
+    return EtherscanAPI('key', stub.base_url, rate_limiter=TokenBucket(rate=1000, capacity=1000))
+
+
+def test_recorded_fixture_is_replayed(history, tmp_path):
+    path = str(tmp_path / 'history.json')
+    with EtherscanStub({ADDRESS: history}) as source:
+        source.start()
+        record_fixture(path, [ADDRESS.upper().replace('0X', '0x')], api_for(source))
+
+    with EtherscanStub.from_fixture(path) as replay:
+        replay.start()
+        transactions = api_for(replay).get_transactions(ADDRESS, sort='asc')
+
+        assert replay.latest_block == source.latest_block
+    assert transactions == history, "A replayed fixture should answer like the recorded API."
+
+
+def test_injected_faults_are_retried(history, monkeypatch):
+    monkeypatch.setattr('src.api.api_utils.backoff_delay', lambda attempt, retry_after=None: retry_after or 0)
+    with EtherscanStub({ADDRESS: history}, retry_after=0.01) as stub:
+        stub.start()
+        stub.inject(THROTTLE, ERROR)
+
+        transactions = api_for(stub).get_transactions(ADDRESS)
+
+    assert len(transactions) == len(history)
+    assert stub.injected == {THROTTLE: 1, ERROR: 1}
+
+
+def test_random_faults_and_base_url_from_environment(history, monkeypatch):
+    monkeypatch.setattr('src.api.api_utils.backoff_delay', lambda attempt, retry_after=None: 0)
+    with EtherscanStub({ADDRESS: history}, error_rate=0.5, seed=3) as stub:
+        monkeypatch.setenv('ETHERSCAN_BASE_URL', stub.start())
+        api = EtherscanAPI('key', rate_limiter=None)
+
+        transactions = api.get_transactions(ADDRESS)
+
+    assert api.base_url == stub.base_url
+    assert stub.injected[ERROR] > 0
+    assert transactions == [] or len(transactions) == len(history), \
+        "Requests failing after all retries should give [] rather than a partial history."
@@ -0,0 +1,90 @@
+import re
+from fastapi.testclient import TestClient
+from src import app as app_module
+from src.main import train_model
+from src.metrics import MetricsRegistry, metrics
+from src.detection_pool import BoundedExecutor
+
+
+def record_stage(rows):
+    with metrics.stage('detect', 'clean'):
+        metrics.inc('pipeline_rows_total', rows, pipeline='detect')
+    return rows
+
+
+def sample(text, line_prefix):
+    match = re.search('^' + re.escape(line_prefix) + r' (\S+)$', text, re.MULTILINE)
+    return float(match.group(1)) if match else 0.0
+
+
+def test_histogram_rendering():
+    registry = MetricsRegistry(buckets=(0.1, 1.0))
+    registry._observe(('pipeline_stage_seconds', (('pipeline', 'detect'), ('stage', 'clean'))), 0.05)
+    registry._observe(('pipeline_stage_seconds', (('pipeline', 'detect'), ('stage', 'clean'))), 0.5)
+    registry.inc('pipeline_rows_total', 10, pipeline='detect')
+
+    text = registry.render()
+
+    assert '# TYPE pipeline_stage_seconds histogram' in text
+    assert 'pipeline_stage_seconds_bucket{pipeline="detect",stage="clean",le="0.1"} 1' in text
+    assert 'pipeline_stage_seconds_bucket{pipeline="detect",stage="clean",le="1.0"} 2' in text
+    assert 'pipeline_stage_seconds_bucket{pipeline="detect",stage="clean",le="+Inf"} 2' in text, \
+        "Buckets should be cumulative."
+    assert 'pipeline_stage_seconds_count{pipeline="detect",stage="clean"} 2' in text
+    assert 'pipeline_rows_total{pipeline="detect"} 10' in text
+
+
+def test_collect_and_merge():
+    worker = MetricsRegistry()
+    parent = MetricsRegistry()
+    with worker.stage('train', 'fit'):
+        pass
+    worker.inc('pipeline_rows_total', 5, pipeline='train')
+
+    parent.merge(worker.collect())
+    parent.merge(worker.collect())
+
+    text = parent.render()
+    assert 'pipeline_stage_seconds_count{pipeline="train",stage="fit"} 1' in text
+    assert 'pipeline_rows_total{pipeline="train"} 5' in text, "Collected metrics should only be merged once."
+
+
+def test_worker_process_metrics_merged():
+    pool = BoundedExecutor(max_workers=1, queue_depth=1, use_processes=True)
+    before = metrics.render()
+    try:
+        for rows in (3, 4):
+            assert pool.submit(record_stage, rows).result(timeout=60) == rows
+    finally:
+        pool.shutdown()
+    after = metrics.render()
+
+    prefix = 'pipeline_stage_seconds_count{pipeline="detect",stage="clean"}'
+    assert sample(after, prefix) - sample(before, prefix) == 2, \
+        "Metrics recorded in worker processes should reach the parent registry."
+    rows = 'pipeline_rows_total{pipeline="detect"}'
+    assert sample(after, rows) - sample(before, rows) == 7
+
+
+def test_metrics_endpoint(tmp_path, monkeypatch, make_transactions):
+    monkeypatch.chdir(tmp_path)
+    train_model(make_transactions(300, seed=0))
+    pool = BoundedExecutor(max_workers=1, queue_depth=1, use_processes=False)
+    monkeypatch.setattr(app_module, 'detection_pool', pool)
+    client = TestClient(app_module.app)
+
+    before = client.get('/metrics').text
+    client.post('/detect', json={'transactions': make_transactions(20, seed=1, start=1000)})
+    response = client.get('/metrics')
+    pool.shutdown()
+
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('text/plain')
+    for stage in ('clean', 'transform', 'model_load', 'prepare_features', 'predict', 'build_results'):
+        prefix = f'pipeline_stage_seconds_count{{pipeline="detect",stage="{stage}"}}'
+        assert sample(response.text, prefix) - sample(before, prefix) == 1, f"Stage {stage} should be timed."
+    assert sample(response.text, 'pipeline_rows_total{pipeline="detect"}') \
+        - sample(before, 'pipeline_rows_total{pipeline="detect"}') == 20
+    assert 'model_cache_misses_total' in response.text
+    assert 'requests_in_flight{endpoint="/metrics"} 1' in response.text, \
+        "The scrape itself should be counted as in flight."
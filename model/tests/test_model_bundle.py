@@ -0,0 +1,74 @@
+import os
+import joblib
+import pytest
+import numpy as np
+import pandas as pd
+from src.anomaly_detection.isolation_forest import AnomalyDetectorIsolationForest
+from src.anomaly_detection.model_bundle import (BUNDLE_FILE, MANIFEST_FILE, LazyEstimator, forest_path, model_exists,
+                                                read_bundle, read_manifest)
+
+
+@pytest.fixture
+def trained_detector():
+    data = {
+        'value': [100, 200, 150, 50, 500, 600, 700],
+        'gas': [21000, 21000, 21000, 21000, 21000, 21000, 21000],
+        'gasPrice': [50, 50, 50, 50, 50, 50, 50]
+    }
+    detector = AnomalyDetectorIsolationForest(pd.DataFrame(data))
+    detector.train_model()
+    return detector
+
+
+def test_save_writes_bundle_and_forest(trained_detector, tmp_path):
+    trained_detector.save_model(str(tmp_path))
+
+    forest = os.path.basename(forest_path(str(tmp_path), trained_detector.manifest['model_version']))
+    assert sorted(os.listdir(tmp_path)) == [forest, MANIFEST_FILE, BUNDLE_FILE], \
+        "Save should leave the bundle file, its manifest and its forest directory behind."
+    manifest = read_manifest(str(tmp_path))
+    assert manifest == read_bundle(str(tmp_path))['manifest'], "The manifest file should match the bundle."
+    assert manifest['training_rows'] == 7, "Manifest should record the training row count."
+    assert 'value_per_gas' in manifest['feature_names'], "Manifest should record the feature names."
+    assert manifest['created_at'], "Manifest should record a timestamp."
+
+
+def test_load_bundle(trained_detector, tmp_path):
+    trained_detector.save_model(str(tmp_path))
+    loaded = AnomalyDetectorIsolationForest.load_model(str(tmp_path))
+
+    assert loaded.thresholds == trained_detector.thresholds, "Thresholds were not restored."
+    assert loaded.manifest['model_version'] == trained_detector.manifest['model_version'], "Version mismatch."
+
+
+def test_load_maps_arrays_and_defers_estimator(trained_detector, tmp_path):
+    trained_detector.save_model(str(tmp_path))
+    loaded = AnomalyDetectorIsolationForest.load_model(str(tmp_path))
+    X = trained_detector.scaled_features
+
+    assert isinstance(loaded.compiled.threshold, np.memmap), "Forest arrays should be memory-mapped."
+    assert isinstance(loaded._model, LazyEstimator), "The estimator should not be loaded with the model."
+    np.testing.assert_array_equal(loaded.decision_function(X), trained_detector.decision_function(X))
+    assert isinstance(loaded._model, LazyEstimator), "Scoring a small batch should not load the estimator."
+    np.testing.assert_array_equal(loaded.model.score_samples(X), trained_detector.model.score_samples(X))
+
+
+def test_replaced_forests_are_removed(trained_detector, tmp_path):
+    versions = []
+    for _ in range(3):
+        trained_detector.save_model(str(tmp_path))
+        versions.append(trained_detector.manifest['model_version'])
+
+    assert not os.path.exists(forest_path(str(tmp_path), versions[0])), "Old forests should be removed."
+    assert os.path.exists(forest_path(str(tmp_path), versions[1])), "The previous forest should be kept."
+    assert read_bundle(str(tmp_path))['manifest']['model_version'] == versions[2]
+
+
+def test_load_legacy_files(trained_detector, tmp_path):
+    joblib.dump(trained_detector.model, tmp_path / 'isolation_forest.joblib')
+    joblib.dump(trained_detector.scaler, tmp_path / 'scaler.joblib')
+    joblib.dump(trained_detector.thresholds, tmp_path / 'thresholds.joblib')
+
+    assert model_exists(str(tmp_path)), "Legacy model files should be detected."
+    loaded = AnomalyDetectorIsolationForest.load_model(str(tmp_path))
+    assert loaded.thresholds == trained_detector.thresholds, "Legacy thresholds were not restored."
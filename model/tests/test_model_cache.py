@@ -0,0 +1,73 @@
+import pytest
+import pandas as pd
+from src.anomaly_detection.isolation_forest import AnomalyDetectorIsolationForest
+from src.anomaly_detection.model_cache import ModelCache
+
+
+@pytest.fixture
+def sample_data():
+    data = {
+        'value': [100, 200, 150, 50, 500, 600, 700],
+        'gas': [21000, 21000, 21000, 21000, 21000, 21000, 21000],
+        'gasPrice': [50, 50, 50, 50, 50, 50, 50]
+    }
+    return pd.DataFrame(data)
+
+
+@pytest.fixture
+def model_dir(sample_data, tmp_path):
+    detector = AnomalyDetectorIsolationForest(sample_data)
+    detector.train_model()
+    detector.save_model(str(tmp_path))
+    return str(tmp_path)
+
+
+def test_model_loaded_once(model_dir):
+    cache = ModelCache()
+    first = cache.get(model_dir)
+    second = cache.get(model_dir)
+
+    assert cache.stats()['loads'] == 1, "Model should only be loaded from disk once."
+    assert cache.stats()['hits'] == 1, "Second access should be a cache hit."
+    assert first is not second, "Each caller should get its own detector."
+    assert first.model is second.model, "Detectors should share the cached model."
+
+
+def test_model_reloaded_when_files_change(model_dir, sample_data):
+    cache = ModelCache()
+    first = cache.get(model_dir)
+
+    detector = AnomalyDetectorIsolationForest(sample_data, random_state=7)
+    detector.train_model()
+    detector.save_model(model_dir)
+    second = cache.get(model_dir)
+
+    assert cache.stats()['loads'] == 2, "Changed model files should trigger a reload."
+    assert first.model is not second.model, "Reloaded model should be swapped in."
+
+
+def test_missing_model_raises(tmp_path):
+    cache = ModelCache()
+
+    with pytest.raises(FileNotFoundError):
+        cache.get(str(tmp_path))
+
+
+def test_least_recently_used_model_evicted(sample_data, tmp_path):
+    dirs = []
+    for name in ('a', 'b'):
+        detector = AnomalyDetectorIsolationForest(sample_data)
+        detector.train_model()
+        detector.save_model(str(tmp_path / name))
+        dirs.append(str(tmp_path / name))
+
+    cache = ModelCache(capacity=1)
+    cache.get(dirs[0])
+    cache.get(dirs[1])
+    cache.get(dirs[0])
+    stats = cache.stats()
+
+    assert stats['cached_models'] == 1, "Cache should not hold more models than its capacity."
+    assert stats['evictions'] == 2, "Each load beyond capacity should evict the least recently used model."
+    assert stats['loads'] == 3, "An evicted model should be reloaded on next access."
+    assert stats['hit_rate'] == 0.0, "No lookup should have been a hit."
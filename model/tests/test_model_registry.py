@@ -0,0 +1,74 @@
+import os
+import pytest
+import pandas as pd
+from src.anomaly_detection.isolation_forest import AnomalyDetectorIsolationForest
+from src.anomaly_detection.model_cache import ModelCache
+from src.anomaly_detection.model_registry import ModelRegistry, normalize_address
+
+ADDRESS = '0xDe0B295669a9FD93d5F28D9Ec85E40f4cb697BAe'
+
+
+@pytest.fixture
+def sample_data():
+    data = {
+        'value': [100, 200, 150, 50, 500, 600, 700],
+        'gas': [21000, 21000, 21000, 21000, 21000, 21000, 21000],
+        'gasPrice': [50, 50, 50, 50, 50, 50, 50]
+    }
+    return pd.DataFrame(data)
+
+
+@pytest.fixture
+def registry(tmp_path):
+    return ModelRegistry(root=str(tmp_path), cache=ModelCache(capacity=2))
+
+
+def train_for(registry, address, data):
+    detector = AnomalyDetectorIsolationForest(data)
+    detector.train_model()
+    detector.save_model(registry.model_path(address))
+
+
+def test_model_path_per_address(registry, tmp_path):
+    assert registry.model_path() == str(tmp_path), "Default model should live in the root directory."
+    assert registry.model_path(ADDRESS) == registry.model_path(ADDRESS.lower()), \
+        "Checksummed and lower-case addresses should share one model."
+    assert registry.model_path('tenant-1') == os.path.join(str(tmp_path), 'addresses', 'tenant-1')
+
+
+@pytest.mark.parametrize('address', ['../etc', '.hidden', 'a/b', '', '0x123/../../x'])
+def test_invalid_address_rejected(address):
+    with pytest.raises(ValueError):
+        normalize_address(address)
+
+
+def test_models_loaded_lazily_per_address(registry, sample_data):
+    train_for(registry, ADDRESS, sample_data)
+    train_for(registry, 'tenant-1', sample_data)
+
+    assert registry.cache.stats()['cached_models'] == 0, "Models should not be loaded before first use."
+    assert registry.addresses() == [ADDRESS.lower(), 'tenant-1']
+    assert registry.exists(ADDRESS) and not registry.exists('tenant-2')
+
+    first = registry.get(ADDRESS)
+    second = registry.get(ADDRESS)
+    other = registry.get('tenant-1')
+    stats = registry.stats()
+
+    assert first.model is second.model, "Repeated lookups should share the cached model."
+    assert first.model is not other.model, "Each address should get its own model."
+    assert stats['loads'] == 2 and stats['hits'] == 1
+    assert stats['hit_rate'] == pytest.approx(1 / 3)
+    assert stats['stored_models'] == 2
+
+
+def test_stored_count_updated_without_rescan(registry, sample_data, monkeypatch):
+    train_for(registry, ADDRESS, sample_data)
+    assert registry.stored_count() == 1
+
+    monkeypatch.setattr(registry, 'addresses', lambda: pytest.fail("The model directory should not be rescanned."))
+    train_for(registry, 'tenant-1', sample_data)
+    registry.record_stored('tenant-1')
+    registry.record_stored(ADDRESS.lower())
+
+    assert registry.stored_count() == 2, "Recorded models should be counted once each."
@@ -0,0 +1,55 @@
+import pytest
+import numpy as np
+import pandas as pd
+from src.anomaly_detection.isolation_forest import AnomalyDetectorIsolationForest
+from src.anomaly_detection.quantile_sketch import KLLSketch
+
+
+@pytest.fixture
+def large_sample():
+    rng = np.random.default_rng(0)
+    return rng.lognormal(mean=10, sigma=2, size=200000)
+
+
+def test_exact_for_small_inputs():
+    values = np.arange(100, dtype=float)
+    sketch = KLLSketch().update(values)
+
+    assert sketch.quantile(0.95) == np.percentile(values, 95), "Small inputs should give exact percentiles."
+
+
+def test_bounded_memory_and_accuracy(large_sample):
+    sketch = KLLSketch(k=200).update(large_sample)
+    estimate = sketch.quantile(0.95)
+
+    assert sum(len(level) for level in sketch.levels) < 3 * sketch.k, "Sketch size should stay O(k)."
+    assert abs((large_sample < estimate).mean() - 0.95) < 0.01, "Rank error is too large."
+
+
+def test_merge_partitions(large_sample):
+    parts = [KLLSketch(seed=i).update(part) for i, part in enumerate(np.array_split(large_sample, 4))]
+    merged = parts[0]
+    for part in parts[1:]:
+        merged.merge(part)
+
+    assert merged.n == len(large_sample), "Merged sketch should count every value."
+    assert abs((large_sample < merged.quantile(0.95)).mean() - 0.95) < 0.01, "Merged rank error is too large."
+
+
+def test_detector_thresholds_update_incrementally(tmp_path):
+    data = pd.DataFrame({
+        'value': [100, 200, 150, 50, 500, 600, 700],
+        'gas': [21000] * 7,
+        'gasPrice': [50] * 7
+    })
+    detector = AnomalyDetectorIsolationForest(data.copy())
+    detector.train_model()
+    detector.save_model(str(tmp_path))
+
+    loaded = AnomalyDetectorIsolationForest.load_model(str(tmp_path))
+    new_batch = pd.DataFrame({'value': [10000] * 7, 'gas': [21000] * 7, 'gasPrice': [50] * 7})
+    thresholds = loaded.update_thresholds(new_batch)
+
+    combined = pd.concat([data, new_batch])
+    assert loaded.sketches['value'].n == 14, "Sketch should include both batches."
+    assert thresholds['value'] == np.percentile(combined['value'], 95), "Threshold should cover both batches."
@@ -0,0 +1,134 @@
+import time
+import asyncio
+import threading
+import multiprocessing
+import pytest
+from src.api.api_utils import (TokenBucket, SharedTokenBucket, RetryableError, RateLimitExceeded, backoff_delay,
+                               handle_api_rate_limit, retry_request_async)
+from src.api.etherscan_api import EtherscanAPI
+from src.api.etherscan_stub import EtherscanStub, synthetic_history
+from src.utils.config import MAX_RETRIES, RETRY_MAX_DELAY
+
+ADDRESS = '0x' + 'cd' * 20
+
+
+class Response:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+def test_token_bucket_paces_calls_after_burst():
+    bucket = TokenBucket(rate=50, capacity=5)
+
+    async def calls():
+        for _ in range(25):
+            await bucket.acquire()
+
+    start = time.monotonic()
+    asyncio.run(calls())
+    elapsed = time.monotonic() - start
+
+    assert 0.35 <= elapsed < 0.8, "Calls beyond the burst should be paced at the rate."
+    assert bucket.calls == 25
+
+
+def test_token_bucket_is_shared_across_threads():
+    bucket = TokenBucket(rate=100, capacity=1)
+    times = []
+    lock = threading.Lock()
+
+    def worker():
+        for _ in range(10):
+            bucket.acquire_blocking()
+            with lock:
+                times.append(time.monotonic())
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    times.sort()
+    assert times[-1] - times[0] >= 0.35, "40 calls from 4 threads should together stay at 100 per second."
+
+
+def acquire_shared(path, calls, barrier, times):
+    bucket = SharedTokenBucket(path, rate=50, capacity=1)
+    barrier.wait()
+    for _ in range(calls):
+        bucket.acquire_blocking()
+        times.put(time.time())
+
+
+def test_shared_token_bucket_is_shared_across_processes(tmp_path):
+    path = str(tmp_path / 'rate_limit.db')
+    context = multiprocessing.get_context('spawn')
+    barrier, times = context.Barrier(3), context.Queue()
+    processes = [context.Process(target=acquire_shared, args=(path, 10, barrier, times)) for _ in range(3)]
+    for process in processes:
+        process.start()
+    stamps = sorted(times.get(timeout=30) for _ in range(30))
+    for process in processes:
+        process.join()
+
+    spans = [stamps[i + 10] - stamps[i] for i in range(len(stamps) - 10)]
+    assert min(spans) >= 0.15, "Calls from 3 processes should together stay at 50 per second."
+    SharedTokenBucket(path).pause(1)
+    assert SharedTokenBucket(path, rate=50).reserve() > 0.9, "A pause should hold back every process."
+
+
+def test_pause_holds_back_calls_without_blocking():
+    bucket = TokenBucket(rate=1000, capacity=10)
+
+    delay = handle_api_rate_limit(Response(429, {'Retry-After': '0.2'}), limiter=bucket)
+
+    assert delay == 0.2
+    assert 0.15 < bucket.reserve() <= 0.2, "A 429 should hold back the next call for Retry-After seconds."
+    assert handle_api_rate_limit(Response(200), limiter=bucket) == 0
+
+
+def test_backoff_is_jittered_and_capped():
+    delays = [backoff_delay(3) for _ in range(200)]
+
+    assert all(0 <= delay <= RETRY_MAX_DELAY for delay in delays)
+    assert len(set(delays)) > 100, "Retries should be spread out by random jitter."
+    assert backoff_delay(50) <= RETRY_MAX_DELAY
+    assert backoff_delay(2, retry_after=1.5) == 1.5
+
+
+def test_retry_request_async(monkeypatch):
+    monkeypatch.setattr('src.api.api_utils.backoff_delay', lambda attempt, retry_after=None: 0)
+    attempts = []
+
+    async def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise RateLimitExceeded("Max rate limit reached")
+        return 'ok'
+
+    async def failing():
+        attempts.append(1)
+        raise RetryableError("Server error")
+
+    assert asyncio.run(retry_request_async(flaky, limiter=TokenBucket(rate=1000))) == 'ok'
+    assert len(attempts) == 3
+
+    attempts.clear()
+    with pytest.raises(RetryableError):
+        asyncio.run(retry_request_async(failing))
+    assert len(attempts) == MAX_RETRIES
+
+
+@pytest.mark.parametrize('throttle_status', [200, 429])
+def test_rate_limited_fetch_is_not_rejected(throttle_status):
+    history = synthetic_history(ADDRESS, 60000, blocks=300000)
+    with EtherscanStub({ADDRESS: history}, rate_limit=20, throttle_status=throttle_status) as stub:
+        stub.start()
+        api = EtherscanAPI('key', base_url=stub.base_url, rate_limiter=TokenBucket(rate=18, capacity=1))
+
+        transactions = api.get_transactions(ADDRESS)
+
+    assert len(transactions) == len(history)
+    assert stub.rejected == 0, "Requests paced by the limiter should stay within the quota."
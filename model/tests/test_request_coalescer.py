@@ -0,0 +1,78 @@
+import json
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+from src import app as app_module
+from src.main import train_model, detect_anomalies, detect_anomalies_batches
+from src.detection_pool import BoundedExecutor
+from src.request_coalescer import RequestCoalescer
+
+
+def describe_batch(payloads, key):
+    return [(key, len(payload)) for payload in payloads]
+
+
+@pytest.fixture
+def executor():
+    pool = BoundedExecutor(max_workers=1, queue_depth=4, use_processes=False)
+    yield pool
+    pool.shutdown()
+
+
+def test_requests_coalesced_into_one_batch(executor):
+    coalescer = RequestCoalescer(executor, describe_batch, max_wait_ms=50, max_batch=100)
+
+    async def send():
+        return await asyncio.gather(*[coalescer.submit([0] * n, n, key='a') for n in (1, 2, 3)])
+
+    outcomes = asyncio.run(send())
+    stats = coalescer.stats()
+
+    assert outcomes == [('a', 1), ('a', 2), ('a', 3)], "Each caller should get its own outcome."
+    assert stats['batches'] == 1 and stats['requests'] == 3, "Requests should share one batch."
+    assert stats['mean_transactions_per_batch'] == 6
+    assert stats['batch_size_histogram']['8'] == 1
+
+
+def test_full_batch_dispatched_without_waiting(executor):
+    coalescer = RequestCoalescer(executor, describe_batch, max_wait_ms=60000, max_batch=4)
+
+    async def send():
+        return await asyncio.wait_for(
+            asyncio.gather(coalescer.submit([0] * 2, 2), coalescer.submit([0] * 2, 2)), timeout=5)
+
+    assert asyncio.run(send()) == [(None, 2), (None, 2)]
+
+
+def test_batches_match_separate_detection(tmp_path, monkeypatch, make_transactions):
+    monkeypatch.chdir(tmp_path)
+    train_model(make_transactions(300, seed=0))
+    batches = [make_transactions(n, seed=n, start=1000 * n) for n in (2, 3, 5, 8)]
+    batches[1].append(dict(batches[1][0]))  # duplicate within a batch is removed
+    batches[2].append(dict(batches[3][0]))  # duplicate across batches is kept
+
+    grouped = detect_anomalies_batches(batches)
+    separate = [detect_anomalies(batch) for batch in batches]
+
+    assert [len(results) for results in grouped] == [2, 3, 6, 8]
+    assert json.dumps(grouped) == json.dumps(separate), \
+        "Each batch should get exactly the results of a separate call."
+
+
+def test_detect_uses_coalescer(tmp_path, monkeypatch, executor, make_transactions):
+    monkeypatch.chdir(tmp_path)
+    train_model(make_transactions(300, seed=0))
+    coalescer = RequestCoalescer(executor, app_module.run_detection_batches, max_wait_ms=1)
+    monkeypatch.setattr(app_module, 'detection_coalescer', coalescer)
+    client = TestClient(app_module.app)
+    transactions = make_transactions(3, seed=1, start=5000)
+
+    response = client.post('/detect', json={'transactions': transactions})
+
+    assert response.status_code == 200
+    assert response.json()['results'] == detect_anomalies(transactions), \
+        "Coalesced detection should match direct detection."
+    assert coalescer.stats()['requests'] == 1
+    metrics_page = client.get('/metrics').text
+    assert 'coalescer_batch_size_bucket{le="4"}' in metrics_page, \
+        "Batch sizes should be exported with the other pipeline metrics."
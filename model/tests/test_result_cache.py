@@ -0,0 +1,118 @@
+import pytest
+from src.main import train_model, detect_anomalies
+from src.anomaly_detection.result_cache import ResultCache
+from src.anomaly_detection.isolation_forest import AnomalyDetectorIsolationForest
+
+
+def result(tx_hash, score=0.0):
+    return {'transaction_hash': tx_hash, 'anomaly_score': score}
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch, make_transactions):
+    monkeypatch.chdir(tmp_path)
+    train_model(make_transactions(300, seed=0))
+    return tmp_path
+
+
+@pytest.fixture
+def scored(monkeypatch):
+    """Record the number of transactions scored by the model."""
+    sizes = []
+    detect_anomalies_columnar = AnomalyDetectorIsolationForest.detect_anomalies_columnar
+
+    def recording(self, *args, **kwargs):
+        sizes.append(len(self.df))
+        return detect_anomalies_columnar(self, *args, **kwargs)
+
+    monkeypatch.setattr(AnomalyDetectorIsolationForest, 'detect_anomalies_columnar', recording)
+    return sizes
+
+
+def test_lru_eviction():
+    cache = ResultCache(capacity=2, ttl=60)
+    cache.put_many('v1', [result('a'), result('b')])
+    cache.get_many('v1', ['a'])
+    cache.put_many('v1', [result('c')])
+
+    assert set(cache.get_many('v1', ['a', 'b', 'c'])) == {'a', 'c'}, \
+        "The least recently used result should be evicted."
+    assert cache.stats()['evictions'] == 1
+
+
+def test_ttl_expiry():
+    cache = ResultCache(capacity=10, ttl=0)
+    cache.put_many('v1', [result('a')])
+
+    assert cache.get_many('v1', ['a']) == {}, "Expired results should not be returned."
+    assert cache.stats()['expirations'] == 1
+
+
+def test_new_version_invalidates():
+    cache = ResultCache(capacity=10, ttl=60)
+    cache.activate('models', 'v1')
+    cache.put_many('v1', [result('a')])
+    cache.activate('other', 'w1')
+    cache.put_many('w1', [result('a')])
+
+    cache.activate('models', 'v2')
+
+    assert cache.get_many('v1', ['a']) == {}, "Results of the replaced version should be dropped."
+    assert cache.get_many('w1', ['a']) != {}, "Results of other models should be kept."
+    assert cache.stats()['invalidations'] == 1
+
+
+def test_only_misses_are_scored(workdir, scored, make_transactions):
+    cache = ResultCache(capacity=100, ttl=60)
+    first_window = make_transactions(30, seed=1, start=1000)
+    second_window = first_window[10:] + make_transactions(10, seed=2, start=2000)
+
+    first = detect_anomalies(first_window, cache=cache)
+    second = detect_anomalies(second_window, cache=cache)
+
+    assert first == detect_anomalies(first_window), "A cold cache should not change the results."
+    assert scored[:2] == [30, 10], "Only transactions missing from the cache should go through the pipeline."
+    assert [r['transaction_hash'] for r in second] == [t['hash'] for t in second_window], \
+        "Cached and fresh results should be merged in input order."
+    assert second[:20] == first[10:], "Cached transactions should get their earlier results."
+    assert cache.stats()['hit_ratio'] == 20 / 60
+
+
+def test_top_k_over_merged_results(workdir, make_transactions):
+    cache = ResultCache(capacity=100, ttl=60)
+    window = make_transactions(30, seed=3, start=3000)
+    detect_anomalies(window[:20], cache=cache)
+
+    results = detect_anomalies(window, cache=cache, top_k=5)
+    merged = detect_anomalies(window, cache=cache)
+
+    expected = sorted(merged, key=lambda r: r['anomaly_score'])[:5]
+    assert results == expected, "top_k should select from cached and fresh results together."
+
+
+def test_retrained_model_invalidates(workdir, scored, make_transactions):
+    cache = ResultCache(capacity=100, ttl=60)
+    window = make_transactions(20, seed=4, start=4000)
+    detect_anomalies(window, cache=cache)
+
+    train_model(make_transactions(300, seed=5))
+    detect_anomalies(window, cache=cache)
+
+    assert scored == [20, 20], "A new model version should not use results of the previous one."
+    assert cache.stats()['invalidations'] == 1
+    assert cache.stats()['cached_results'] == 20
+
+
+def test_fresh_results_match_uncached(workdir, scored, make_transactions):
+    cache = ResultCache(capacity=1000, ttl=60)
+    window = make_transactions(100, seed=6, start=6000)
+    detect_anomalies(window, cache=cache)
+    moved = window[1:] + make_transactions(1, seed=7, start=7000)
+
+    cached = detect_anomalies(moved, cache=cache)
+    uncached = detect_anomalies(moved)
+
+    assert scored[1] == 1, "Only the new transaction should be scored by the model."
+    assert cached[-1] == uncached[-1], "A new transaction should be scaled with the whole request as its batch."
+    assert cached[-1]['transaction_details']['value'] == cached[-1]['transaction_details']['value']
+    assert detect_anomalies(window, cache=ResultCache(capacity=1000, ttl=60)) == detect_anomalies(window)
@@ -0,0 +1,79 @@
+import json
+import pytest
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from fastapi.testclient import TestClient
+from src import app as app_module
+from src.main import train_model, detect_anomalies
+from src.detection_pool import BoundedExecutor
+from src.utils.serialization import dumps, dump
+
+
+class JSONEncoder(json.JSONEncoder):
+    """The standard-library encoder of the previous CLI writer, kept as a reference."""
+    def default(self, obj):
+        if isinstance(obj, np.integer):
+            return int(obj)
+        if isinstance(obj, np.floating):
+            return float(obj)
+        if isinstance(obj, (pd.Timestamp, datetime)):
+            return obj.isoformat()
+        if isinstance(obj, np.ndarray):
+            return obj.tolist()
+        return super().default(obj)
+
+
+def test_numpy_and_pandas_types():
+    document = {
+        'int': np.int64(3),
+        'float': np.float32(2.5),
+        'bool': np.bool_(True),
+        'array': np.arange(3),
+        'timestamp': pd.Timestamp('2024-01-01 12:00:00'),
+        'nan': float('nan')
+    }
+
+    assert json.loads(dumps(document)) == {
+        'int': 3, 'float': 2.5, 'bool': True, 'array': [0, 1, 2],
+        'timestamp': '2024-01-01T12:00:00', 'nan': None
+    }, "NumPy and pandas values should be encoded as plain JSON, NaN as null."
+
+
+def test_unknown_type_rejected():
+    with pytest.raises(TypeError):
+        dumps({'value': object()})
+
+
+def test_matches_standard_encoder(tmp_path, monkeypatch, make_transactions):
+    monkeypatch.chdir(tmp_path)
+    train_model(make_transactions(300, seed=0))
+    results = detect_anomalies(make_transactions(50, seed=1, start=1000))
+    path = tmp_path / 'results.json'
+
+    dump(results, str(path))
+
+    assert json.loads(path.read_text()) == json.loads(json.dumps(results, cls=JSONEncoder)), \
+        "The fast writer should produce the same document as the standard encoder."
+    assert path.read_text().startswith('[\n  {'), "Files should be pretty-printed."
+
+
+def test_detect_response(tmp_path, monkeypatch, make_transactions):
+    monkeypatch.chdir(tmp_path)
+    train_model(make_transactions(300, seed=0))
+    pool = BoundedExecutor(max_workers=1, queue_depth=1, use_processes=False)
+    monkeypatch.setattr(app_module, 'detection_pool', pool)
+    client = TestClient(app_module.app)
+    transactions = make_transactions(20, seed=2, start=2000)
+
+    response = client.post('/detect', json={'transactions': transactions})
+    single = client.post('/detect', json={'transactions': transactions[:1]})
+    pool.shutdown()
+
+    body = response.json()
+    assert response.status_code == 200
+    assert body['results'] == json.loads(json.dumps(detect_anomalies(transactions)))
+    assert body['total_transactions'] == 20
+    assert body['anomalous_transactions'] == sum(r['is_anomaly'] for r in body['results'])
+    assert 'timestamp' in body
+    assert single.status_code == 200, "Undefined feature values of a single transaction should not fail."
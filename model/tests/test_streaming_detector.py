@@ -0,0 +1,58 @@
+import pytest
+import numpy as np
+import pandas as pd
+from src.anomaly_detection.isolation_forest import build_results
+from src.anomaly_detection.streaming_detector import StreamingAnomalyDetector
+
+
+def make_frame(n_rows, seed=0, value_scale=1.0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'hash': [f'0x{seed}_{i}' for i in range(n_rows)],
+        'value': rng.lognormal(mean=40, sigma=0.5, size=n_rows) * value_scale,
+        'gas': rng.choice([21000, 50000], n_rows),
+        'gasPrice': rng.integers(10, 30, n_rows) * 1_000_000_000
+    })
+
+
+@pytest.fixture
+def warm_detector():
+    detector = StreamingAnomalyDetector(window_size=250, random_state=0)
+    detector.update(make_frame(250))
+    return detector
+
+
+def test_warm_up_does_not_flag():
+    detector = StreamingAnomalyDetector(window_size=100)
+    columns = detector.update(make_frame(50))
+
+    assert not detector.is_warm, "Detector should still be warming up."
+    assert not columns['is_anomaly'].any(), "No anomalies should be flagged during warm-up."
+
+
+def test_flags_outliers_one_at_a_time(warm_detector):
+    flagged = []
+    outliers = make_frame(20, seed=1, value_scale=1e9)
+    for i in range(len(outliers)):
+        flagged.append(bool(warm_detector.update(outliers.iloc[i:i + 1])['is_anomaly'][0]))
+
+    assert sum(flagged) >= 16, "Most extreme transaction values should be flagged."
+
+
+def test_memory_stays_bounded(warm_detector):
+    mass_shape = warm_detector.reference_mass.shape
+    warm_detector.update(make_frame(1300, seed=2))
+
+    assert warm_detector.n_windows == 6, "Every full window should trigger a swap."
+    assert warm_detector.window_fill == 50, "Window buffer should hold only the current window."
+    assert warm_detector.reference_mass.shape == mass_shape, "Mass profiles should not grow."
+
+
+def test_result_schema(warm_detector):
+    results = build_results(warm_detector.update(make_frame(10, seed=3, value_scale=1e9)))
+
+    assert len(results) == 10, "Result count does not match input."
+    assert results[0]['transaction_hash'] == '0x3_0', "Hashes are misaligned."
+    flagged = [r for r in results if r['is_anomaly']]
+    assert flagged, "Extreme transactions should be flagged."
+    assert flagged[0]['anomaly_types'][0]['type'] == 'high_value_transaction', "Anomaly was not typed."
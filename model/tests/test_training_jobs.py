@@ -0,0 +1,135 @@
+import os
+import time
+import pytest
+from fastapi.testclient import TestClient
+from src import app as app_module
+from src import training_jobs as training_jobs_module
+from src.training_jobs import TrainingJobManager
+from src.anomaly_detection.model_registry import model_registry
+
+ADDRESS_A = '0x' + 'a' * 40
+ADDRESS_B = '0x' + 'b' * 40
+
+
+def slow_train(address, data=None):
+    time.sleep(60)
+
+
+def wait_for(manager, job_id, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = manager.get(job_id)
+        if job['status'] not in ('queued', 'running'):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"Job {job_id} did not finish within {timeout}s")
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def test_job_trains_in_separate_process(workdir, make_transactions):
+    trained = []
+    manager = TrainingJobManager(on_success=trained.append)
+
+    job, created = manager.submit(ADDRESS_A, make_transactions(200, seed=0))
+    finished = wait_for(manager, job['job_id'])
+
+    assert created
+    assert finished['status'] == 'success', f"Training should succeed, got {finished}"
+    assert finished['model_version'] == model_registry.get(ADDRESS_A).manifest['model_version']
+    assert trained == [ADDRESS_A], "The success callback should run once for the trained address."
+
+
+def test_identical_requests_deduplicated(workdir, monkeypatch, make_transactions):
+    monkeypatch.setattr(training_jobs_module, '_train_address', slow_train)
+    manager = TrainingJobManager()
+    data = make_transactions(50, seed=1)
+
+    first, _ = manager.submit(ADDRESS_A, data)
+    second, created = manager.submit(ADDRESS_A.upper().replace('0X', '0x'), list(data))
+    other, other_created = manager.submit(ADDRESS_A, make_transactions(50, seed=2))
+
+    assert not created and second['job_id'] == first['job_id'], \
+        "An identical request should return the active job."
+    assert other_created and other['job_id'] != first['job_id']
+    assert other['status'] == 'queued', "A second job for the same address should wait for the first."
+    for job in manager.jobs():
+        manager.cancel(job['job_id'])
+
+
+def test_jobs_queued_beyond_limit(workdir, monkeypatch):
+    monkeypatch.setattr(training_jobs_module, '_train_address', slow_train)
+    manager = TrainingJobManager(max_running=1)
+
+    first, _ = manager.submit(ADDRESS_A)
+    second, _ = manager.submit(ADDRESS_B)
+
+    assert manager.get(first['job_id'])['status'] == 'running'
+    assert manager.get(second['job_id'])['status'] == 'queued'
+
+    manager.cancel(first['job_id'])
+    deadline = time.time() + 10
+    while manager.get(second['job_id'])['status'] == 'queued' and time.time() < deadline:
+        time.sleep(0.05)
+
+    assert manager.get(second['job_id'])['status'] == 'running', \
+        "The queued job should start once the running one is cancelled."
+    manager.cancel(second['job_id'])
+
+
+def test_cancel_running_job(workdir, monkeypatch):
+    monkeypatch.setattr(training_jobs_module, '_train_address', slow_train)
+    manager = TrainingJobManager()
+
+    job, _ = manager.submit(ADDRESS_A)
+    process = manager._processes[job['job_id']]
+    cancelled = manager.cancel(job['job_id'])
+    process.join(timeout=10)
+
+    assert cancelled['status'] == 'cancelled'
+    assert not process.is_alive(), "Cancelling should terminate the training process."
+    with pytest.raises(ValueError):
+        manager.cancel(job['job_id'])
+
+
+def test_cancelled_job_blocks_address_until_exit(workdir, monkeypatch):
+    monkeypatch.setattr(training_jobs_module, '_train_address', slow_train)
+    manager = TrainingJobManager(max_running=2)
+    running_at_cleanup = []
+    monkeypatch.setattr(manager, '_remove_partial_bundles',
+                        lambda address: running_at_cleanup.append(len(manager._processes)))
+
+    first, _ = manager.submit(ADDRESS_A)
+    manager.cancel(first['job_id'])
+    second, _ = manager.submit(ADDRESS_A)
+    deadline = time.time() + 10
+    while manager.get(second['job_id'])['status'] == 'queued' and time.time() < deadline:
+        time.sleep(0.05)
+
+    assert manager.get(second['job_id'])['status'] == 'running'
+    assert running_at_cleanup == [0], \
+        "A new job for the address should only start after the cancelled one's files are cleaned up."
+    manager.cancel(second['job_id'])
+
+
+def test_train_endpoint_returns_job(workdir, monkeypatch, make_transactions):
+    manager = TrainingJobManager()
+    monkeypatch.setattr(app_module, 'training_jobs', manager)
+    client = TestClient(app_module.app)
+
+    response = client.post('/train', json={'transactions': make_transactions(200, seed=3)})
+    job_id = response.json()['job_id']
+    wait_for(manager, job_id)
+    status = client.get(f'/train/{job_id}')
+
+    assert response.status_code == 200
+    assert status.status_code == 200 and status.json()['status'] == 'success'
+    assert client.get('/model/status').json()['manifest']['model_version'] == status.json()['model_version'], \
+        "The status should describe the model on disk, without reloading it in the API process."
+    assert os.path.exists(os.path.join('models', 'model_bundle.joblib'))
+    assert client.get('/train/unknown').status_code == 404
+    assert client.delete(f'/train/{job_id}').status_code == 409, "A finished job cannot be cancelled."
@@ -0,0 +1,75 @@
+import pytest
+from src.api.api_utils import TokenBucket
+from src.api.etherscan_api import EtherscanAPI
+from src.api.etherscan_stub import EtherscanStub, synthetic_history
+from src.data_processing.transaction_store import TransactionStore
+from src.main import load_stored_transactions
+
+ADDRESS = '0x' + 'ef' * 20
+
+
+@pytest.fixture
+def store(tmp_path):
+    return TransactionStore(str(tmp_path / 'data' / 'transactions.db'))
+
+
+@pytest.fixture
+def history():
+    return synthetic_history(ADDRESS, 25000, blocks=100000)
+
+
+@pytest.fixture
+def stub():
+    stub = EtherscanStub()
+    stub.start()
+    yield stub
+    stub.stop()
+
+
+def api_for(stub):
+    return EtherscanAPI('key', base_url=stub.base_url, rate_limiter=TokenBucket(rate=1000, capacity=1000))
+
+
+def test_range_queries_and_replacement(store, history):
+    store.add(ADDRESS, history[10000:])
+    store.add(ADDRESS.upper().replace('0X', '0x'), history[:12000])
+
+    assert store.count(ADDRESS) == len(history), "Transactions stored twice should be kept once."
+    assert [t['hash'] for t in store.transactions(ADDRESS)] == [t['hash'] for t in history]
+    start, end = int(history[3000]['blockNumber']), int(history[4000]['blockNumber'])
+    expected = [t['hash'] for t in history if start <= int(t['blockNumber']) <= end]
+    assert store.frame(ADDRESS, start, end)['hash'].tolist() == expected
+    assert store.transactions('0x' + '00' * 20) == []
+
+
+def test_sync_only_fetches_new_blocks(store, history, stub):
+    split = 20000
+    last_old_block = int(history[split - 1]['blockNumber'])
+    stub.add_history(ADDRESS, [t for t in history if int(t['blockNumber']) <= last_old_block])
+
+    assert store.sync(ADDRESS, api_for(stub)) == sum(int(t['blockNumber']) <= last_old_block for t in history)
+    assert store.sync_state(ADDRESS)[0] == last_old_block
+
+    stub.add_history(ADDRESS, history)
+    before = stub.requests
+    new = store.sync(ADDRESS, api_for(stub), force=True)
+
+    assert new == sum(int(t['blockNumber']) > last_old_block for t in history), \
+        "Only transactions after the last sync should be fetched."
+    assert stub.requests - before == 2, "A small increment should take one block number and one txlist query."
+    assert [t['hash'] for t in store.transactions(ADDRESS)] == [t['hash'] for t in history]
+
+
+def test_current_history_is_read_without_requests(store, history, stub, monkeypatch):
+    stub.add_history(ADDRESS, history)
+    monkeypatch.setenv('ETHERSCAN_API_KEY', 'key')
+    monkeypatch.setattr('src.main.EtherscanAPI', lambda api_key: api_for(stub))
+
+    first = load_stored_transactions(ADDRESS, store=store)
+    requests = stub.requests
+    second = load_stored_transactions(ADDRESS, store=store)
+
+    assert len(first) == len(second) == len(history)
+    assert stub.requests == requests, "A recently synced history should be read from the store alone."
+    load_stored_transactions(ADDRESS, refresh=True, store=store)
+    assert stub.requests == requests + 1, "A refresh without new blocks should only ask for the block number."
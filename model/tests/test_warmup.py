@@ -0,0 +1,62 @@
+import time
+import asyncio
+from fastapi.testclient import TestClient
+from src import app as app_module
+from src import warmup as warmup_module
+from src.main import train_model
+from src.detection_pool import BoundedExecutor
+from src.warmup import WarmupStatus, READY, FAILED
+
+
+def test_warm_up_models_and_workers(tmp_path, monkeypatch, make_transactions):
+    monkeypatch.chdir(tmp_path)
+    train_model(make_transactions(300, seed=0))
+    pool = BoundedExecutor(max_workers=2, queue_depth=1, use_processes=False)
+    status = WarmupStatus(addresses=[None, '0xabc'], n_rows=100)
+
+    assert not status.ready
+    asyncio.run(status.run(pool))
+    pool.shutdown()
+
+    report = status.report()
+    assert status.state == READY and report['ready']
+    assert report['models'] == ['default'], "Addresses without a stored model should be skipped."
+    assert set(report['stages']) == {'model_load', 'pipeline', 'workers'}
+    assert report['warmup_seconds'] >= sum(report['stages'].values()) * 0.99
+
+
+def test_failed_warm_up_is_reported(tmp_path, monkeypatch, make_transactions):
+    monkeypatch.chdir(tmp_path)
+    train_model(make_transactions(300, seed=0))
+
+    def broken(*args, **kwargs):
+        raise RuntimeError("corrupt model")
+
+    monkeypatch.setattr(warmup_module, 'detect_anomalies', broken)
+    status = WarmupStatus(n_rows=10)
+    asyncio.run(status.run())
+
+    assert status.state == FAILED and status.ready, "A failed warm-up should not keep the service unready."
+    assert status.report()['error'] == "corrupt model"
+
+
+def test_ready_endpoint(tmp_path, monkeypatch, make_transactions):
+    monkeypatch.chdir(tmp_path)
+    train_model(make_transactions(300, seed=0))
+    pool = BoundedExecutor(max_workers=1, queue_depth=1, use_processes=False)
+    monkeypatch.setattr(app_module, 'detection_pool', pool)
+    monkeypatch.setattr(app_module, 'warmup', WarmupStatus(n_rows=100))
+
+    assert TestClient(app_module.app).get('/ready').status_code == 503, "Not ready before the warm-up."
+
+    with TestClient(app_module.app) as client:
+        deadline = time.monotonic() + 30
+        while (response := client.get('/ready')).status_code == 503 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        metrics_page = client.get('/metrics').text
+    pool.shutdown()
+
+    body = response.json()
+    assert response.status_code == 200 and body['status'] == READY
+    assert body['warmup_seconds'] > 0
+    assert 'warmup_seconds ' in metrics_page, "The warm-up time should be exported as a metric."